@@ -1,5 +1,55 @@
+import os
+import sys
+import json
+import queue
+import asyncio
+import heapq
+import operator
+import struct
+import zlib
+import zipfile
+import cProfile
+import threading
+import argparse
+import collections
+import multiprocessing
 import numpy as np
-from time import sleep
+from array import array
+from time import sleep, perf_counter
+try:
+    import resource
+except ImportError:
+    # Peak RSS is not measured on platforms without the resource module
+    resource = None
+
+# Species codes used by the ArrayEngine columns
+CARNIVORE, HERBIVORE, OMNIVORE, PLANT = 0, 1, 2, 3
+SPECIES_NAMES = ('Carnivore', 'Herbivore', 'Omnivore', 'Plant')
+# Offsets of cells occupied by a creature of size 1 to 3 from its anchor cell
+FOOTPRINT_OFFSETS = ((0, 0), (0, -1), (0, 1))
+# Footprint offsets by size, bigger creatures occupy 3 cells
+FOOTPRINT_TEMPLATES = tuple(FOOTPRINT_OFFSETS[:size] for size in range(len(FOOTPRINT_OFFSETS) + 1))
+MAX_FOOTPRINT = len(FOOTPRINT_OFFSETS)
+# Cells are packed into int64 keys as (x << 32) + y, so coordinates are limited by 32 bits
+COORDINATE_LIMIT = 1 << 31
+
+# Event types of the EventLog and the least verbosity that enables them
+BORN, DIED, ATE, FIGHT_WON, FIGHT_LOST, RELOCATED = range(6)
+EVENT_NAMES = ('born', 'died', 'ate', 'fight_won', 'fight_lost', 'relocated')
+EVENT_VERBOSITY = (1, 1, 2, 2, 2, 3)
+# Kinds of events of the Scheduler, events due at one tick are processed in this order
+AGE_DEATH, SHOOT = range(2)
+EVENT_KINDS = 2
+
+# Record of the EventLog: other creature is the eaten food or the opponent, -1 if there is none
+EVENT_DTYPE = np.dtype([
+    ('tick', np.int32),
+    ('event', np.uint8),
+    ('creature', np.int64),
+    ('species', np.int8),
+    ('other', np.int64),
+    ('other_species', np.int8),
+])
 
 
 class Emulation:
@@ -7,806 +57,5075 @@ class Emulation:
     Emulates the game "Life" until the Field is empty
 
     Attributes:
-        creatures(list): List with generated creatures
+        creatures(CreatureRegistry): Registry of generated creatures
         field(list): Field class instance (matrix of the field)
+        world(World): References shared by all creatures of the 'object' engine
+        engine(str): 'object' emulates Creature instances one by one, 'array' uses ArrayEngine columns,
+            'tiled' splits the world between ArrayEngine instances in worker processes
+        arrays(ArrayEngine): Creature columns when the 'array' engine is selected (TiledEngine for 'tiled')
+        tiles(int): Amount of tiles and worker processes of the 'tiled' engine
+        territory(int): Side of the square territory where creatures are generated
+        seed(int): Seed of the random numbers. The same seed and parameters produce an identical emulation
+        events(EventLog): Log of born, died, ate, fight and relocated events
+        tick(int): Amount of emulated time units
+        headless(bool): Emulates without sleeps and prints, events are written only to the event log
+        instruments(Instruments): Collector of per-period timings and counters, None if not attached
+        renderer(Renderer): Off-thread renderer of the field, None if the field is not visualized
+        statistics(Statistics): Population statistics of each period, None if they are not collected
+        server(StreamServer): Server that streams changes of each period to viewers, None if it is not attached
+        CHECKED_ATTRIBUTES, CHECKED_ANIMAL_ATTRIBUTES(operator.attrgetter): Attributes of creatures in the checksum
+        replay(ReplayLog): Log of keyframes and checksums of each period, None if the emulation is not recorded
+        history(History): Memory-mapped grids of the field of each period, None if they are not kept
 
     Methods:
         period: Emulates one time unit. Returns updated Field
-        visualize: Visualizes Field for one time unit by PyGame module
+        scheduled_phase: Handles events of the Scheduler due at the current tick
+        find_herds: Finds herds of herbivores for the period
+        move_phase: Emulates the part of the period of animals that does not depend on other creatures
+        interaction_phase: Emulates interactions of animals with explicit resolution of conflicts
+        cell_index: Builds CellIndex of shared cells of the field
+        eat_phase: Emulates eating plants
+        fight_phase: Emulates attacks of animals
+        mating_phase: Emulates reproduction of animals
+        combat: Emulates fights of animals at once
+        generate: Generates world by the selected engine
+        population: Returns amount of creatures on the field
+        species_counts: Returns amount of creatures of each species
+        bytes_per_creature: Returns memory of creatures, their registry, scheduled events and the field per creature
+        visualize: Sends changes of the Field for one time unit to the off-thread renderer
+        occupied_cells: Returns colors of all occupied cells
+        cell_changes: Returns colors of cells changed since the previous period
+        population_changes: Returns creatures born and died since the previous period
+        publish: Sends changes of the period to the stream server
+        broadcast: Attaches (or detaches) a stream server to the emulation
+        checksum: Returns checksum of creatures and random numbers
+        record: Attaches (or detaches) a replay log to the emulation
+        keep_history: Attaches (or detaches) a history of the field to the emulation
         start: Starts emulation by generating world and continuing emulation until the Field is empty
+        run: Continues emulation until the Field is empty
+        instrument: Attaches (or detaches) instrumentation to the emulation
+        collect_statistics: Attaches (or detaches) population statistics to the emulation
+        save: Saves the emulation to a checkpoint file
+        load: Loads an emulation from a checkpoint file
     """
-    def __init__(self):
+    # Attributes of creatures of the 'object' engine included in the checksum
+    CHECKED_ATTRIBUTES = operator.attrgetter('id', 'SPECIES', 'birth', 'x', 'y', 'size', 'mass')
+    CHECKED_ANIMAL_ATTRIBUTES = operator.attrgetter('sex', 'hunger', 'hp', 'hit')
+
+    def __init__(self, engine='object', seed=None, events=None, tiles=4, territory=100):
+        assert engine in ('object', 'array', 'tiled')
         self.creatures = None
         self.field = None
+        self.world = None
+        self.engine = engine
+        self.arrays = None
+        self.seed = seed
+        self.events = events
+        self.tick = 0
+        self.headless = False
+        self.tiles = tiles
+        self.territory = territory
+        self.instruments = None
+        self.renderer = None
+        self.statistics = None
+        self.server = None
+        self.replay = None
+        self.history = None
+        self.changes = None
+        self.snapshot = None
+        self.members = None
+        self.counts = None
 
     def period(self):
         """Emulates one time unit. Returns updated Field"""
+        self.tick += 1
+        self.events.tick = self.tick
+        instruments = self.instruments
+        if instruments is not None:
+            instruments.start_period(self)
+        if self.engine in ('array', 'tiled'):
+            self.arrays.period()
+        else:
+            world = self.world
+            world.tick = self.tick
+            if world.statistics is not None:
+                # Ages and lazy plants grew without touching the statistics
+                world.statistics.advance()
+            self.scheduled_phase()
+            self.find_herds()
+            # Lazy creatures change only by their events
+            animals = list(self.creatures.active_creatures())
+            self.move_phase(animals)
+            self.interaction_phase()
+            # Frees slots of creatures died during the period
+            self.creatures.compact()
+        if instruments is not None:
+            instruments.end_period(self)
+        if self.statistics is not None:
+            self.statistics.end_period(self)
+        if self.replay is not None:
+            self.replay.end_period(self)
+        if self.history is not None:
+            self.history.end_period(self)
+        self.events.end_period()
+        if not self.headless:
+            print('---'*10)
+
+    def scheduled_phase(self):
+        """Handles events of the Scheduler due at the current tick ('object' engine)"""
+        for kind, creature_id in self.world.scheduler.due(self.tick):
+            creature = self.creatures.get(creature_id)
+            if creature is not None:
+                creature.on_event(kind)
+
+    def move_phase(self, animals):
+        """Emulates the part of the period of animals ('object' engine) that does not depend on other creatures"""
+        for animal in animals:
+            animal.move()
+
+    def interaction_phase(self):
+        """
+        Emulates eating, attacks and reproduction of animals ('object' engine). Candidates of every kind of
+        interaction are enumerated from one CellIndex built after the move phase and checked against the state
+        left by the previous kind, conflicts are resolved by Conflicts, so neither the order of animals
+        nor deaths during the phase change other interactions
+        """
+        index, creatures = self.cell_index()
+        self.eat_phase(index, creatures)
+        self.fight_phase(index, creatures)
+        self.mating_phase(index, creatures)
+
+    def cell_index(self):
+        """
+        Builds CellIndex of cells shared by two or more creatures in active chunks of the Field ('object' engine),
+        cells of sleeping chunks (only plants) are left out. Owners are numbered in the order of ids,
+        returns the index with the list of creatures its owners refer to
+        """
+        ids, x, y = self.field.shared_cells()
+        ids, owner = np.unique(np.array(ids, dtype=np.int64), return_inverse=True)
+        get = self.creatures.get
+        creatures = [get(creature_id) for creature_id in ids.tolist()]
+        species = np.array([creature.SPECIES for creature in creatures], dtype=np.int8)
+        return CellIndex(owner, np.array(x, dtype=np.int64), np.array(y, dtype=np.int64), species[owner]), creatures
+
+    def eat_phase(self, index, creatures):
+        """Emulates eating plants ('object' engine): each plant is eaten by one of the animals sharing its cells"""
+        is_alive = self.creatures.is_alive
+        animals, plants, _, _ = index.pairs([HERBIVORE, OMNIVORE], [PLANT])
+        animals, plants = animals.tolist(), plants.tolist()
+        for meal in Conflicts.claims(self.world.rng, plants).tolist():
+            animal = creatures[animals[meal]]
+            # A poisoned animal does not eat its other plants
+            if is_alive(animal):
+                animal.eat(creatures[plants[meal]])
+
+    def fight_phase(self, index, creatures):
+        """Emulates attacks of animals ('object' engine): each animal takes part in at most one fight"""
+        is_alive = self.creatures.is_alive
+        attackers, defenders, _, _ = index.pairs([CARNIVORE, OMNIVORE], [CARNIVORE, HERBIVORE, OMNIVORE])
+        fights = [(creatures[attacker], creatures[defender])
+                  for attacker, defender in zip(attackers.tolist(), defenders.tolist())]
+        fights = [(attacker, defender) for attacker, defender in fights
+                  if is_alive(attacker) and is_alive(defender) and attacker.attacks(defender)]
+        taken = Conflicts.matching(self.world.rng, [attacker.id for attacker, _ in fights],
+                                   [defender.id for _, defender in fights])
+        self.combat([fights[index] for index in taken.tolist()])
+
+    def mating_phase(self, index, creatures):
+        """
+        Emulates reproduction of animals ('object' engine): each animal mates with one partner at most,
+        a pair has one child in a shared cell
+        """
+        is_alive = self.creatures.is_alive
+        first, second, x, y = index.pairs([CARNIVORE, HERBIVORE, OMNIVORE], [CARNIVORE, HERBIVORE, OMNIVORE])
+        pairs = [(creatures[animal], creatures[partner], coordinates) for animal, partner, coordinates
+                 in zip(first.tolist(), second.tolist(), zip(x.tolist(), y.tolist()))]
+        pairs = [(animal, partner, coordinates) for animal, partner, coordinates in pairs
+                 if is_alive(animal) and is_alive(partner) and animal.mates(partner)]
+        taken = Conflicts.matching(self.world.rng, [animal.id for animal, _, _ in pairs],
+                                   [partner.id for _, partner, _ in pairs])
+        for index in taken.tolist():
+            animal, partner, coordinates = pairs[index]
+            animal.create_child(list(coordinates))
+
+    def combat(self, fights):
+        """
+        Emulates fights of animals ('object' engine) given as (attacker, defender) pairs at once by Combat.
+        Summed changes are applied by the update methods of animals, so statistics, sizes and deaths
+        are updated as by single fights
+        """
+        if not fights:
+            return
+        animals = list({animal.id: animal for fight in fights for animal in fight}.values())
+        position = {animal.id: index for index, animal in enumerate(animals)}
+        won, changed, hunger, mass, hp, killed = Combat.resolve(
+            self.world.rng,
+            [position[attacker.id] for attacker, _ in fights],
+            [position[defender.id] for _, defender in fights],
+            np.array([animal.SPECIES for animal in animals]),
+            np.array([animal.hunger for animal in animals], dtype=np.float64),
+            np.array([animal.mass for animal in animals], dtype=np.float64),
+            np.array([getattr(animal, 'aggressiveness', 0) for animal in animals], dtype=np.float64),
+            np.array([animal.hit for animal in animals], dtype=np.float64),
+            np.array([animal.herd_defense() if type(animal) is Herbivore else 0 for animal in animals]),
+        )
+        events = self.world.events
+        for (attacker, defender), result in zip(fights, won.tolist()):
+            event_type = FIGHT_WON if result else FIGHT_LOST
+            if events.enabled[event_type]:
+                attacker.log(event_type, defender)
+        is_alive = self.creatures.is_alive
+        for index, hunger_change, mass_change, hp_change, dead in zip(
+                changed.tolist(), hunger.tolist(), mass.tolist(), hp.tolist(), killed.tolist()):
+            animal = animals[index]
+            if dead:
+                animal.die()
+                continue
+            # A fight changes hunger, mass and hp in this order, each of them may kill the animal
+            if hunger_change:
+                animal.update_hunger(hunger_change)
+            if mass_change and is_alive(animal):
+                animal.update_mass(mass_change)
+            if hp_change and is_alive(animal):
+                animal.update_hp(hp_change)
+
+    def find_herds(self):
+        """Finds herds of herbivores of the 'object' engine for the period"""
+        herbivores = [creature for creature in self.creatures.active_creatures() if type(creature) is Herbivore]
+        x = [herbivore.x for herbivore in herbivores]
+        y = [herbivore.y for herbivore in herbivores]
+        size, step_x, step_y = Herds(x, y).members(x, y)
+        self.world.herds = {herbivore.id: herd for herbivore, herd in
+                            zip(herbivores, zip(size.tolist(), step_x.tolist(), step_y.tolist()))}
+
+    def population(self):
+        """Returns amount of creatures on the field"""
+        if self.engine in ('array', 'tiled'):
+            return self.arrays.count
+        return len(self.creatures)
+
+    def species_counts(self):
+        """Returns amount of creatures of each species (indexed by species code)"""
+        if self.engine == 'array':
+            return np.bincount(self.arrays.species, minlength=len(SPECIES_NAMES))
+        if self.engine == 'tiled':
+            return self.arrays.species_counts()
+        counts = np.zeros(len(SPECIES_NAMES), dtype=np.int64)
         for creature in self.creatures:
-            creature.move()
-        print('---'*10)
+            counts[creature.SPECIES] += 1
+        return counts
+
+    def bytes_per_creature(self):
+        """Returns memory of creatures, their registry, scheduled events and the field divided by amount of creatures"""
+        if self.engine in ('array', 'tiled'):
+            arrays = self.arrays.gather() if self.engine == 'tiled' else self.arrays
+            return sum(getattr(arrays, name).nbytes for name in ArrayEngine.COLUMNS) / max(arrays.count, 1)
+
+        # Each object is counted once even if it is shared (e.g. cached small integers or ids in cells)
+        counted = set()
+        total = 0
+
+        def size_of(obj):
+            if id(obj) in counted:
+                return 0
+            counted.add(id(obj))
+            return sys.getsizeof(obj)
+
+        registry = self.creatures
+        for container in (registry.slots, registry.generations, registry.free_slots, registry.dead_slots):
+            total += size_of(container) + sum(size_of(value) for value in container)
+        total += size_of(registry.active)
+        # Plants have no objects, their handles are made on demand
+        plants = registry.plants
+        for container in (plants.free_slots, plants.dead_slots):
+            total += size_of(container) + sum(size_of(value) for value in container)
+        columns = [getattr(plants, name) for name in plants.TYPECODES]
+        for column in (plants.generations, plants.alive, plants.placed, *columns):
+            total += size_of(column)
+        for creature in registry.slots:
+            if creature is None:
+                continue
+            total += size_of(creature)
+            names = [name for cls in type(creature).__mro__ for name in getattr(cls, '__slots__', ())]
+            values = [getattr(creature, name) for name in names if name != 'world']
+            values.extend(getattr(creature, '__dict__', dict()).values())
+            total += sum(size_of(value) for value in values)
+        scheduler = self.world.scheduler
+        total += size_of(scheduler.wheel) + size_of(scheduler.overflow)
+        for bucket in scheduler.wheel:
+            total += size_of(bucket) + sum(size_of(ids) for ids in bucket)
+        total += sum(size_of(event) for event in scheduler.overflow)
+        total += size_of(self.field.chunks)
+        for chunk in self.field.chunks.values():
+            total += size_of(chunk) + size_of(chunk.cells) + size_of(chunk.shared)
+            total += sum(size_of(ids) for ids in chunk.shared.values())
+        return total / max(len(registry), 1)
 
     def visualize(self):
-        """Visualizes Field for one time unit by PyGame module"""
-        pass
+        """
+        Sends changes of the Field for one time unit to the off-thread renderer (a PyGame window by default).
+        The first call starts the renderer with a keyframe of all occupied cells, later calls send only cells
+        changed since the previous call. Engines without Field send their footprint cells every time
+        """
+        if self.renderer is None:
+            self.renderer = Renderer()
+        keyframe = not self.renderer.running
+        if keyframe:
+            self.renderer.start((0, 0, self.territory, self.territory))
+            # The first call of cell_changes returns all occupied cells and starts tracking changes
+            x, y, values = self.cell_changes() if self.changes is None else self.occupied_cells()
+        else:
+            x, y, values = self.cell_changes()
+        self.renderer.submit(self.tick, x, y, values, keyframe)
 
-    def start(self):
-        """Starts emulation by generating world and continuing emulation until the Field is empty"""
-        print('Game has started!')
-        sleep(1)
-        self.creatures, self.field = WorldGeneration().generate(number_of_creatures=10000)
-        sleep(1)
-        while len(self.creatures) > 0:
-            print(f'Amount of creatures on the field: {len(self.creatures)}')
+    def occupied_cells(self):
+        """Returns x, y and colors of the renderer (Field.cell_values) of all occupied cells"""
+        if self.engine == 'object':
+            return self.field.cell_values(self.field.occupied_positions())
+        arrays = self.arrays.gather() if self.engine == 'tiled' else self.arrays
+        owner, x, y = arrays.footprint_cells()
+        return Renderer.cell_values(x, y, arrays.species[owner])
+
+    def cell_changes(self):
+        """
+        Returns x, y and colors of cells changed since the previous period (all occupied cells on the first call),
+        an empty cell has color 0. Changes are computed once per period, so the renderer and the stream server
+        share them. The 'object' engine tracks changed cells of the Field, other engines compare colors of
+        occupied cells with the previous period
+        """
+        if self.changes is not None and self.changes[0] == self.tick:
+            return self.changes[1:]
+        if self.engine == 'object':
+            if self.field.dirty is None:
+                self.field.dirty = set()
+                x, y, values = self.occupied_cells()
+            else:
+                cells, self.field.dirty = self.field.dirty, set()
+                x, y, values = self.field.cell_values(cells)
+        else:
+            x, y, values = self.occupied_cells()
+            keys = Placement.pack(x, y)
+            order = np.argsort(keys)
+            keys, x, y, values = keys[order], x[order], y[order], values[order]
+            if self.snapshot is None:
+                self.snapshot = (np.zeros(0, dtype=np.int64),) * 3 + (np.zeros(0, dtype=np.uint8),)
+            previous_keys, previous_x, previous_y, previous_values = self.snapshot
+            self.snapshot = (keys, x, y, values)
+            # Cells with a new color and cells that became empty
+            present = Placement.contains(previous_keys, keys)
+            changed = ~present
+            changed[present] = previous_values[np.searchsorted(previous_keys, keys[present])] != values[present]
+            emptied = ~Placement.contains(keys, previous_keys)
+            x = np.concatenate([x[changed], previous_x[emptied]])
+            y = np.concatenate([y[changed], previous_y[emptied]])
+            values = np.concatenate([values[changed], np.zeros(emptied.sum(), dtype=np.uint8)])
+        self.changes = (self.tick, x, y, values)
+        return x, y, values
+
+    def population_changes(self):
+        """
+        Returns ids and species of creatures born and died since the previous call (nothing on the first call).
+        The 'object' engine tracks them in the registry, other engines compare ids with the previous call
+        """
+        if self.engine == 'object':
+            born, died = (np.array(changes, dtype=np.int64).reshape(-1, 2).T
+                          for changes in self.creatures.take_changes())
+            return born[0], born[1], died[0], died[1]
+        arrays = self.arrays.gather() if self.engine == 'tiled' else self.arrays
+        order = np.argsort(arrays.id)
+        ids, species = arrays.id[order], arrays.species[order].astype(np.int64)
+        previous_ids, previous_species = (ids, species) if self.members is None else self.members
+        self.members = (ids, species)
+        born = ~Placement.contains(previous_ids, ids)
+        died = ~Placement.contains(ids, previous_ids)
+        return ids[born], species[born], previous_ids[died], previous_species[died]
+
+    def publish(self):
+        """
+        Sends changed cells, born and died creatures and species counts of the period to the stream server.
+        Never blocks, frames are encoded and written by the server thread
+        """
+        x, y, values = self.cell_changes()
+        born, born_species, died, died_species = self.population_changes()
+        if self.counts is None or self.engine != 'object':
+            self.counts = self.species_counts()
+        else:
+            # Counts of the 'object' engine are updated by births and deaths instead of visiting all creatures
+            self.counts = (self.counts + np.bincount(born_species, minlength=len(SPECIES_NAMES))
+                           - np.bincount(died_species, minlength=len(SPECIES_NAMES)))
+        self.server.submit(self.tick, x, y, values, born, born_species, died, died_species, self.counts)
+
+    def broadcast(self, server=None):
+        """Attaches a stream server that receives changes of each period and starts it. None detaches the server"""
+        if self.server is not None:
+            self.server.close()
+        self.server = server
+        if server is not None:
+            server.start()
+
+    def checksum(self):
+        """
+        Returns CRC32 of creatures and the state of random numbers. Emulations with equal checksums at a tick
+        continue identically. Checksums of different engines are not comparable, checksums of the 'tiled' engine
+        include creatures and random numbers of each tile
+        """
+        if self.engine == 'tiled':
+            # Tiles hash their own columns, only random states and checksums of columns go through the pipes
+            random_state, checksums = self.arrays.checksums()
+            columns = [np.array(checksums, dtype=np.uint32)]
+        elif self.engine == 'array':
+            columns = [getattr(self.arrays, name) for name in ArrayEngine.COLUMNS]
+            random_state = [self.arrays.rng.generator.bit_generator.state, self.arrays.rng.index]
+        else:
+            # Hash of tuples of numbers does not depend on the process (only on the Python version)
+            # and is several times faster than building arrays of attributes
+            creatures = hash((tuple(map(self.CHECKED_ATTRIBUTES, self.creatures)),
+                              tuple(map(self.CHECKED_ANIMAL_ATTRIBUTES, self.creatures.active_creatures()))))
+            columns = [np.array([creatures], dtype=np.int64)]
+            random_state = [self.world.rng.generator.bit_generator.state, self.world.rng.index]
+        # The buffer of random numbers is drawn from the generator, so its state and the index define it
+        checksum = zlib.crc32(json.dumps(random_state, sort_keys=True).encode())
+        for column in columns:
+            checksum = zlib.crc32(np.ascontiguousarray(column), checksum)
+        return checksum
+
+    def record(self, replay=None):
+        """
+        Attaches a replay log that saves a keyframe of the current tick and checksums of each following period.
+        None detaches it
+        """
+        if self.replay is not None:
+            self.replay.close()
+        self.replay = replay
+        if replay is not None:
+            replay.start(self)
+
+    def keep_history(self, history=None):
+        """
+        Attaches a history that writes grids of the field of the current tick and of each following period.
+        None detaches it
+        """
+        if self.history is not None:
+            self.history.close()
+        self.history = history
+        if history is not None:
+            history.start(self)
+
+    def generate(self, number_of_creatures=10000):
+        """Generates world by the selected engine"""
+        if self.events is None:
+            self.events = EventLog(NullSink() if self.headless else PrintSink())
+        if self.engine == 'array':
+            self.arrays = ArrayEngine(seed=self.seed, events=self.events, territory=self.territory)
+            self.arrays.generate(number_of_creatures=number_of_creatures, verbose=not self.headless)
+        elif self.engine == 'tiled':
+            self.arrays = TiledEngine(tiles=self.tiles, seed=self.seed, territory=self.territory, events=self.events)
+            self.arrays.generate(number_of_creatures=number_of_creatures)
+        else:
+            generation = WorldGeneration(seed=self.seed, events=self.events, territory=self.territory)
+            self.creatures, self.field = generation.generate(number_of_creatures, verbose=not self.headless)
+            self.world = generation.world
+
+    def start(self, number_of_creatures=10000, headless=False, periods=None):
+        """
+        Starts emulation by generating world and continuing emulation until the Field is empty.
+        Headless emulation has no sleeps and prints, periods limits amount of emulated time units
+        """
+        self.headless = headless
+        if not headless:
+            print('Game has started!')
+            sleep(1)
+        self.generate(number_of_creatures)
+        if not headless:
             sleep(1)
+        self.run(periods)
+
+    def run(self, periods=None):
+        """
+        Continues emulation until the Field is empty or until the tick reaches periods.
+        Every period is visualized if a renderer is attached and published if a stream server is attached
+        """
+        if self.renderer is not None:
+            self.visualize()
+        if self.server is not None:
+            self.publish()
+        while self.population() > 0 and (periods is None or self.tick < periods):
+            if not self.headless:
+                print(f'Amount of creatures on the field: {self.population()}')
+                sleep(1)
             self.period()
+            if self.renderer is not None:
+                self.visualize()
+            if self.server is not None:
+                self.publish()
+        if self.renderer is not None:
+            self.renderer.close()
+        if self.server is not None:
+            self.server.close()
+        if self.statistics is not None:
+            self.statistics.close()
+        if self.replay is not None:
+            self.replay.close()
+        if self.history is not None:
+            self.history.close()
+        self.events.close()
+        if self.engine == 'tiled':
+            self.arrays.close()
+
+    def instrument(self, instruments=None):
+        """
+        Attaches instrumentation that collects timings and counters of each period of the generated world.
+        None detaches it
+        """
+        if self.instruments is not None:
+            self.instruments.disable()
+        self.instruments = instruments
+        if instruments is not None:
+            instruments.enable(self)
+
+    def collect_statistics(self, statistics=None):
+        """
+        Attaches population statistics and records the current state (tick 0 of a generated world).
+        Creatures of the 'object' engine update them on birth, death and change of attributes, so they
+        are scanned only once here. None detaches the statistics
+        """
+        if self.world is not None:
+            self.world.statistics = None
+        self.statistics = statistics
+        if statistics is not None:
+            statistics.start(self)
+            if self.engine == 'object':
+                self.world.statistics = statistics
+
+    def save(self, path):
+        """Saves the emulation to a checkpoint file"""
+        Checkpoint().save(self, path)
+
+    @staticmethod
+    def load(path, mmap=False, events=None):
+        """Loads an emulation from a checkpoint file. Columns of the 'array' engine can be memory-mapped"""
+        return Checkpoint().load(path, mmap=mmap, events=events)
 
 
 class WorldGeneration:
     """
-    Class for world generation. Returns list of instances and field instance
+    Class for world generation. Returns registry of instances and field instance
 
     Attributes:
-        creatures(list): List of instances of classes Carnivore, Herbivore, Omnivore, Plant
+        creatures(CreatureRegistry): Registry of instances of classes Carnivore, Herbivore, Omnivore, Plant
         field(list): Instance of class Field
+        rng(RandomStream): Random numbers shared by all generated creatures
+        world(World): References shared by all generated creatures
+        events(EventLog): Event log of the emulation
 
     Methods:
-        generate: Generate Field 100x100 cells and random number of creatures. Returns field matrix
+        generate: Generate creatures within the territory (100x100 cells by default). Returns field matrix
     """
-    def __init__(self):
-        self.creatures = list()
-        self.field = Field()
+    def __init__(self, seed=None, events=None, territory=100):
+        self.creatures = CreatureRegistry()
+        self.field = Field(self.creatures)
+        self.rng = RandomStream(seed)
+        self.events = EventLog() if events is None else events
+        self.world = World(self.field, self.creatures, self.rng, self.events, territory)
 
-    def generate(self, number_of_creatures=10000):
-        """Generate Field 100x100 cells and random number of creatures. Returns field matrix"""
-        for creature_index in range(number_of_creatures):
-            # Randomly chooses what to create — animal or plant
-            animal = bool(np.random.randint(0, 2))
-            creature = None
-            start_age = np.random.randint(0, 100)
-            if animal:
-                animal_choice = np.random.randint(0, 3)
-                if animal_choice == 0:
-                    # Creates Carnivore instance
-                    creature = Carnivore(self.field, self.creatures, start_age)
-                    # Generates position
-                    creature.generate_position()
-                elif animal_choice == 1:
-                    # Creates Herbivore instance
-                    creature = Herbivore(self.field, self.creatures, start_age)
-                    # Generates position
-                    creature.generate_position()
-                elif animal_choice == 2:
-                    # Creates Omnivore instance
-                    creature = Omnivore(self.field, self.creatures, start_age)
-                    # Generates position
-                    creature.generate_position()
-            elif not animal:
-                # Creates Plant instance
-                creature = Plant(self.field, self.creatures, start_age)
-                # Generates position
-                creature.generate_position()
-            # Adds instance to self.creatures
-            self.creatures.append(creature)
-        print('---' * 10)
-        print('World generated')
-        print('---' * 10)
+    def generate(self, number_of_creatures=10000, verbose=True):
+        """
+        Generate creatures within the territory (100x100 cells by default). Returns field matrix.
+        Attributes of all creatures are drawn as arrays and their footprints are placed by Placement.scatter
+        """
+        rng, world, number = self.rng, self.world, number_of_creatures
+        # Randomly chooses what to create — animal (carnivore, herbivore or omnivore) or plant
+        animal = rng.randint(0, 2, size=number).astype(bool)
+        species = np.where(animal, rng.randint(0, 3, size=number), PLANT)
+        ages = rng.randint(0, 100, size=number)
+        mass = rng.randint(0, 300, size=number)
+        size = mass // 100 + 1
+        sex = rng.randint(0, 2, size=number).astype(bool)
+        hit = rng.randint(15, 45, size=number)
+        toxicity = rng.randint(0, 2, size=number).astype(bool)
+        x, y = Placement.scatter(rng, size, world.position.territory)
+
+        classes = (Carnivore, Herbivore, Omnivore, Plant)
+        insert, place = self.creatures.insert, world.position.place
+        # Creatures of the same age share the int of their birth tick, animals of the same mass share its int
+        births = [world.tick - age for age in range(int(ages.max(initial=0)) + 1)]
+        masses = list(range(int(mass.max(initial=0)) + 1))
+        for row in zip(species.tolist(), ages.tolist(), mass.tolist(), size.tolist(), sex.tolist(), hit.tolist(),
+                       toxicity.tolist(), x.tolist(), y.tolist()):
+            code, age, creature_mass, creature_size, creature_sex, creature_hit, creature_toxicity, anchor_x, \
+                anchor_y = row
+            cls = classes[code]
+            creature = cls.__new__(cls)
+            creature.world = world
+            creature.id = insert(creature)
+            creature.birth, creature.mass, creature.size = births[age], masses[creature_mass], creature_size
+            creature.x = creature.y = None
+            if code == PLANT:
+                creature.toxicity = creature_toxicity
+            else:
+                creature.sex, creature.hunger, creature.hp, creature.hit = creature_sex, 0, 100, creature_hit
+                if code == CARNIVORE:
+                    creature.aggressiveness = 0
+            place(creature, (anchor_x, anchor_y))
+            creature.schedule()
+            if code == PLANT:
+                creature.schedule_shoot()
+        if verbose:
+            print('---' * 10)
+            print('World generated')
+            print('---' * 10)
         return self.creatures, self.field
 
 
-class Field:
+class RandomStream:
     """
-    Stores field list and updates cells of the field
+    Random numbers of one emulation. Numbers are drawn from a seeded np.random.Generator by blocks
+    and scalar values are handed out from the buffer, so single draws do not pay NumPy call overhead
 
     Attributes:
-        field_list(list): Field matrix
+        BLOCK_SIZE(int): Amount of numbers drawn at once
+        generator(np.random.Generator): Source of random numbers
+        buffer(list): Drawn uniform numbers in [0, 1)
+        index(int): Index of the next number in the buffer
 
     Methods:
-        occupy_cell: Sets a Creature instance into particular cell by position
-        leave_cell: Removes a Creature instance from particular cell by position
-        expand: Expands field_list for 5 cells in each side
+        random: Returns uniform number(s) in [0, 1)
+        randint: Returns integer(s) in [low, high) like np.random.randint
+        geometric: Returns number of trials up to the first success
+        get_state: Returns state of the generator and the buffer
+        set_state: Restores state returned by get_state
     """
-    def __init__(self):
-        self.field_list = list()
-        for row in range(100):
-            row = [None for x in range(100)]
-            self.field_list.append(row)
+    BLOCK_SIZE = 4096
 
-    def occupy_cell(self, cell_position, creature_instance):
-        """Sets a Creature instance into particular cell by position"""
-        cell = self.field_list[cell_position[0]][cell_position[1]]
-        if cell is None:
-            # Sets a creature instance to the empty cell
-            self.field_list[cell_position[0]][cell_position[1]] = creature_instance
-        elif type(cell) is list:
-            # Appends to a list if the cell is already occupied by two or more creatures
-            cell.append(creature_instance)
-        else:
-            # Creates a list if the cell is already occupied by one creature
-            cell_list = list()
-            cell_list.append(cell)
-            cell_list.append(creature_instance)
-            self.field_list[cell_position[0]][cell_position[1]] = cell_list
+    def __init__(self, seed=None):
+        self.generator = np.random.default_rng(seed)
+        self.buffer = list()
+        self.index = 0
 
-    def leave_cell(self, cell_position, creature_instance):
-        """Removes a Creature instance from particular cell by position"""
-        cell = self.field_list[cell_position[0]][cell_position[1]]
-        if cell is creature_instance:
-            # Sets None if there is only the Creature instance
-            cell = None
-        elif type(cell) is list:
-            # Removes from a list if there is more than one Creature instance
-            cell.remove(creature_instance)
-
-        # Checks if the list in the cell is empty
-        if cell == list():
-            cell = None
-
-    def expand(self):
-        """Expands field_list for 5 cells in each side"""
-        print('FIELD EXPANDS@')
-        sleep(5)
-        # Adds 5 new cells in the beginning and in the end of each existing row
-        for existing_row in self.field_list:
-            for new_cell in range(5):
-                existing_row.insert(new_cell, None)
-                existing_row.append(None)
-
-        new_row_len = len(self.field_list[0]) + 10
-        # Adds 5 new rows above with additional 5 elements in the beginning and in the end
-        for new_row in range(5):
-            self.field_list.insert(new_row, [None for x in range(new_row_len)])
-        # Adds 5 new rows below with additional 5 elements in the beginning and in the end
-        for new_row in range(5):
-            self.field_list.append([None for x in range(new_row_len)])
+    def random(self, size=None):
+        """Returns a uniform number in [0, 1) from the buffer or an array of them if size is given"""
+        if size is not None:
+            return self.generator.random(size)
+        if self.index == len(self.buffer):
+            # Draws the next block
+            self.buffer = self.generator.random(self.BLOCK_SIZE).tolist()
+            self.index = 0
+        number = self.buffer[self.index]
+        self.index += 1
+        return number
 
+    def randint(self, low, high, size=None):
+        """Returns an integer in [low, high) from the buffer or an array of them if size is given"""
+        if size is not None:
+            return self.generator.integers(low, high, size=size)
+        if high <= low:
+            raise ValueError('low >= high')
+        return low + int(self.random() * (high - low))
 
-class Position:
+    def geometric(self, p, size=None):
+        """Returns number of Bernoulli trials with probability p up to the first success (1, 2, ...)"""
+        if size is not None:
+            return self.generator.geometric(p, size=size)
+        return int(np.log1p(-self.random()) / np.log1p(-p)) + 1
+
+    def get_state(self):
+        """Returns state of the generator (JSON serializable) and the buffer with the index of the next number"""
+        return self.generator.bit_generator.state, np.array(self.buffer, dtype=np.float64), self.index
+
+    def set_state(self, generator_state, buffer, index):
+        """Restores state returned by get_state"""
+        self.generator.bit_generator.state = generator_state
+        self.buffer = np.asarray(buffer, dtype=np.float64).tolist()
+        self.index = int(index)
+
+
+class EventLog:
     """
-    Generates and changes position of the Creature instance in the specific Field instance
+    Structured log of creature events. Events are buffered as typed records (EVENT_DTYPE)
+    and written to the sink by batches. Disabled event types are not even emitted: callers check
+    enabled before creating a record
 
     Attributes:
-        field (list): Instance of class Field
-        coordinates_list (list): Current coordinates of the Creature instance
+        sink: NullSink, PrintSink, RingSink, NdjsonSink, BinarySink or BufferSink instance
+        enabled(list): Whether each event type is logged
+        tick(int): Current time unit, it is written to every record
+        buffer(list): Records that are not written to the sink yet
+        arrays(list): Arrays of records emitted by ArrayEngine that are not written to the sink yet
+        periodic(bool): Whether buffered records are written at the end of every period (sinks with
+            FLUSH_EVERY_PERIOD, e.g. PrintSink), otherwise only full batches are written
 
     Methods:
-        generate_position: Generates position for a new generated creature
-        change_position: Changes position for a creature because of relocation or size changing
-        set_position: Sets particular position for a newborn creature
+        emit: Buffers one event
+        emit_many: Buffers events of many creatures at once
+        extend: Buffers records emitted by another event log
+        end_period: Writes buffered records if the batch is full or the sink is periodic
+        flush: Writes all buffered records to the sink
+        close: Flushes and closes the sink
     """
-    def __init__(self, field):
-        assert isinstance(field, Field)
-        self.field = field
-        self.coordinates_list = list()
-
-    def generate_position(self, creature_instance):
-        """
-        Generates position for a Creature instance by its size.
-        If there is no room for it's size then we do not create position and delete the Creature instance
-        """
-        assert isinstance(creature_instance, Creature)
-        # Creates start position for the Creature instance
-        start_position = [np.random.randint(0, 100), np.random.randint(0, 100)]
-        if self.field.field_list[start_position[0]][start_position[1]] is not None:
-            # Changes position if it is occupied in the field
-            start_position = [np.random.randint(0, 100), np.random.randint(0, 100)]
-        # Occupies start position cell with the Creature instance
-        self.field.occupy_cell(start_position, creature_instance)
-        self.coordinates_list.append(start_position)
-        # If the size of the Creature instance is 2 or 3 then occupy 2 or 3 cells accordingly.
-        # We use occupied_cells_counter to occupy only amount of cells that equal to size of the Creature instance
-        if creature_instance.size >= 2:
-            occupied_cells_counter = 1
-            for x in [start_position[0], start_position[0] - 1, start_position[0] + 1]:
-                for y in [start_position[1], start_position[1] - 1, start_position[1] + 1]:
-                    try:
-                        if (self.field.field_list[x][y] is None) and (occupied_cells_counter < creature_instance.size):
-                            self.field.occupy_cell([x, y], creature_instance)
-                            self.coordinates_list.append([x, y])
-                            occupied_cells_counter += 1
-                    except IndexError:
-                        # If the index is out of range we ignore it
-                        continue
-            # If current surrounding of the Creature instance does not allow to occupy amount of cells
-            # that are equal to it's size then we delete this Creature instance.
-            if occupied_cells_counter != creature_instance.size:
-                del creature_instance
-
-    def change_position(self, creature_instance, new_coordinates=None, relocate=False, size_change=False):
-        """Changes position of a Creature instance because of a relocation or size change"""
-
-        # Changes start position if a Creature instance relocates
-        if relocate:
-            # Checks whether is enough place for a relocation
-            try:
-                self.field.field_list[new_coordinates[0]][new_coordinates[1]]
-            except IndexError:
-                self.field.expand()
-            # Clears old positions
-            for coordinates in self.coordinates_list:
-                self.field.leave_cell(coordinates, creature_instance)
-            # Clears coordinates list
-            self.coordinates_list = list()
-            # Sets new coordinates
-            self.coordinates_list.append(new_coordinates)
-            self.field.occupy_cell(self.coordinates_list[0], creature_instance)
-
-        # Changes start position because of size change
-        if size_change:
-            # Sets start position
-            start_position = self.coordinates_list[0]
-            # Clears coordinates list
-            self.coordinates_list = list()
-            # Sets start position
-            self.coordinates_list.append(start_position)
-            self.field.occupy_cell(self.coordinates_list[0], creature_instance)
-
-        # Occupies additional cells if size of the animal is 2 or 3
-        occupied_cells_counter = 1
-        if (creature_instance.size == 2) or (creature_instance.size == 3):
-            for x in [self.coordinates_list[0][0], self.coordinates_list[0][0] - 1, self.coordinates_list[0][0] + 1]:
-                for y in [self.coordinates_list[0][1], self.coordinates_list[0][1] - 1, self.coordinates_list[0][1] + 1]:
-                    try:
-                        if occupied_cells_counter < creature_instance.size:
-                            self.field.occupy_cell([x, y], creature_instance)
-                            self.coordinates_list.append([x, y])
-                            occupied_cells_counter += 1
-                    except IndexError:
-                        # If the index is out of range we expand the field
-                        self.field.expand()
+    def __init__(self, sink=None, verbosity=3, types=None):
+        self.sink = PrintSink() if sink is None else sink
+        if types is None:
+            self.enabled = [level <= verbosity for level in EVENT_VERBOSITY]
+        else:
+            types = [EVENT_NAMES.index(event) if type(event) is str else event for event in types]
+            self.enabled = [event in types for event in range(len(EVENT_NAMES))]
+        if type(self.sink) is NullSink:
+            self.enabled = [False] * len(EVENT_NAMES)
+        self.periodic = getattr(self.sink, 'FLUSH_EVERY_PERIOD', False)
+        self.tick = 0
+        self.buffer = list()
+        self.arrays = list()
+        self.buffered = 0
 
-    def set_position(self, coordinates, creature_instance):
-        """Sets particular position for a newborn creature"""
-        start_position = coordinates
-        # Occupies start position cell with the Creature instance
-        self.field.occupy_cell(start_position, creature_instance)
-        self.coordinates_list.append(start_position)
-        # If the size of the Creature instance is 2 or 3 then occupy 2 or 3 cells accordingly.
-        # We use occupied_cells_counter to occupy only amount of cells that equal to size of the Creature instance
-        if creature_instance.size >= 2:
-            occupied_cells_counter = 1
-            for x in [start_position[0], start_position[0] - 1, start_position[0] + 1]:
-                for y in [start_position[1], start_position[1] - 1, start_position[1] + 1]:
-                    try:
-                        if occupied_cells_counter < creature_instance.size:
-                            self.field.occupy_cell([x, y], creature_instance)
-                            self.coordinates_list.append([x, y])
-                            occupied_cells_counter += 1
-                    except IndexError:
-                        # If the index is out of range we ignore it
-                        continue
+    def emit(self, event_type, creature, species, other=-1, other_species=-1):
+        """Buffers one event"""
+        self.buffer.append((self.tick, event_type, creature, species, other, other_species))
+        self.buffered += 1
+        if self.buffered >= self.sink.BATCH_SIZE:
+            self.flush()
 
+    def emit_many(self, event_type, creatures, species, others=-1, other_species=-1):
+        """Buffers events of the same type for arrays of creatures"""
+        if not self.enabled[event_type] or len(creatures) == 0:
+            return
+        records = np.empty(len(creatures), dtype=EVENT_DTYPE)
+        records['tick'] = self.tick
+        records['event'] = event_type
+        records['creature'] = creatures
+        records['species'] = species
+        records['other'] = others
+        records['other_species'] = other_species
+        self.arrays.append(records)
+        self.buffered += len(records)
+        if self.buffered >= self.sink.BATCH_SIZE:
+            self.flush()
 
-class Creature:
-    """
-    Parent class for classes Animal and Plant
+    def extend(self, records):
+        """Buffers records emitted by another event log (e.g. by a worker of TiledEngine)"""
+        if len(records) == 0:
+            return
+        self.arrays.append(records)
+        self.buffered += len(records)
+        if self.buffered >= self.sink.BATCH_SIZE:
+            self.flush()
 
-    Attributes:
-        age(int): Age of a creature, changes with each period
-        mass(int): Mass of a creature, changes with each period and increases by food
-        size(int): Size means how many cells a creature occupies (1 to 3), depends on mass
-        field(list): Field matrix
-        creatures(list): List of existing creatures on the field
-        position(Position): Position of a creature
+    def end_period(self):
+        """Writes buffered records to the sink if there are enough of them or the sink is periodic"""
+        if self.periodic or self.buffered >= self.sink.BATCH_SIZE:
+            self.flush()
 
-    Methods:
-        aging: Age update
-        generate_position: Generates position for creature generation
-        set_position: Sets position for creature birth
-        die: Removes from the field, creatures list and deletes instance
-    """
-    def __init__(self, field, creatures, age):
-        self.age = age
-        self.mass = np.random.randint(0, 300)
-        self.size = int(self.mass/100)+1
-        # Creates a Position instance for a Creature instance and generates position by size
-        assert isinstance(field, Field)
-        self.field = field
-        self.creatures = creatures
-        self.position = None
+    def flush(self):
+        """Writes all buffered records to the sink in the order they were emitted"""
+        if self.buffered == 0:
+            return
+        if self.buffer:
+            self.arrays.append(np.array(self.buffer, dtype=EVENT_DTYPE))
+        records = np.concatenate(self.arrays)
+        # Records of emit and emit_many are merged stably by tick
+        if len(self.arrays) > 1:
+            records = records[np.argsort(records['tick'], kind='stable')]
+        self.sink.write(records)
+        self.buffer = list()
+        self.arrays = list()
+        self.buffered = 0
 
-    def aging(self):
-        self.age += 1
-        if self.age >= 30:
-            self.die()
+    def close(self):
+        """Flushes buffered records and closes the sink"""
+        self.flush()
+        self.sink.close()
 
-    def generate_position(self):
-        self.position = Position(self.field)
-        self.position.generate_position(self)
 
-    def set_position(self, position):
-        """Sets position for a new creature produced by reproduction"""
-        self.position = Position(self.field)
-        self.position.set_position(position, self)
+class NullSink:
+    """Sink that drops all events. EventLog with this sink disables all event types"""
+    BATCH_SIZE = 1 << 16
 
-    def die(self):
-        """Emulates death of the creature instance. Deletes the creature instance and clear occupied cells"""
-        try:
-            self.creatures.remove(self)
-        except ValueError:
-            pass
-        try:
-            for coordinates in self.position.coordinates_list:
-                cell = self.field.field_list[coordinates[0]][coordinates[1]]
-                if type(cell) is list:
-                    self.field.field_list[coordinates[0]][coordinates[1]].remove(self)
-        except ValueError:
-            pass
-        print(f'Creature {self} died')
-        del self
+    def write(self, records):
+        pass
+
+    def close(self):
+        pass
 
 
-class Animal(Creature):
+class PrintSink:
     """
-    Parent class for Carnivore, Herbivore and Omnivore classes
+    Sink that prints events as readable messages. Events are written by batches and at the end of every
+    period, so messages of a period are printed before its separator with one write per batch
+    """
+    BATCH_SIZE = 1 << 12
+    FLUSH_EVERY_PERIOD = True
+
+    def write(self, records):
+        lines = list()
+        for record in records.tolist():
+            tick, event, creature, species, other, other_species = record
+            name = SPECIES_NAMES[species]
+            if event == BORN:
+                lines.append(f'{name} born!')
+            elif event == DIED:
+                lines.append(f'Creature {name} died')
+            elif event == ATE:
+                lines.append(f'{name} ate {SPECIES_NAMES[other_species]}')
+            elif event == FIGHT_WON:
+                lines.append(f'Fight between {name} and {SPECIES_NAMES[other_species]}: {name} won')
+            elif event == FIGHT_LOST:
+                lines.append(f'Fight between {name} and {SPECIES_NAMES[other_species]}: {name} lost')
+            elif event == RELOCATED:
+                lines.append(f'Creature {name} changed its position')
+        if lines:
+            sys.stdout.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        pass
+
+
+class RingSink:
+    """
+    In-memory sink that keeps only the last capacity events
 
     Attributes:
-        sex(bool): Sex of an animal
-        hunger(int): Hunger of an animal, increases each period, decreases by food
-        hp(int): Animal's health points
-        hit(int): Power of animal's hit
-        speed(int): Speed reflects how far (in cells from 1 to 5) an animal can move for a period
+        records(np.ndarray): Ring of records
+        written(int): Amount of records written since creation
 
     Methods:
-        update_hp: Updates hp by period, fight or food
-        update_mass: Updates mass by a period
-        update_size: Updates size because of mass change
-        update_hunger: Updates hunger by period, fight or food
+        events: Returns kept records from the oldest to the newest
     """
-    def __init__(self, field, creatures, age):
-        super(Animal, self).__init__(field, creatures, age)
-        self.sex = bool(np.random.randint(0, 2))
-        self.hunger = 0
-        self.hp = 100
-        self.hit = np.random.randint(15, 45)
-        self.speed = int(self.hp / 20)
+    BATCH_SIZE = 1 << 12
 
-    def update_hp(self, amount=0, period=False):
-        """Updates hp by period, fight or food"""
-        # Updates hp by a period
-        if period:
-            self.hp -= self.hunger
-        # Updates hp by a fight or food
-        else:
-            self.hp += amount
-        # Hp regulation
-        if self.hp > 100:
-            self.hp = 100
-        elif self.hp <= 0:
-            self.die()
-        else:
-            # Updates speed because of hp change
-            self.speed = int(self.hp / 20)
+    def __init__(self, capacity=1 << 20):
+        self.records = np.zeros(capacity, dtype=EVENT_DTYPE)
+        self.written = 0
 
-    def update_mass(self, amount=0, period=False):
-        """Updates hunger by period, fight or food"""
-        if period:
-            self.mass -= 0.2 * self.mass
-        else:
-            self.mass -= amount
-        if self.mass <= 0:
-            self.die()
-        self.update_size()
+    def write(self, records):
+        capacity = len(self.records)
+        records = records[-capacity:]
+        position = np.arange(self.written, self.written + len(records)) % capacity
+        self.records[position] = records
+        self.written += len(records)
 
-    def update_size(self):
-        """Updates size if mass has been changed"""
-        new_size = int(self.mass/100)+1
-        if new_size != self.size:
-            self.size = new_size
-            self.position.change_position(self, size_change=True)
+    def events(self):
+        """Returns kept records from the oldest to the newest"""
+        capacity = len(self.records)
+        if self.written <= capacity:
+            return self.records[:self.written].copy()
+        start = self.written % capacity
+        return np.concatenate([self.records[start:], self.records[:start]])
 
-    def update_hunger(self, amount=0, period=False):
-        """Updates hunger by period, fight or food"""
-        if period:
-            self.hunger = 15 + 0.2 * self.mass
-        else:
-            self.hunger += amount
+    def close(self):
+        pass
 
-        if self.hunger >= 100:
-            self.die()
 
-        if self.hunger < 0:
-            self.hunger = 0
+class NdjsonSink:
+    """Sink that writes one JSON object per line to a file by batches"""
+    BATCH_SIZE = 1 << 16
 
-    def relocate(self):
-        """Relocates the Animal instance into new position"""
-        try:
-            x = np.random.randint(-self.speed, self.speed)
-            y = np.random.randint(-self.speed, self.speed)
-            print(f'Creature {self} changed its position')
-            self.position.change_position(self, [x, y], relocate=True)
-        except ValueError:
-            pass
+    def __init__(self, path):
+        self.file = open(path, 'w')
 
-    def period(self):
-        """Emulates aging and hp, hunger and mass loss each move"""
-        self.aging()
-        self.update_hunger(period=True)
-        self.update_hp(period=True)
-        self.update_mass(period=True)
+    def write(self, records):
+        names = EVENT_DTYPE.names
+        lines = list()
+        for record in records.tolist():
+            line = dict(zip(names, record))
+            line['event'] = EVENT_NAMES[line['event']]
+            lines.append(json.dumps(line))
+        self.file.write('\n'.join(lines) + '\n')
 
+    def close(self):
+        self.file.close()
 
-class Carnivore(Animal):
+
+class BinarySink:
+    """Sink that writes raw EVENT_DTYPE records to a file by batches. Read it by np.fromfile(path, EVENT_DTYPE)"""
+    BATCH_SIZE = 1 << 16
+
+    def __init__(self, path):
+        self.file = open(path, 'wb')
+
+    def write(self, records):
+        records.tofile(self.file)
+
+    def close(self):
+        self.file.close()
+
+
+class BufferSink:
     """
-    Carnivore creature. Eats only other animals attacking them because of hunger and aggressiveness
+    Sink that keeps written records until they are taken. Workers of TiledEngine send them to the event log
+    of the parent process
 
     Attributes:
-        aggressiveness(int): In the beginning (generation) equal 0, then updates each period
+        records(list): Arrays of written records
 
     Methods:
-        attack: Emulates attack on another creature
-        fight: Emulates fight between 2 creatures
-        reproduce: Emulates reproduction process
-        create_child: Emulates child creation
-        move: Makes a move of a Carnivore instance
+        take: Returns written records and forgets them
     """
-    def __init__(self, field, creatures, age):
-        super(Carnivore, self).__init__(field, creatures, age)
-        # Each move aggressiveness updates. At the beginning (generation) it is equal 0
-        self.aggressiveness = 0
-
-    def __repr__(self):
-        return 'Carnivore'
+    BATCH_SIZE = 1 << 16
 
-    def attack(self):
-        """
-        Attacks another creature if conditions such as the same position,
-        particular hunger and aggressiveness levels allow it
-        """
-        # Checks each coordinate that the carnivore occupies for other creatures to attack
-        for coordinates in self.position.coordinates_list:
-            # If there is creatures in
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                # Creates list of creatures that are in cells that the carnivore occupies
-                creatures_list = self.field.field_list[coordinates[0]][coordinates[1]]
-                # Attacks each creature in the list if the carnivore is hungry/aggressive
-                for creature in creatures_list:
-                    # Conditions for attack on a carnivore instance
-                    if (type(creature) is Carnivore) and (self.hunger > 30) and (self.aggressiveness > 30):
-                        self.fight(creature)
-                    # Conditions for attack on a herbivore or omnivore instance
-                    elif ((type(creature) is Herbivore) or (type(creature) is Omnivore)) and (self.hunger > 30):
-                        self.fight(creature)
-                    # If it's a plant instance
-                    else:
-                        pass
-            # If there is no creatures
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is type(self):
-                pass
-
-    def fight(self, animal_instance):
-        """Emulates fight between the carnivore and an animal instance"""
-        print(f'Fight between {self} and {animal_instance} was started!')
-        if type(animal_instance) is Herbivore:
-            # Sets win probability for the carnivore (based on hunger) and for the herbivore instances
-            if self.hunger > 50:
-                carnivore_win_probability = np.random.randint(0, 100) + self.hunger*0.1
-            else:
-                carnivore_win_probability = np.random.randint(0, 100) - self.hunger*0.1
-            herbivore_win_probability = np.random.randint(0, 100)
-
-            if carnivore_win_probability >= herbivore_win_probability:
-                print(f'{self} won')
-                self.update_hunger(-0.3 * animal_instance.mass)
-                self.update_mass(0.5 * animal_instance.mass)
-                self.update_hp(0.3 * animal_instance.mass)
-                animal_instance.die()
-            else:
-                print(f'{self} lost')
-                self.update_hp(-animal_instance.hit)
-        elif (type(animal_instance) is Omnivore) or (type(animal_instance) is Carnivore):
-            # Sets win probability for the attacking carnivore based on mass and aggressiveness
-            attacker_win_probability = np.random.randint(0, 100) + self.mass*0.3 + self.aggressiveness * 0.2
-            # Sets win probability for the defending animal based on mass (increased mass parameter)
-            defender_win_probability = np.random.randint(0, 100) + self.mass*0.5
-
-            if attacker_win_probability >= defender_win_probability:
-                print(f'{self} won')
-                self.update_hunger(-0.3 * animal_instance.mass)
-                self.update_mass(0.5 * animal_instance.mass)
-                self.update_hp(0.3 * animal_instance.mass)
-                animal_instance.die()
-            else:
-                print(f'{self} lost')
-                animal_instance.update_hunger(-0.3 * self.mass)
-                animal_instance.update_mass(0.5 * self.mass)
-                animal_instance.update_hp(0.3 * self.mass)
-                shit = self.field.field_list[self.position.coordinates_list[0][0]][self.position.coordinates_list[0][1]]
-                self.die()
+    def __init__(self):
+        self.records = list()
 
-    def reproduce(self):
-        """Emulates reproduction process"""
-        tumbler = False
-        for coordinates in self.position.coordinates_list:
-            if tumbler:
-                break
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                for creature in self.field.field_list[coordinates[0]][coordinates[1]]:
-                    same_type = type(creature) is type(self)
-                    if same_type:
-                        sufficient_age = (creature.age >= 30) and (self.age >= 30)
-                        different_sex = creature.sex is not self.sex
-                        if sufficient_age and different_sex:
-                            self.create_child(coordinates)
-                            tumbler = True
-                            break
-                    else:
-                        pass
-            else:
-                pass
+    def write(self, records):
+        self.records.append(records)
 
-    def create_child(self, coordinates):
-        """Emulates child creation"""
-        child = Carnivore(self.field, self.creatures, age=0)
-        child.set_position(coordinates)
-        print(f'{child} born!')
-        return child
+    def take(self):
+        """Returns written records and forgets them"""
+        records = np.concatenate(self.records) if self.records else np.zeros(0, dtype=EVENT_DTYPE)
+        self.records = list()
+        return records
 
-    def move(self):
-        """Makes a move of a Carnivore instance"""
-        self.period()
-        relocate_choice = bool(np.random.randint(0, 2))
-        if relocate_choice is True:
-            self.relocate()
-        self.aggressiveness = np.random.randint(0, 100)
-        self.attack()
-        self.reproduce()
+    def close(self):
+        pass
 
 
-class Herbivore(Animal):
+class Renderer:
     """
-    Herbivore creature. Eats only plants
+    Renders the field in a separate thread. The emulation submits only cells changed during a period,
+    the renderer applies them to its own copy of the visible area and draws frames. The queue between them
+    is bounded: submit never blocks, if the queue is full the changes are merged with the next period
+    (the frame is decimated), and the renderer draws only the latest state when several periods are queued.
+    Frames are drawn to a PyGame window or, offscreen, to PNG files and/or an animated GIF
+
+    Attributes:
+        COLORS(np.ndarray): RGB palette: empty cell, carnivore, herbivore, omnivore, plant, mixed cell
+        MIXED(int): Color of cells shared by different species
+        output(str): Directory of PNG frames, None if frames are not written
+        gif(str): Path of the animated GIF, None if it is not written
+        scale(int): Side of a cell in pixels
+        queue_size(int): Capacity of the queue of submitted periods
+        bounds(tuple): Visible area (x, y, width, height) in cells
+        grid(np.ndarray): Colors of visible cells
+        pending(tuple): Changes that did not fit into the queue
+        decimated(int): Amount of periods merged into the next ones
+        frames(int): Amount of drawn frames
+        running(bool): Whether the renderer thread is running
 
     Methods:
-        eat: Emulates eating plant
-        reproduce: Emulates reproduction process
-        create_child: Emulates child creation
-        move: Makes a move of a Herbivore instance
+        start: Starts the renderer thread
+        submit: Submits changed cells of a period without blocking
+        close: Draws the remaining changes and stops the renderer thread
+        cell_values: Returns colors of cells occupied by creatures of given species
+        write_png: Writes an image to a PNG file
     """
-    def __init__(self, field, creatures, age):
-        super(Herbivore, self).__init__(field, creatures, age)
+    COLORS = np.array([(255, 255, 255), (200, 40, 40), (240, 190, 40), (60, 90, 200), (40, 150, 60), (120, 120, 120)],
+                      dtype=np.uint8)
+    MIXED = 5
 
-    def __repr__(self):
-        return 'Herbivore'
+    def __init__(self, output=None, gif=None, scale=4, queue_size=4):
+        self.output = output
+        self.gif = gif
+        self.scale = scale
+        self.queue_size = queue_size
+        self.bounds = None
+        self.grid = None
+        self.pending = None
+        self.decimated = 0
+        self.frames = 0
+        self.running = False
+        self.queue = None
+        self.thread = None
+        self.gif_file = None
+        self.screen = None
 
-    def eat(self):
-        """Emulates eating plant"""
-        for coordinates in self.position.coordinates_list:
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                # Creates list of creatures that are in cells that the herbivore occupies
-                creatures_list = self.field.field_list[coordinates[0]][coordinates[1]]
-                for creature in creatures_list:
-                    if type(creature) is Plant:
-                        if creature.toxicity:
-                            if bool(np.random.randint(0, 2)):
-                                self.die()
-                        else:
-                            print(f'{self} ate {creature}')
-                            self.update_hunger(-0.3 * creature.mass)
-                            self.update_mass(0.5 * creature.mass)
-                            creature.die()
+    def start(self, bounds):
+        """Starts the renderer thread that draws the visible area bounds (x, y, width, height)"""
+        self.bounds = bounds
+        self.grid = np.zeros((bounds[2], bounds[3]), dtype=np.uint8)
+        self.queue = queue.Queue(self.queue_size)
+        self.thread = threading.Thread(target=self.loop, daemon=True)
+        self.running = True
+        self.thread.start()
 
-    def reproduce(self):
-        """Emulates reproduction process"""
-        tumbler = False
-        for coordinates in self.position.coordinates_list:
-            if tumbler:
+    def submit(self, tick, x, y, values, keyframe=False):
+        """Submits changed cells of a period (all occupied cells for a keyframe). Never blocks"""
+        frame = (tick, x, y, values, keyframe)
+        if self.pending is not None:
+            frame = self.merge(self.pending, frame)
+        try:
+            self.queue.put_nowait(frame)
+            self.pending = None
+        except queue.Full:
+            # The renderer is behind, so the period is merged into the next one
+            self.pending = frame
+            self.decimated += 1
+
+    @staticmethod
+    def merge(earlier, later):
+        """Merges changes of two periods, the later value of a cell wins"""
+        if later[4]:
+            return later
+        tick, x, y, values = later[0], *(np.concatenate([a, b]) for a, b in zip(earlier[1:4], later[1:4]))
+        # The last change of each cell is kept
+        key = np.stack([x, y], axis=1)[::-1]
+        _, last = np.unique(key, axis=0, return_index=True)
+        last = len(x) - 1 - last
+        return tick, x[last], y[last], values[last], earlier[4]
+
+    def close(self):
+        """Draws the remaining changes and stops the renderer thread"""
+        if not self.running:
+            return
+        if self.pending is not None:
+            self.queue.put(self.pending)
+            self.pending = None
+        self.queue.put(None)
+        self.thread.join()
+        self.running = False
+
+    def loop(self):
+        """Loop of the renderer thread"""
+        undrawn = None
+        while True:
+            frame = self.queue.get()
+            if frame is None:
+                if undrawn is not None:
+                    self.draw(undrawn)
                 break
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                for creature in self.field.field_list[coordinates[0]][coordinates[1]]:
-                    same_type = type(creature) is type(self)
-                    if same_type:
-                        sufficient_age = (creature.age >= 30) and (self.age >= 30)
-                        different_sex = creature.sex is not self.sex
-                        if sufficient_age and different_sex:
-                            self.create_child(coordinates)
-                            tumbler = True
-                            break
-                    else:
-                        pass
-            else:
-                pass
+            tick, x, y, values, keyframe = frame
+            if keyframe:
+                self.grid[:] = 0
+            x, y = x - self.bounds[0], y - self.bounds[1]
+            visible = (x >= 0) & (x < self.bounds[2]) & (y >= 0) & (y < self.bounds[3])
+            self.grid[x[visible], y[visible]] = values[visible]
+            if self.queue.qsize() > 0:
+                # Only the latest state is drawn when the renderer is behind
+                undrawn = tick
+                continue
+            undrawn = None
+            self.draw(tick)
+        if self.gif_file is not None:
+            # GIF trailer
+            self.gif_file.write(b'\x3b')
+            self.gif_file.close()
+        if self.screen is not None:
+            import pygame
+            pygame.quit()
 
-    def create_child(self, coordinates):
-        """Emulates child creation"""
-        child = Herbivore(self.field, self.creatures, age=0)
-        child.set_position(coordinates)
-        print(f'{child} born!')
-        return child
+    def draw(self, tick):
+        """Draws a frame of the visible area (x is horizontal, y is vertical)"""
+        pixels = np.repeat(np.repeat(self.grid.T, self.scale, axis=0), self.scale, axis=1)
+        if self.output is not None:
+            os.makedirs(self.output, exist_ok=True)
+            self.write_png(os.path.join(self.output, f'frame_{tick:06d}.png'), self.COLORS[pixels])
+        if self.gif is not None:
+            self.write_gif_frame(pixels)
+        if self.output is None and self.gif is None:
+            self.draw_window(pixels)
+        self.frames += 1
+
+    def draw_window(self, pixels):
+        """Draws a frame in a PyGame window"""
+        import pygame
+        if self.screen is None:
+            pygame.init()
+            self.screen = pygame.display.set_mode((pixels.shape[1], pixels.shape[0]))
+            pygame.display.set_caption('Life')
+        pygame.event.pump()
+        pygame.surfarray.blit_array(self.screen, self.COLORS[pixels].transpose(1, 0, 2))
+        pygame.display.flip()
+
+    @staticmethod
+    def cell_values(x, y, species):
+        """Returns x, y and colors of cells occupied by creatures of given species (as Field.cell_values)"""
+        if len(x) == 0:
+            return x, y, np.zeros(0, dtype=np.uint8)
+        order = np.lexsort((y, x))
+        x, y, species = x[order], y[order], species[order]
+        first = np.flatnonzero(np.concatenate([[True], (x[1:] != x[:-1]) | (y[1:] != y[:-1])]))
+        low, high = np.minimum.reduceat(species, first), np.maximum.reduceat(species, first)
+        values = np.where(low == high, low + 1, Renderer.MIXED).astype(np.uint8)
+        return x[first], y[first], values
+
+    @staticmethod
+    def write_png(path, image):
+        """Writes an RGB image (height, width, 3) to a PNG file"""
+        height, width = image.shape[:2]
+        # Each row starts with the filter type 0
+        rows = np.concatenate([np.zeros((height, 1), dtype=np.uint8), image.reshape(height, -1)], axis=1)
+
+        def chunk(kind, data):
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+        with open(path, 'wb') as file:
+            file.write(b'\x89PNG\r\n\x1a\n')
+            file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+            file.write(chunk(b'IDAT', zlib.compress(rows.tobytes())))
+            file.write(chunk(b'IEND', b''))
+
+    def write_gif_frame(self, pixels):
+        """Appends a frame of palette indexes to the animated GIF"""
+        height, width = pixels.shape
+        if self.gif_file is None:
+            self.gif_file = open(self.gif, 'wb')
+            # Header, screen descriptor with a global palette of 8 colors and infinite looping
+            palette = np.zeros((8, 3), dtype=np.uint8)
+            palette[:len(self.COLORS)] = self.COLORS
+            self.gif_file.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xf2, 0, 0) + palette.tobytes())
+            self.gif_file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+        data = self.lzw(pixels.ravel())
+        blocks = b''.join(bytes([len(data[i:i + 255])]) + data[i:i + 255] for i in range(0, len(data), 255))
+        self.gif_file.write(b'\x21\xf9\x04\x00\x0a\x00\x00\x00')
+        self.gif_file.write(b'\x2c' + struct.pack('<HHHHB', 0, 0, width, height, 0) + b'\x03' + blocks + b'\x00')
+
+    @staticmethod
+    def lzw(indexes):
+        """
+        Encodes palette indexes of 3 bits as GIF LZW data without compression: a clear code is emitted
+        before the code table grows, so every code has 4 bits and each index is its own code
+        """
+        clear, end, group = 8, 9, 5
+        # A group of 5 indexes after a clear code adds only 4 entries to the table, so codes stay 4 bits long
+        groups = -(-len(indexes) // group)
+        padded = np.full(groups * group, -1, dtype=np.int16)
+        padded[:len(indexes)] = indexes
+        codes = np.concatenate([np.full((groups, 1), clear, dtype=np.int16), padded.reshape(groups, group)], axis=1)
+        codes = codes.ravel()
+        codes = np.append(codes[codes >= 0], end)
+        if len(codes) % 2:
+            codes = np.append(codes, 0)
+        # Two 4 bit codes per byte, the first code in the low bits
+        return (codes[0::2] | (codes[1::2] << 4)).astype(np.uint8).tobytes()
+
+
+class StreamServer:
+    """
+    Local asyncio server (TCP or Unix socket) that streams changes of each period to any amount of viewers.
+    The emulation submits changes without blocking, the server thread keeps the current state of cells,
+    encodes binary frames and writes them to subscribers. A new subscriber gets a keyframe of all occupied
+    cells first. Each subscriber has a bounded queue: with the 'coalesce' policy frames of a slow subscriber
+    are merged into the last queued one, with the 'drop' policy its queued frames are dropped and it gets
+    a keyframe when it catches up.
+
+    A frame is a little-endian uint32 length followed by HEADER (magic, kind, tick, amount of cells, births
+    and deaths), species counts (int64 each), cells (x and y as int64, color as uint8 as in Renderer),
+    born creatures (id as int64, species as int8) and died creatures in the same layout
+
+    Attributes:
+        MAGIC(bytes): First bytes of every frame
+        KEYFRAME, DELTA(int): Kinds of frames
+        HEADER(struct.Struct): Header of a frame
+        host, port(str, int): Address of the TCP server, port 0 picks a free port
+        path(str): Path of the Unix socket, None for TCP
+        policy(str): 'coalesce' or 'drop', what to do with frames of a slow subscriber
+        queue_size(int): Amount of frames queued for each subscriber
+        subscribers(set): Connected subscribers
+        cells(tuple): Sorted keys, x, y and colors of occupied cells, the state sent in keyframes
+        tick(int): Tick of the last submitted period
+        counts(np.ndarray): Species counts of the last submitted period
+        running(bool): Whether the server thread is running
+
+    Methods:
+        start: Starts the server thread and waits until it listens
+        submit: Submits changes of a period without blocking
+        close: Sends queued frames and stops the server thread
+        encode: Returns binary frame of a period
+        decode: Returns a period from a binary frame
+        merge: Merges changes of two periods into one frame
+        read_frame: Reads a frame from an asyncio stream (for viewers)
+    """
+    MAGIC = b'LIFE'
+    KEYFRAME, DELTA = range(2)
+    HEADER = struct.Struct('<4sBqIII')
+    POLICIES = ('coalesce', 'drop')
+
+    def __init__(self, host='127.0.0.1', port=0, path=None, policy='coalesce', queue_size=8):
+        assert policy in self.POLICIES
+        self.host = host
+        self.port = port
+        self.path = path
+        self.policy = policy
+        self.queue_size = queue_size
+        self.subscribers = set()
+        empty = np.zeros(0, dtype=np.int64)
+        self.cells = (empty, empty, empty, np.zeros(0, dtype=np.uint8))
+        self.tick = 0
+        self.counts = np.zeros(len(SPECIES_NAMES), dtype=np.int64)
+        self.running = False
+        self.loop = None
+        self.thread = None
+        self.server = None
+        self.ready = threading.Event()
+
+    def start(self):
+        """Starts the server thread and waits until it listens"""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.serve, daemon=True)
+        self.running = True
+        self.thread.start()
+        self.ready.wait()
+
+    def serve(self):
+        """Loop of the server thread"""
+        asyncio.set_event_loop(self.loop)
+        if self.path is not None:
+            self.server = self.loop.run_until_complete(asyncio.start_unix_server(self.subscribe, path=self.path))
+        else:
+            self.server = self.loop.run_until_complete(asyncio.start_server(self.subscribe, self.host, self.port))
+            self.port = self.server.sockets[0].getsockname()[1]
+        self.ready.set()
+        self.loop.run_forever()
+        self.server.close()
+        self.loop.run_until_complete(self.server.wait_closed())
+        self.loop.close()
+
+    def submit(self, tick, x, y, values, born, born_species, died, died_species, counts):
+        """Submits changes of a period (cells with their new colors, 0 for emptied cells). Never blocks"""
+        frame = (self.DELTA, tick, np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64),
+                 np.asarray(values, dtype=np.uint8), np.asarray(born, dtype=np.int64),
+                 np.asarray(born_species, dtype=np.int8), np.asarray(died, dtype=np.int64),
+                 np.asarray(died_species, dtype=np.int8), np.asarray(counts, dtype=np.int64))
+        self.loop.call_soon_threadsafe(self.publish, frame)
+
+    def close(self, timeout=5.0):
+        """Sends queued frames to subscribers (waiting up to timeout seconds) and stops the server thread"""
+        if not self.running:
+            return
+        future = asyncio.run_coroutine_threadsafe(self.drain(timeout), self.loop)
+        future.result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.running = False
+
+    async def drain(self, timeout):
+        """Waits until subscribers write their queued frames, then disconnects them"""
+        subscribers = list(self.subscribers)
+        if subscribers:
+            await asyncio.wait([asyncio.ensure_future(subscriber.finish()) for subscriber in subscribers],
+                               timeout=timeout)
+        for subscriber in subscribers:
+            subscriber.task.cancel()
+        await asyncio.gather(*(subscriber.task for subscriber in subscribers), return_exceptions=True)
+
+    def publish(self, frame):
+        """Applies a submitted period to the state of cells and queues it for subscribers (server thread)"""
+        self.apply(frame)
+        data = self.encode(frame) if self.subscribers else None
+        for subscriber in self.subscribers:
+            subscriber.offer(frame, data)
+
+    def apply(self, frame):
+        """Applies changed cells of a period to the state of cells"""
+        kind, tick, x, y, values = frame[:5]
+        self.tick, self.counts = tick, frame[9]
+        keys = Placement.pack(x, y)
+        order = np.argsort(keys)
+        keys, x, y, values = keys[order], x[order], y[order], values[order]
+        state_keys, state_x, state_y, state_values = self.cells
+        index = np.searchsorted(state_keys, keys)
+        present = Placement.contains(state_keys, keys)
+        state_values = state_values.copy()
+        state_values[index[present]] = values[present]
+        new = ~present & (values != 0)
+        state_keys, state_x, state_y, state_values = (np.insert(column, index[new], changed[new]) for column, changed
+                                                      in zip((state_keys, state_x, state_y, state_values),
+                                                             (keys, x, y, values)))
+        occupied = state_values != 0
+        self.cells = (state_keys[occupied], state_x[occupied], state_y[occupied], state_values[occupied])
+
+    def keyframe(self):
+        """Returns a keyframe of the current state of cells"""
+        empty = np.zeros(0, dtype=np.int64)
+        keys, x, y, values = self.cells
+        return (self.KEYFRAME, self.tick, x, y, values, empty, empty.astype(np.int8), empty, empty.astype(np.int8),
+                self.counts)
+
+    async def subscribe(self, reader, writer):
+        """Serves one subscriber: sends a keyframe and then frames of each period"""
+        subscriber = StreamSubscriber(self, writer)
+        subscriber.task = asyncio.current_task()
+        self.subscribers.add(subscriber)
+        try:
+            await subscriber.run()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+            writer.close()
+
+    @classmethod
+    def encode(cls, frame):
+        """Returns binary frame of a period"""
+        kind, tick, x, y, values, born, born_species, died, died_species, counts = frame
+        body = b''.join([cls.HEADER.pack(cls.MAGIC, kind, tick, len(x), len(born), len(died)),
+                         counts.astype('<i8').tobytes(), x.astype('<i8').tobytes(), y.astype('<i8').tobytes(),
+                         values.astype(np.uint8).tobytes(), born.astype('<i8').tobytes(),
+                         born_species.astype(np.int8).tobytes(), died.astype('<i8').tobytes(),
+                         died_species.astype(np.int8).tobytes()])
+        return struct.pack('<I', len(body)) + body
+
+    @classmethod
+    def decode(cls, body):
+        """Returns a period (as submitted, with the kind of the frame first) from a frame without its length"""
+        magic, kind, tick, cells, births, deaths = cls.HEADER.unpack_from(body)
+        assert magic == cls.MAGIC
+        offset = cls.HEADER.size
+        columns = list()
+        for dtype, amount in (('<i8', len(SPECIES_NAMES)), ('<i8', cells), ('<i8', cells), (np.uint8, cells),
+                              ('<i8', births), (np.int8, births), ('<i8', deaths), (np.int8, deaths)):
+            column = np.frombuffer(body, dtype=dtype, count=amount, offset=offset)
+            columns.append(column)
+            offset += column.nbytes
+        counts = columns.pop(0)
+        return (kind, tick, *columns, counts)
+
+    @classmethod
+    def merge(cls, earlier, later):
+        """Merges two periods into one frame: the later color of a cell wins, births and deaths are joined"""
+        if later[0] == cls.KEYFRAME:
+            return later
+        x, y, values = (np.concatenate([a, b]) for a, b in zip(earlier[2:5], later[2:5]))
+        # The last change of each cell is kept: a stable sort keeps changes of a cell in order of periods
+        order = np.argsort(Placement.pack(x, y), kind='stable')
+        keys = Placement.pack(x, y)[order]
+        last = order[np.append(keys[1:] != keys[:-1], True)]
+        joined = (np.concatenate([a, b]) for a, b in zip(earlier[5:9], later[5:9]))
+        return (earlier[0], later[1], x[last], y[last], values[last], *joined, later[9])
+
+    @staticmethod
+    async def read_frame(reader):
+        """Reads a frame from an asyncio stream (for viewers). Returns a decoded period"""
+        length, = struct.unpack('<I', await reader.readexactly(4))
+        return StreamServer.decode(await reader.readexactly(length))
+
+
+class StreamSubscriber:
+    """
+    Connection of one viewer of StreamServer with its own bounded queue of frames
+
+    Attributes:
+        server(StreamServer): Server of the subscriber
+        writer(asyncio.StreamWriter): Stream of the connection
+        frames(collections.deque): Queued frames with their binary data (None if a frame is not encoded yet)
+        task(asyncio.Task): Task that serves the subscriber
+        stale(bool): Frames were dropped, so the next frame is a keyframe
+        dropped(int): Amount of dropped periods
+        coalesced(int): Amount of periods merged into queued frames
+
+    Methods:
+        offer: Queues a frame according to the policy of the server
+        run: Writes queued frames until the connection is closed
+        finish: Waits until queued frames are written
+    """
+    def __init__(self, server, writer):
+        self.server = server
+        self.writer = writer
+        self.frames = collections.deque()
+        self.stale = True
+        self.dropped = 0
+        self.coalesced = 0
+        self.wake = asyncio.Event()
+        self.idle = asyncio.Event()
+        self.task = None
+
+    def offer(self, frame, data):
+        """Queues a frame, a full queue is coalesced or dropped according to the policy of the server"""
+        if self.stale:
+            # The keyframe sent next already contains the period
+            self.dropped += 1
+        elif len(self.frames) < self.server.queue_size:
+            self.frames.append((frame, data))
+        elif self.server.policy == 'coalesce':
+            earlier, _ = self.frames.pop()
+            self.frames.append((StreamServer.merge(earlier, frame), None))
+            self.coalesced += 1
+        else:
+            self.dropped += len(self.frames) + 1
+            self.frames.clear()
+            self.stale = True
+        self.idle.clear()
+        self.wake.set()
+
+    async def run(self):
+        """Writes queued frames (a keyframe first and after dropped frames) until the connection is closed"""
+        while True:
+            if self.stale:
+                self.stale = False
+                frame, data = self.server.keyframe(), None
+            elif self.frames:
+                frame, data = self.frames.popleft()
+            else:
+                self.idle.set()
+                self.wake.clear()
+                await self.wake.wait()
+                continue
+            self.writer.write(StreamServer.encode(frame) if data is None else data)
+            # Waits while the socket buffer of a slow viewer is full, the emulation keeps queueing frames
+            await self.writer.drain()
+
+    async def finish(self):
+        """Waits until queued frames are written"""
+        await self.idle.wait()
+
+
+class History:
+    """
+    History of the field: a grid of cell colors (as Renderer.cell_values: 0 is an empty cell, species code + 1
+    or MIXED) for every tick in a memory-mapped file. The file is a ring buffer of the last capacity ticks
+    or an append-only store that grows by doubling. A period copies the grid of the previous tick inside
+    the mapping and writes cells changed during the period straight into it. Readers map the file read-only,
+    time slices and windows are views of the mapping, so only the pages that are used are read
+
+    Attributes:
+        HEADER_DTYPE(np.dtype): Header at the start of the file, grids follow it
+        MAGIC(bytes): First bytes of the file
+        path(str): Path of the file
+        bounds(tuple): Recorded area (x, y, width, height) in cells, the territory by default
+        capacity(int): Amount of grids in the file
+        ring(bool): Whether the oldest grids are overwritten when the file is full
+        header(np.memmap): Mapped header
+        grids(np.memmap): Mapped grids (capacity, width, height)
+
+    Methods:
+        open: Opens a file of a history for reading
+        start: Creates the file and writes the grid of the current tick of an emulation
+        end_period: Writes the grid of the period
+        close: Flushes and unmaps the file
+        map: Maps the header and the grids of the file
+        write: Writes changed cells into the grid of a tick
+        ticks: Returns the first and the last tick available in the file
+        slot: Returns the index of the grid of a tick
+        frame: Returns the grid of a tick
+        frames: Returns grids of a range of ticks
+        window: Returns an area of grids of a range of ticks
+    """
+    HEADER_DTYPE = np.dtype([
+        ('magic', 'S4'),
+        ('ring', np.bool_),
+        ('x', np.int64),
+        ('y', np.int64),
+        ('width', np.int64),
+        ('height', np.int64),
+        ('capacity', np.int64),
+        ('first', np.int64),
+        ('last', np.int64),
+    ])
+    MAGIC = b'LIFH'
+
+    def __init__(self, path, bounds=None, capacity=1024, ring=True):
+        self.path = path
+        self.bounds = bounds
+        self.capacity = capacity
+        self.ring = ring
+        self.header = None
+        self.grids = None
+
+    @classmethod
+    def open(cls, path):
+        """Opens a file of a history for reading"""
+        history = cls(path)
+        history.map('r')
+        return history
+
+    def start(self, emulation):
+        """Creates the file (replacing an existing one) and writes the grid of the current tick of an emulation"""
+        if self.bounds is None:
+            self.bounds = (0, 0, emulation.territory, emulation.territory)
+        header = np.zeros(1, dtype=self.HEADER_DTYPE)
+        header[0] = (self.MAGIC, self.ring, *self.bounds, self.capacity, emulation.tick, emulation.tick - 1)
+        with open(self.path, 'wb') as file:
+            file.write(header.tobytes())
+            file.truncate(self.HEADER_DTYPE.itemsize + self.capacity * self.bounds[2] * self.bounds[3])
+        self.map('r+')
+        # The first call of cell_changes returns all occupied cells and starts tracking changes
+        self.write(emulation.tick, *(emulation.cell_changes() if emulation.changes is None
+                                     else emulation.occupied_cells()))
+
+    def end_period(self, emulation):
+        """Writes the grid of the period: the grid of the previous tick updated by cells changed during the period"""
+        if self.grids is None:
+            # Continues the history of an emulation that is run again
+            self.map('r+')
+        self.write(emulation.tick, *emulation.cell_changes())
+
+    def close(self):
+        """Flushes and unmaps the file"""
+        if self.grids is not None and self.grids.mode == 'r+':
+            self.grids.flush()
+            self.header.flush()
+        self.header = self.grids = None
+
+    def map(self, mode):
+        """Maps the header and the grids of the file ('r' for reading, 'r+' for writing)"""
+        self.header = np.memmap(self.path, dtype=self.HEADER_DTYPE, mode=mode, shape=(1,))
+        header = self.header[0]
+        assert header['magic'] == self.MAGIC
+        self.ring = bool(header['ring'])
+        self.bounds = tuple(int(header[name]) for name in ('x', 'y', 'width', 'height'))
+        self.capacity = int(header['capacity'])
+        self.grids = np.memmap(self.path, dtype=np.uint8, mode=mode, offset=self.HEADER_DTYPE.itemsize,
+                               shape=(self.capacity, self.bounds[2], self.bounds[3]))
+
+    def write(self, tick, x, y, values):
+        """Writes changed cells into the grid of a tick, the grid of the previous tick is copied first"""
+        first, last = int(self.header[0]['first']), int(self.header[0]['last'])
+        assert tick == last + 1, 'Grids are written for consecutive ticks'
+        if not self.ring and tick - first == self.capacity:
+            # Append-only file grows by doubling
+            self.close()
+            with open(self.path, 'r+b') as file:
+                file.truncate(self.HEADER_DTYPE.itemsize + 2 * self.capacity * self.bounds[2] * self.bounds[3])
+            self.header = np.memmap(self.path, dtype=self.HEADER_DTYPE, mode='r+', shape=(1,))
+            self.header[0]['capacity'] = 2 * self.capacity
+            self.map('r+')
+        grid = self.grids[self.slot(tick)]
+        if tick == first:
+            grid[:] = 0
+        else:
+            grid[:] = self.grids[self.slot(last)]
+        x, y = x - self.bounds[0], y - self.bounds[1]
+        visible = (x >= 0) & (x < self.bounds[2]) & (y >= 0) & (y < self.bounds[3])
+        grid[x[visible], y[visible]] = values[visible]
+        self.header[0]['last'] = tick
+
+    def ticks(self):
+        """Returns the first and the last tick available in the file (the last is less than the first if none)"""
+        header = self.header[0]
+        if header['capacity'] != self.capacity:
+            # The append-only file grew since it was mapped
+            self.map(self.grids.mode)
+        first, last = int(header['first']), int(header['last'])
+        if self.ring:
+            first = max(first, last - self.capacity + 1)
+        return first, last
+
+    def slot(self, tick):
+        """Returns the index of the grid of a tick in the file"""
+        return (tick - int(self.header[0]['first'])) % self.capacity
+
+    def frame(self, tick):
+        """Returns the grid (width, height) of a tick as a view of the file"""
+        first, last = self.ticks()
+        assert first <= tick <= last, f'Tick {tick} is not in the history ({first} - {last})'
+        return self.grids[self.slot(tick)]
+
+    def frames(self, start=None, stop=None):
+        """
+        Returns grids (ticks, width, height) of ticks from start up to stop (not included), all available ticks
+        by default. The result is a view of the file unless the range wraps around the ring buffer
+        """
+        return self.window(self.bounds[0], self.bounds[1], self.bounds[2], self.bounds[3], start, stop)
+
+    def window(self, x, y, width, height, start=None, stop=None):
+        """
+        Returns an area (x, y, width, height) of grids of ticks from start up to stop (not included).
+        The result is a view of the file unless the range wraps around the ring buffer, then only the area is copied
+        """
+        first, last = self.ticks()
+        start = first if start is None else start
+        stop = last + 1 if stop is None else stop
+        assert first <= start <= stop <= last + 1, f'Ticks {start} - {stop} are not in the history ({first} - {last})'
+        x, y = x - self.bounds[0], y - self.bounds[1]
+        assert 0 <= x and 0 <= y and x + width <= self.bounds[2] and y + height <= self.bounds[3]
+        begin = self.slot(start)
+        end = begin + stop - start
+        if end <= self.capacity:
+            return self.grids[begin:end, x:x + width, y:y + height]
+        return np.concatenate([self.grids[begin:, x:x + width, y:y + height],
+                               self.grids[:end - self.capacity, x:x + width, y:y + height]])
+
+
+class CreatureRegistry:
+    """
+    Slot map of existing creatures. Each creature gets a stable integer id made of its slot and
+    the slot generation, so an id of a dead creature never refers to a creature born later.
+    Insertion and removal take O(1), slots of dead creatures are freed by compact at the end of a period
+
+    Attributes:
+        SLOT_BITS(int): Amount of lower id bits that store the slot
+        PLANT_SLOT(int): Bit of the slot of plants, their slots are slots of PlantColumns
+        slots(list): Creature instance (an animal) or None by slot
+        generations(array): Generation of each slot, increases when a creature in the slot dies
+        free_slots(list): Slots that can be reused by insert
+        dead_slots(list): Slots of creatures died since the last compact
+        plants(PlantColumns): Columns of plants, which have no objects of their own
+        alive(int): Amount of alive creatures
+        active(list): Creatures that move every period (not LAZY) in order of birth, died ones are removed by compact
+        born, died(list): Id and species of creatures born and died since the last take_changes,
+            None if they are not tracked
+
+    Methods:
+        insert: Registers a creature and returns its id
+        remove: Marks a creature as dead
+        get: Returns a creature by id or None if it is dead
+        active_creatures: Iterates over alive creatures that move every period
+        compact: Frees slots of dead creatures
+        take_changes: Returns creatures born and died since the previous call and starts tracking them
+    """
+    SLOT_BITS = 32
+    PLANT_SLOT = 1 << (SLOT_BITS - 1)
+
+    def __init__(self):
+        self.slots = list()
+        self.generations = array('I')
+        self.free_slots = list()
+        self.dead_slots = list()
+        self.plants = PlantColumns()
+        self.alive = 0
+        self.active = list()
+        self.born = None
+        self.died = None
+
+    def __len__(self):
+        return self.alive
+
+    def __iter__(self):
+        """
+        Iterates over creatures alive at the start of the iteration. Creatures born during the iteration
+        are not visited and creatures died during it are skipped
+        """
+        for slot, creature in enumerate(list(self.slots)):
+            if (creature is not None) and (self.slots[slot] is creature):
+                yield creature
+        yield from self.plants
+
+    def insert(self, creature_instance):
+        """Registers a creature and returns its id. A plant gets a slot of PlantColumns"""
+        if creature_instance.SPECIES == PLANT:
+            self.alive += 1
+            creature_id = self.plants.allocate()
+            if self.born is not None:
+                self.born.append((creature_id, PLANT))
+            return creature_id
+        if self.free_slots:
+            slot = self.free_slots.pop()
+            self.slots[slot] = creature_instance
+        else:
+            slot = len(self.slots)
+            self.slots.append(creature_instance)
+            self.generations.append(0)
+        self.alive += 1
+        if not creature_instance.LAZY:
+            self.active.append(creature_instance)
+        creature_id = (self.generations[slot] << self.SLOT_BITS) | slot
+        if self.born is not None:
+            self.born.append((creature_id, creature_instance.SPECIES))
+        return creature_id
+
+    def remove(self, creature_instance):
+        """Marks a creature as dead. The slot is reused only after compact"""
+        slot = creature_instance.id & ((1 << self.SLOT_BITS) - 1)
+        if slot & self.PLANT_SLOT:
+            if not self.plants.remove(creature_instance.id):
+                return
+        elif self.slots[slot] is not creature_instance:
+            return
+        else:
+            self.slots[slot] = None
+            self.generations[slot] += 1
+            self.dead_slots.append(slot)
+        self.alive -= 1
+        if self.died is not None:
+            self.died.append((creature_instance.id, creature_instance.SPECIES))
+
+    def get(self, creature_id):
+        """Returns a creature by id or None if it is dead. A plant is returned as a new handle of its slot"""
+        slot = creature_id & ((1 << self.SLOT_BITS) - 1)
+        if slot & self.PLANT_SLOT:
+            return self.plants.get(creature_id)
+        if self.generations[slot] != creature_id >> self.SLOT_BITS:
+            return None
+        return self.slots[slot]
+
+    def is_alive(self, creature_instance):
+        """Checks whether a creature is still registered"""
+        if creature_instance.id & self.PLANT_SLOT:
+            # Handles of a plant are not the same object, the generation of the slot tells whether it is alive
+            return self.plants.is_alive(creature_instance.id)
+        return self.get(creature_instance.id) is creature_instance
+
+    def active_creatures(self):
+        """Iterates over creatures that move every period, alive at the start of the iteration (as __iter__)"""
+        mask = (1 << self.SLOT_BITS) - 1
+        for creature in list(self.active):
+            if self.slots[creature.id & mask] is creature:
+                yield creature
+
+    def compact(self):
+        """Frees slots of creatures died since the last compact"""
+        if self.dead_slots:
+            mask = (1 << self.SLOT_BITS) - 1
+            self.active = [creature for creature in self.active if self.slots[creature.id & mask] is creature]
+        self.free_slots.extend(self.dead_slots)
+        self.dead_slots = list()
+        self.plants.compact()
+
+    def take_changes(self):
+        """
+        Returns lists of (id, species) of creatures born and died since the previous call (empty on the
+        first call, which starts tracking them)
+        """
+        born, died = self.born or list(), self.died or list()
+        self.born, self.died = list(), list()
+        return born, died
+
+
+class PlantColumns:
+    """
+    Plants of the 'object' engine stored as columns by slot instead of an object for each plant. Plant instances
+    are handles made by get: a handle keeps only the world and the id and reads and writes the columns
+    of its slot. Slots are reused after compact and their generations make ids of dead plants stale,
+    as in CreatureRegistry
+
+    Attributes:
+        TYPECODES(dict): Typecodes of the columns of plant attributes
+        world(World): World of the plants, handles refer to it
+        generations(array): Generation of each slot, increases when a plant in the slot dies
+        alive(bytearray): Whether a slot holds an alive plant
+        placed(bytearray): Whether the plant of a slot is placed in the field (x and y are not None)
+        free_slots(list): Slots that can be reused by allocate
+        dead_slots(list): Slots of plants died since the last compact
+        birth, size, x, y, toxicity, mass_base, mass_tick, next_shoot(array): Attributes of plants by slot
+
+    Methods:
+        allocate: Takes a slot for a new plant and returns its id
+        remove: Marks a plant as dead
+        get: Returns a handle of a plant by id or None if it is dead
+        is_alive: Checks whether a plant is still alive
+        compact: Frees slots of dead plants
+        attribute: Returns a property of Plant that reads and writes a column
+    """
+    TYPECODES = {'birth': 'i', 'size': 'B', 'x': 'i', 'y': 'i', 'toxicity': 'B', 'mass_base': 'd', 'mass_tick': 'i',
+                 'next_shoot': 'i'}
+
+    def __init__(self):
+        self.world = None
+        self.generations = array('I')
+        self.alive = bytearray()
+        self.placed = bytearray()
+        self.free_slots = list()
+        self.dead_slots = list()
+        for name, typecode in self.TYPECODES.items():
+            setattr(self, name, array(typecode))
+
+    def __iter__(self):
+        """Iterates over handles of plants alive at the start of the iteration and not died during it"""
+        generations, bits, flag = self.generations, CreatureRegistry.SLOT_BITS, CreatureRegistry.PLANT_SLOT
+        for slot, alive in enumerate(bytes(self.alive)):
+            if alive and self.alive[slot]:
+                yield self.handle((generations[slot] << bits) | flag | slot)
+
+    def allocate(self):
+        """Takes a free slot (or appends one) for a new plant and returns its id"""
+        if self.free_slots:
+            slot = self.free_slots.pop()
+        else:
+            slot = len(self.generations)
+            self.generations.append(0)
+            self.alive.append(0)
+            self.placed.append(0)
+            for name in self.TYPECODES:
+                getattr(self, name).append(0)
+        self.alive[slot] = 1
+        self.placed[slot] = 0
+        return (self.generations[slot] << CreatureRegistry.SLOT_BITS) | CreatureRegistry.PLANT_SLOT | slot
+
+    def remove(self, plant_id):
+        """Marks a plant as dead, returns False if it has already died. The slot is reused only after compact"""
+        if not self.is_alive(plant_id):
+            return False
+        slot = plant_id & (CreatureRegistry.PLANT_SLOT - 1)
+        self.alive[slot] = 0
+        self.generations[slot] += 1
+        self.dead_slots.append(slot)
+        return True
+
+    def is_alive(self, plant_id):
+        """Checks whether a plant is still alive by the generation of its slot"""
+        slot = plant_id & (CreatureRegistry.PLANT_SLOT - 1)
+        return self.generations[slot] == plant_id >> CreatureRegistry.SLOT_BITS
+
+    def get(self, plant_id):
+        """Returns a new handle of a plant by id or None if it is dead"""
+        return self.handle(plant_id) if self.is_alive(plant_id) else None
+
+    def handle(self, plant_id):
+        """Returns a new handle of a plant"""
+        plant = Plant.__new__(Plant)
+        plant.world = self.world
+        plant.id = plant_id
+        return plant
+
+    def compact(self):
+        """Frees slots of plants died since the last compact"""
+        self.free_slots.extend(self.dead_slots)
+        self.dead_slots = list()
+
+    @staticmethod
+    def attribute(name):
+        """Returns a property of Plant that reads and writes a column by the slot of a plant"""
+        mask = CreatureRegistry.PLANT_SLOT - 1
+        column = operator.attrgetter(name)
+
+        def get(plant):
+            return column(plant.world.plants)[plant.id & mask]
+
+        def set(plant, value):
+            column(plant.world.plants)[plant.id & mask] = value
+        return property(get, set)
+
+    @staticmethod
+    def anchor(name):
+        """Returns a property of Plant for x or y of its anchor, None while the plant is not placed"""
+        mask = CreatureRegistry.PLANT_SLOT - 1
+        column = operator.attrgetter(name)
+
+        def get(plant):
+            plants = plant.world.plants
+            slot = plant.id & mask
+            return column(plants)[slot] if plants.placed[slot] else None
+
+        def set(plant, value):
+            plants = plant.world.plants
+            slot = plant.id & mask
+            plants.placed[slot] = value is not None
+            if value is not None:
+                column(plants)[slot] = value
+        return property(get, set)
+
+
+class Scheduler:
+    """
+    Timing wheel of future events of creatures. Events of the next WHEEL_SIZE ticks are kept in buckets
+    indexed by tick, later ones wait in a heap, so scheduling and taking the due events cost O(1)
+    per event. A bucket keeps an array of creature ids for each kind of events, so a waiting event takes
+    8 bytes instead of a tuple. Events refer to creatures by id, events of creatures died before them
+    are skipped by the caller
+
+    Attributes:
+        WHEEL_SIZE(int): Amount of buckets of the wheel
+        wheel(list): Arrays of creature ids by kind of events of each of the next WHEEL_SIZE ticks
+        overflow(list): Heap of events (tick, kind, creature id) beyond the wheel
+        tick(int): The last tick whose events were taken
+
+    Methods:
+        schedule: Schedules an event of a creature
+        due: Returns events due at the next tick
+    """
+    WHEEL_SIZE = 64
+
+    def __init__(self, tick=0):
+        self.wheel = [self.bucket() for _ in range(self.WHEEL_SIZE)]
+        self.overflow = list()
+        self.tick = tick
+
+    def __len__(self):
+        return sum(len(ids) for bucket in self.wheel for ids in bucket) + len(self.overflow)
+
+    @staticmethod
+    def bucket():
+        """Returns an empty bucket: an array of creature ids for each kind of events"""
+        return [array('Q') for _ in range(EVENT_KINDS)]
+
+    def schedule(self, tick, kind, creature_id):
+        """Schedules an event of a creature. Events of past ticks are due at the next tick"""
+        tick = max(tick, self.tick + 1)
+        if tick - self.tick < self.WHEEL_SIZE:
+            self.wheel[tick % self.WHEEL_SIZE][kind].append(creature_id)
+        else:
+            heapq.heappush(self.overflow, (tick, kind, creature_id))
+
+    def due(self, tick):
+        """
+        Returns events (kind, creature id) due at tick, sorted by kind and id, so the order does not depend
+        on the order of scheduling. Ticks must be taken one by one
+        """
+        bucket = self.wheel[tick % self.WHEEL_SIZE]
+        self.wheel[tick % self.WHEEL_SIZE] = self.bucket()
+        while self.overflow and self.overflow[0][0] <= tick:
+            _, kind, creature_id = heapq.heappop(self.overflow)
+            bucket[kind].append(creature_id)
+        self.tick = tick
+        return [(kind, creature_id) for kind, ids in enumerate(bucket) for creature_id in sorted(ids)]
+
+
+class FieldChunk:
+    """
+    Square block of CHUNK_SIZE x CHUNK_SIZE cells of the Field. Ids are stored inline in arrays,
+    so the Field keeps no int objects of its own
+
+    Attributes:
+        EMPTY, SHARED(int): Values of an empty cell and of a cell occupied by two or more creatures
+        cells(array): Flat array of cells, each one is EMPTY, an id of the only creature of the cell or SHARED
+        shared(dict): Arrays of ids of creatures of shared cells by index of the cell
+        occupied(int): Amount of cells that are not EMPTY
+        active(int): Amount of cells occupied by creatures that are not LAZY (animals), a chunk without them sleeps
+    """
+    __slots__ = ('cells', 'shared', 'occupied', 'active')
+    EMPTY, SHARED = -1, -2
+
+    def __init__(self, chunk_size):
+        self.cells = array('q', [self.EMPTY]) * (chunk_size * chunk_size)
+        self.shared = dict()
+        self.occupied = 0
+        self.active = 0
+
+
+class Field:
+    """
+    Stores infinite field as chunks of cells and updates cells of the field.
+    Chunks are allocated only where creatures exist and freed when they become empty,
+    so coordinates may be negative and memory depends on occupied area only.
+    A chunk is active while an animal occupies one of its cells, lazy plants of sleeping chunks
+    have nothing to interact with, so shared cells are searched in active chunks only. An animal
+    that relocates into a sleeping chunk wakes it
+
+    Attributes:
+        CHUNK_SIZE(int): Size of the chunk side in cells
+        chunks(dict): FieldChunk instances by chunk coordinates
+        creatures(CreatureRegistry): Registry that resolves ids stored in cells
+        dirty(set): Positions of cells changed since the renderer read them, None if changes are not tracked
+        occupied(int): Amount of occupied cells
+        active(int): Amount of active chunks
+        allocated(int): Amount of chunks allocated since creation of the field
+
+    Methods:
+        get_cell: Returns content of particular cell by position
+        is_empty: Checks whether particular cell is not occupied
+        occupy_cell: Sets a Creature instance into particular cell by position
+        leave_cell: Removes a Creature instance from particular cell by position
+        occupied_cells: Returns amount of occupied cells
+        occupied_positions: Returns positions of all occupied cells
+        shared_cells: Returns ids and positions of creatures in shared cells of active chunks
+        cell_values: Returns colors of the renderer for particular cells
+        active_chunks: Returns coordinates of active chunks
+    """
+    CHUNK_SIZE = 16
+
+    def __init__(self, creatures):
+        self.chunks = dict()
+        self.creatures = creatures
+        self.dirty = None
+        self.occupied = 0
+        self.active = 0
+        self.allocated = 0
+
+    def locate(self, cell_position):
+        """Returns chunk coordinates and index of the cell inside of the chunk"""
+        chunk_x, cell_x = divmod(cell_position[0], self.CHUNK_SIZE)
+        chunk_y, cell_y = divmod(cell_position[1], self.CHUNK_SIZE)
+        return (chunk_x, chunk_y), cell_x * self.CHUNK_SIZE + cell_y
+
+    def get_cell(self, cell_position):
+        """Returns None, a Creature instance or a list of Creature instances in particular cell by position"""
+        chunk_key, index = self.locate(cell_position)
+        chunk = self.chunks.get(chunk_key)
+        if chunk is None:
+            return None
+        cell = chunk.cells[index]
+        if cell == FieldChunk.SHARED:
+            return [self.creatures.get(creature_id) for creature_id in chunk.shared[index]]
+        if cell == FieldChunk.EMPTY:
+            return None
+        return self.creatures.get(cell)
+
+    def is_empty(self, cell_position):
+        """Checks whether particular cell is not occupied without resolving its creatures"""
+        chunk_key, index = self.locate(cell_position)
+        chunk = self.chunks.get(chunk_key)
+        return (chunk is None) or (chunk.cells[index] == FieldChunk.EMPTY)
+
+    def occupy_cell(self, cell_position, creature_instance):
+        """Sets a Creature instance into particular cell by position"""
+        if self.dirty is not None:
+            self.dirty.add((cell_position[0], cell_position[1]))
+        chunk_key, index = self.locate(cell_position)
+        chunk = self.chunks.get(chunk_key)
+        if chunk is None:
+            # Allocates a chunk for the first creature in it
+            chunk = FieldChunk(self.CHUNK_SIZE)
+            self.chunks[chunk_key] = chunk
+            self.allocated += 1
+        if not creature_instance.LAZY:
+            # An animal wakes a sleeping chunk
+            if chunk.active == 0:
+                self.active += 1
+            chunk.active += 1
+        cell = chunk.cells[index]
+        if cell == FieldChunk.EMPTY:
+            # Sets a creature id to the empty cell
+            chunk.cells[index] = creature_instance.id
+            chunk.occupied += 1
+            self.occupied += 1
+        elif cell == FieldChunk.SHARED:
+            # Appends to the ids of a cell already occupied by two or more creatures
+            chunk.shared[index].append(creature_instance.id)
+        else:
+            # Shares the cell if it is already occupied by one creature
+            chunk.shared[index] = array('q', (cell, creature_instance.id))
+            chunk.cells[index] = FieldChunk.SHARED
+
+    def leave_cell(self, cell_position, creature_instance):
+        """Removes a Creature instance from particular cell by position"""
+        if self.dirty is not None:
+            self.dirty.add((cell_position[0], cell_position[1]))
+        chunk_key, index = self.locate(cell_position)
+        chunk = self.chunks.get(chunk_key)
+        if chunk is None:
+            return
+        cell = chunk.cells[index]
+        if cell == creature_instance.id:
+            # Empties the cell if there is only the Creature instance
+            cell = FieldChunk.EMPTY
+        elif (cell == FieldChunk.SHARED) and (creature_instance.id in chunk.shared[index]):
+            # Removes from the ids of a shared cell if there is more than one Creature instance
+            ids = chunk.shared[index]
+            ids.remove(creature_instance.id)
+            if len(ids) == 1:
+                cell = ids[0]
+                del chunk.shared[index]
+        else:
+            return
+
+        chunk.cells[index] = cell
+        if not creature_instance.LAZY:
+            chunk.active -= 1
+            if chunk.active == 0:
+                self.active -= 1
+        if cell == FieldChunk.EMPTY:
+            chunk.occupied -= 1
+            self.occupied -= 1
+            # Frees the chunk if it became empty
+            if chunk.occupied == 0:
+                del self.chunks[chunk_key]
+
+    def occupied_cells(self):
+        """Returns amount of occupied cells"""
+        return self.occupied
+
+    def active_chunks(self):
+        """Returns coordinates of active chunks"""
+        return [chunk_key for chunk_key, chunk in self.chunks.items() if chunk.active > 0]
+
+    def occupied_positions(self):
+        """Returns positions of all occupied cells"""
+        positions = list()
+        for (chunk_x, chunk_y), chunk in self.chunks.items():
+            for index, cell in enumerate(chunk.cells):
+                if cell != FieldChunk.EMPTY:
+                    positions.append((chunk_x * self.CHUNK_SIZE + index // self.CHUNK_SIZE,
+                                      chunk_y * self.CHUNK_SIZE + index % self.CHUNK_SIZE))
+        return positions
+
+    def shared_cells(self):
+        """
+        Returns ids of creatures and x and y of their cells for cells occupied by two or more creatures.
+        Sleeping chunks are skipped: only an animal interacts with others
+        """
+        ids, x, y = list(), list(), list()
+        size = self.CHUNK_SIZE
+        for chunk_x, chunk_y in self.active_chunks():
+            for index, cell in self.chunks[chunk_x, chunk_y].shared.items():
+                ids.extend(cell)
+                x.extend([chunk_x * size + index // size] * len(cell))
+                y.extend([chunk_y * size + index % size] * len(cell))
+        return ids, x, y
+
+    def cell_values(self, positions):
+        """
+        Returns x, y and colors of the renderer for cells by positions: 0 for an empty cell,
+        species + 1 for cells of one species, Renderer.MIXED for cells shared by different species
+        """
+        values = list()
+        for position in positions:
+            chunk_key, index = self.locate(position)
+            chunk = self.chunks.get(chunk_key)
+            cell = FieldChunk.EMPTY if chunk is None else chunk.cells[index]
+            if cell == FieldChunk.EMPTY:
+                values.append(0)
+            elif cell == FieldChunk.SHARED:
+                species = {self.creatures.get(creature_id).SPECIES for creature_id in chunk.shared[index]}
+                values.append(species.pop() + 1 if len(species) == 1 else Renderer.MIXED)
+            else:
+                values.append(self.creatures.get(cell).SPECIES + 1)
+        positions = np.array(list(positions), dtype=np.int64).reshape(-1, 2)
+        return positions[:, 0], positions[:, 1], np.array(values, dtype=np.uint8)
+
+
+class World:
+    """
+    References shared by all creatures of one emulation, so each creature keeps only one of them
+
+    Attributes:
+        field(Field): Field of the emulation
+        creatures(CreatureRegistry): Registry of existing creatures
+        plants(PlantColumns): Columns of plants of the registry
+        rng(RandomStream): Random numbers of the emulation
+        position(Position): Placement of creatures in the field
+        events(EventLog): Event log of the emulation
+        statistics(Statistics): Population statistics updated by creatures, None if they are not collected
+        instruments(Instruments): Counters of births and deaths updated by creatures, None if they are not collected
+        scheduler(Scheduler): Future events of creatures
+        tick(int): The current tick, lazy creatures compute their state from it
+        herds(dict): Herd size and step toward the herd center by id of a herbivore, found at the start of a period
+    """
+    __slots__ = ('field', 'creatures', 'plants', 'rng', 'position', 'events', 'statistics', 'instruments', 'scheduler',
+                 'tick', 'herds')
+
+    def __init__(self, field, creatures, rng, events, territory=100):
+        self.field = field
+        self.creatures = creatures
+        # Handles of plants refer to the world of their columns
+        self.plants = creatures.plants
+        self.plants.world = self
+        self.rng = rng
+        self.position = Position(field, territory)
+        self.events = events
+        self.statistics = None
+        self.instruments = None
+        self.scheduler = Scheduler()
+        self.tick = 0
+        self.herds = dict()
+
+
+class Position:
+    """
+    Places and changes position of Creature instances in the specific Field instance.
+    One instance is shared by all creatures of the emulation: a creature keeps only its anchor cell,
+    other occupied cells are taken from FOOTPRINT_TEMPLATES by its size. Generation, relocation, growth and
+    birth all go through place
+
+    Attributes:
+        field (list): Instance of class Field
+        territory (int): Side of the square territory where creatures are generated (by Placement.scatter)
+
+    Methods:
+        footprint: Returns coordinates of cells occupied by a creature
+        place: Validates and occupies a footprint of a creature at a new anchor and/or size
+        change_position: Changes position for a creature because of relocation or size changing
+        set_position: Sets particular position for a newborn creature
+    """
+    def __init__(self, field, territory=100):
+        assert isinstance(field, Field)
+        self.field = field
+        self.territory = territory
+
+    @staticmethod
+    def footprint(creature_instance):
+        """Returns coordinates of cells occupied by a creature: the anchor cell first, then neighbours by size"""
+        x, y = creature_instance.x, creature_instance.y
+        return [[x + dx, y + dy] for dx, dy in FOOTPRINT_TEMPLATES[min(creature_instance.size, MAX_FOOTPRINT)]]
+
+    def occupy(self, creature_instance):
+        """Occupies all cells of the creature footprint"""
+        for coordinates in self.footprint(creature_instance):
+            self.field.occupy_cell(coordinates, creature_instance)
+
+    def leave(self, creature_instance):
+        """Leaves all cells of the creature footprint"""
+        for coordinates in self.footprint(creature_instance):
+            self.field.leave_cell(coordinates, creature_instance)
+
+    def place(self, creature_instance, anchor=None, size=None, free=False):
+        """
+        Moves the footprint of a creature to a new anchor and/or size (the current ones by default).
+        All cells of the new footprint are validated at once: they must fit into the coordinate range of the field
+        and, if free is True, must not be occupied by other creatures. Then the old cells are left and the new
+        ones are occupied. Returns the placed cells packed into int64 keys, or None if the footprint is not valid
+        (the creature keeps its position)
+        """
+        x, y = (creature_instance.x, creature_instance.y) if anchor is None else anchor
+        size = creature_instance.size if size is None else size
+        # Footprints spread along y by one cell, so the anchor with a margin validates every cell
+        if not (-COORDINATE_LIMIT <= x < COORDINATE_LIMIT and -COORDINATE_LIMIT < y < COORDINATE_LIMIT - 1):
+            return None
+        cells = [[x + dx, y + dy] for dx, dy in FOOTPRINT_TEMPLATES[min(size, MAX_FOOTPRINT)]]
+        placed = creature_instance.x is not None
+        if free:
+            own = self.footprint(creature_instance) if placed else ()
+            for cell in cells:
+                if cell not in own and not self.field.is_empty(cell):
+                    return None
+        if placed:
+            self.leave(creature_instance)
+        creature_instance.x, creature_instance.y, creature_instance.size = x, y, size
+        for cell in cells:
+            self.field.occupy_cell(cell, creature_instance)
+        return array('q', [(cell_x << 32) + (cell_y & 0xffffffff) for cell_x, cell_y in cells])
+
+    def change_position(self, creature_instance, new_coordinates=None, new_size=None):
+        """Changes position of a Creature instance because of a relocation (new anchor) or size change"""
+        if not creature_instance.creatures.is_alive(creature_instance):
+            # A dead creature does not occupy cells anymore
+            return None
+        return self.place(creature_instance, new_coordinates, new_size)
+
+    def set_position(self, coordinates, creature_instance):
+        """Sets particular position for a newborn creature"""
+        return self.place(creature_instance, coordinates)
+
+
+class Placement:
+    """
+    Vectorized placement of creature footprints. Anchors of all creatures are drawn at once and creatures whose
+    footprints collide with placed creatures or with each other are drawn again in the next pass, so
+    generation does not test cells one by one. Cells are compared as packed int64 keys, so the territory
+    may be of any size, a crowded territory is filled through a grid of its free cells
+
+    Attributes:
+        OFFSETS(np.ndarray): FOOTPRINT_OFFSETS as an array, the footprint of size n takes its first n rows
+
+    Methods:
+        scatter: Returns anchors of creatures of given sizes placed within a territory without overlaps
+        fill: Places creatures into free cells of a crowded territory
+        first_claims: Checks which footprints are the first claimant of each of their cells
+        footprint_cells: Returns owner, x and y of every cell of footprints
+        in_bounds: Checks which anchors keep footprints within the coordinate range of the field
+        pack: Packs cell coordinates into int64 keys
+        contains: Checks which keys are in a sorted array of keys
+    """
+    OFFSETS = np.array(FOOTPRINT_OFFSETS, dtype=np.int64)
+
+    @staticmethod
+    def footprint_cells(x, y, size):
+        """Returns owner (index in the arrays), x and y of every cell of footprints given by anchors and sizes"""
+        size = np.asarray(size, dtype=np.int64)
+        owner = np.repeat(np.arange(len(size)), size)
+        # Number of the cell inside of the footprint of its owner
+        rank = np.arange(len(owner)) - np.repeat(np.cumsum(size) - size, size)
+        offsets = Placement.OFFSETS[rank]
+        return owner, x[owner] + offsets[:, 0], y[owner] + offsets[:, 1]
+
+    @staticmethod
+    def in_bounds(x, y):
+        """Checks which anchors keep all cells of their footprints within the coordinate range of the field"""
+        return (x >= -COORDINATE_LIMIT) & (x < COORDINATE_LIMIT) & (y > -COORDINATE_LIMIT) & (y < COORDINATE_LIMIT - 1)
+
+    @staticmethod
+    def pack(x, y):
+        """Packs cell coordinates (within +-2^31) into int64 keys"""
+        return (x.astype(np.int64) << 32) + (y.astype(np.int64) & 0xffffffff)
+
+    @staticmethod
+    def contains(sorted_keys, keys):
+        """Checks which keys are in the sorted array of keys"""
+        if len(sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        index = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+        return sorted_keys[index] == keys
+
+    @staticmethod
+    def first_claims(owner, keys, amount):
+        """
+        Checks which of amount footprints (cells given by owner and packed keys) are the first claimant of each
+        of their cells, so accepted footprints do not share cells with each other
+        """
+        order = np.lexsort((owner, keys))
+        repeated = np.concatenate([[False], keys[order][1:] == keys[order][:-1]])
+        accepted = np.ones(amount, dtype=bool)
+        accepted[owner[order][repeated]] = False
+        return accepted
+
+    @staticmethod
+    def scatter(rng, size, territory):
+        """
+        Returns anchors x, y of creatures of given sizes within the square territory, so that no cell is occupied
+        by two creatures. Bigger footprints are placed first, so smaller ones fill the gaps. While the territory
+        is less than half occupied, each pass draws random anchors for creatures that are not placed yet and
+        a creature is placed if all its cells are free and it is the first claimant of each of them. Then
+        anchors are drawn among positions where the whole footprint is free (fill), until every creature
+        is placed or no footprint of its size fits. Only creatures that do not fit are placed at random anchors
+        on top of others
+        """
+        number = len(size)
+        size = np.asarray(size, dtype=np.int64)
+        x = np.zeros(number, dtype=np.int64)
+        y = np.zeros(number, dtype=np.int64)
+        # Sorted keys of occupied cells
+        occupied = np.zeros(0, dtype=np.int64)
+        pending = np.argsort(-size, kind='stable')
+        # Footprints spread along y by one cell, so they may occupy one row on each side of the territory
+        cells = territory * (territory + 2)
+        while len(pending) > 0 and 2 * len(occupied) <= cells:
+            trying = pending[:cells - len(occupied)]
+            anchor_x = rng.randint(0, territory, size=len(trying))
+            anchor_y = rng.randint(0, territory, size=len(trying))
+            owner, cell_x, cell_y = Placement.footprint_cells(anchor_x, anchor_y, size[trying])
+            keys = Placement.pack(cell_x, cell_y)
+            accepted = Placement.first_claims(owner, keys, len(trying))
+            # Cells occupied by creatures placed in previous passes
+            accepted[owner[Placement.contains(occupied, keys)]] = False
+            if not accepted.any():
+                break
+            x[trying[accepted]], y[trying[accepted]] = anchor_x[accepted], anchor_y[accepted]
+            occupied = np.sort(np.concatenate([occupied, keys[accepted[owner]]]))
+            pending = np.concatenate([trying[~accepted], pending[len(trying):]])
+        if len(pending) > 0:
+            pending = Placement.fill(rng, size, territory, occupied, pending, x, y)
+        # The rest does not fit into the territory
+        x[pending] = rng.randint(0, territory, size=len(pending))
+        y[pending] = rng.randint(0, territory, size=len(pending))
+        return x, y
+
+    @staticmethod
+    def fill(rng, size, territory, occupied, pending, x, y):
+        """
+        Places pending creatures (sorted from the biggest) into free cells of a crowded territory given by sorted
+        keys of occupied cells. The territory is kept as a grid of free cells, each pass draws distinct anchors
+        among positions where the whole footprint is free until no footprint of the size fits. Sets anchors
+        of placed creatures into x and y and returns creatures that do not fit
+        """
+        # Cells of rows from -1 to territory, the grid takes as much memory as the occupied half of the territory
+        free = np.ones((territory, territory + 2), dtype=bool)
+        occupied_y = ((occupied & 0xffffffff) ^ 0x80000000) - 0x80000000
+        free[occupied >> 32, occupied_y + 1] = False
+        remaining = list()
+        for footprint in np.unique(size[pending])[::-1].tolist():
+            group = pending[size[pending] == footprint]
+            while len(group) > 0:
+                fits = np.ones((territory, territory), dtype=bool)
+                for _, offset_y in Placement.OFFSETS[:footprint].tolist():
+                    fits &= free[:, 1 + offset_y:1 + offset_y + territory]
+                anchors = np.flatnonzero(fits)
+                if len(anchors) == 0:
+                    break
+                trying = group[:len(anchors)]
+                anchors = anchors[np.argsort(rng.random(len(anchors)))[:len(trying)]]
+                anchor_x, anchor_y = anchors // territory, anchors % territory
+                # Distinct anchors may still share cells of their footprints
+                owner, cell_x, cell_y = Placement.footprint_cells(anchor_x, anchor_y, size[trying])
+                accepted = Placement.first_claims(owner, Placement.pack(cell_x, cell_y), len(trying))
+                x[trying[accepted]], y[trying[accepted]] = anchor_x[accepted], anchor_y[accepted]
+                free[cell_x[accepted[owner]], cell_y[accepted[owner]] + 1] = False
+                group = np.concatenate([trying[~accepted], group[len(trying):]])
+            remaining.append(group)
+        return np.concatenate(remaining)
+
+
+class Creature:
+    """
+    Parent class for classes Animal and Plant
+
+    Attributes:
+        world(World): References shared by all creatures of the emulation
+        id(int): Id of a creature in the registry
+        age(int): Age of a creature, computed from the tick of birth
+        birth(int): Tick when a creature was born (negative for generated creatures older than the emulation)
+        mass(int): Mass of a creature, changes with each period and increases by food
+        size(int): Size means how many cells a creature occupies (1 to 3), depends on mass
+        x, y(int): Anchor cell of a creature, None until it is placed
+        field(list): Field matrix
+        creatures(CreatureRegistry): Registry of existing creatures on the field
+        rng(RandomStream): Random numbers of the emulation
+        position(Position): Placement of creatures in the field
+        coordinates_list(list): Coordinates of cells occupied by a creature
+        LAZY(bool): Lazy creatures do not move every period, they change only by events of the Scheduler
+        LIFESPAN(int): Age when a creature dies
+
+    Methods:
+        schedule: Schedules death of age (and other events known in advance)
+        set_position: Sets position for creature birth
+        die: Removes from the field, creatures registry and deletes instance
+        log: Emits an event of a creature to the event log
+        on_event: Handles an event of the Scheduler
+    """
+    __slots__ = ('world', 'id')
+    LAZY = False
+    LIFESPAN = 30
+
+    def __init__(self, world, age):
+        assert isinstance(world, World)
+        self.world = world
+        # The id comes first: attributes of a plant are stored in the columns of its slot
+        self.id = self.creatures.insert(self)
+        self.age = age
+        self.mass = self.rng.randint(0, 300)
+        self.size = int(self.mass/100)+1
+        self.x = None
+        self.y = None
+        if self.world.instruments is not None:
+            self.world.instruments.count_birth(self)
+
+    @property
+    def age(self):
+        return self.world.tick - self.birth
+
+    @age.setter
+    def age(self, value):
+        # Newborns share the int of the tick
+        self.birth = self.world.tick - value if value else self.world.tick
+
+    @property
+    def field(self):
+        return self.world.field
+
+    @property
+    def creatures(self):
+        return self.world.creatures
+
+    @property
+    def rng(self):
+        return self.world.rng
+
+    @property
+    def position(self):
+        return self.world.position
+
+    @property
+    def coordinates_list(self):
+        return Position.footprint(self)
+
+    def log(self, event_type, other=None):
+        """Emits an event of a creature (and the other creature of the event) to the event log"""
+        if other is None:
+            self.world.events.emit(event_type, self.id, self.SPECIES)
+        else:
+            self.world.events.emit(event_type, self.id, self.SPECIES, other.id, other.SPECIES)
+
+    def schedule(self):
+        """
+        Schedules death of age, so ages are not checked every period. Events known in advance are scheduled
+        again from the state of a loaded emulation, so they must not draw random numbers
+        """
+        self.world.scheduler.schedule(self.birth + self.LIFESPAN, AGE_DEATH, self.id)
+
+    def on_event(self, kind):
+        """Handles an event of the Scheduler"""
+        if kind == AGE_DEATH:
+            self.die()
+
+    def set_position(self, position):
+        """Sets position for a new creature produced by reproduction"""
+        self.position.set_position(position, self)
+
+    def die(self):
+        """Emulates death of the creature instance. Deletes the creature instance and clear occupied cells"""
+        if not self.creatures.is_alive(self):
+            # The creature has already died during the period
+            return
+        if self.world.instruments is not None:
+            self.world.instruments.count_death(self)
+        if self.world.statistics is not None:
+            self.world.statistics.remove(self)
+        self.creatures.remove(self)
+        if self.x is not None:
+            self.position.leave(self)
+        if self.world.events.enabled[DIED]:
+            self.log(DIED)
+
+
+class Animal(Creature):
+    """
+    Parent class for Carnivore, Herbivore and Omnivore classes
+
+    Attributes:
+        sex(bool): Sex of an animal
+        hunger(int): Hunger of an animal, increases each period, decreases by food
+        hp(int): Animal's health points
+        hit(int): Power of animal's hit
+        speed(int): Speed reflects how far (in cells from 1 to 5) an animal can move for a period
+        mature(bool): Reflects if an animal is old enough to reproduce, computed from age
+        MATURITY(int): Age when an animal becomes mature
+
+    Methods:
+        update_hp: Updates hp by period, fight or food
+        update_mass: Updates mass by a period
+        update_size: Updates size because of mass change
+        update_hunger: Updates hunger by period, fight or food
+        relocate: Relocates an animal with a step toward its herd
+        herd_step: Returns a step toward the center of the herd
+        attacks: Checks whether the animal attacks another creature sharing a cell
+        mates: Checks whether the animal can mate with another creature sharing a cell
+        period: Emulates hp, hunger and mass loss
+        move: Makes the part of a period that does not depend on other creatures
+    """
+    __slots__ = ('birth', 'size', 'x', 'y', 'mass', 'sex', 'hunger', 'hp', 'hit')
+    MATURITY = 20
+
+    def __init__(self, world, age):
+        super(Animal, self).__init__(world, age)
+        self.sex = bool(self.rng.randint(0, 2))
+        self.hunger = 0
+        self.hp = 100
+        self.hit = self.rng.randint(15, 45)
+        self.schedule()
+        if self.world.statistics is not None:
+            self.world.statistics.add(self)
+
+    @property
+    def mature(self):
+        """Maturity is computed from age instead of being stored"""
+        return self.age >= self.MATURITY
+
+    @property
+    def speed(self):
+        """Speed is proportional to hp, so it is computed from hp instead of being stored"""
+        return int(self.hp / 20)
+
+    def update_hp(self, amount=0, period=False):
+        """Updates hp by period, fight or food"""
+        old_hp = self.hp
+        # Updates hp by a period
+        if period:
+            self.hp -= self.hunger
+        # Updates hp by a fight or food
+        else:
+            self.hp += amount
+        # Hp regulation
+        if self.hp > 100:
+            self.hp = 100
+        if self.world.statistics is not None:
+            self.world.statistics.change(self, 'hp', old_hp)
+        if self.hp <= 0:
+            self.die()
+
+    def update_mass(self, amount=0, period=False):
+        """Updates mass by period (loses a fifth of it), fight or food (adds the amount)"""
+        old_mass = self.mass
+        if period:
+            self.mass -= 0.2 * self.mass
+        else:
+            self.mass += amount
+        if self.world.statistics is not None:
+            self.world.statistics.change(self, 'mass', old_mass)
+        if self.mass <= 0:
+            self.die()
+        self.update_size()
+
+    def update_size(self):
+        """Updates size if mass has been changed"""
+        new_size = int(self.mass/100)+1
+        if new_size != self.size:
+            self.position.change_position(self, new_size=new_size)
+
+    def update_hunger(self, amount=0, period=False):
+        """Updates hunger by period, fight or food"""
+        old_hunger = self.hunger
+        if period:
+            self.hunger = 15 + 0.2 * self.mass
+        else:
+            self.hunger += amount
+
+        if self.hunger < 0:
+            self.hunger = 0
+
+        if self.world.statistics is not None:
+            self.world.statistics.change(self, 'hunger', old_hunger)
+
+        if self.hunger >= 100:
+            self.die()
+
+    def relocate(self):
+        """Relocates the Animal instance into new position (biased toward the center of its herd)"""
+        try:
+            x = self.rng.randint(-self.speed, self.speed)
+            y = self.rng.randint(-self.speed, self.speed)
+            step_x, step_y = self.herd_step()
+        except ValueError:
+            return
+        # Only a move that took place is logged, a footprint out of the field keeps the position
+        moved = self.position.change_position(self, [self.x + x + step_x, self.y + y + step_y])
+        if moved is not None and self.world.events.enabled[RELOCATED]:
+            self.log(RELOCATED)
+
+    def herd_step(self):
+        """Returns a step toward the center of the herd, animals other than herbivores do not form herds"""
+        return 0, 0
+
+    def attacks(self, creature):
+        """Checks whether the animal attacks a creature, animals other than carnivores and omnivores do not attack"""
+        return False
+
+    def mates(self, creature):
+        """Checks whether the animal and a creature are adults of the same species and different sex"""
+        return (type(creature) is type(self)) and self.mature and creature.mature and (creature.sex is not self.sex)
+
+    def period(self):
+        """Emulates hp, hunger and mass loss each move, aging is computed from the tick"""
+        self.update_hunger(period=True)
+        self.update_hp(period=True)
+        self.update_mass(period=True)
 
     def move(self):
-        """Makes a move of a Herbivore instance"""
+        """
+        Makes the part of a period that does not depend on other creatures: hp, hunger and mass loss
+        and relocation with probability of 1/2. Interactions are emulated by Emulation.interaction_phase
+        """
         self.period()
-        relocate_choice = bool(np.random.randint(0, 2))
+        if not self.creatures.is_alive(self):
+            return
+        relocate_choice = bool(self.rng.randint(0, 2))
         if relocate_choice is True:
             self.relocate()
-        self.eat()
+
+
+class Carnivore(Animal):
+    """
+    Carnivore creature. Eats only other animals attacking them because of hunger and aggressiveness
+
+    Attributes:
+        aggressiveness(int): In the beginning (generation) equal 0, then updates each period
+
+    Methods:
+        attacks: Checks whether the carnivore attacks a creature (fights are emulated by Emulation.combat)
+        create_child: Emulates child creation
+        move: Makes a move of a Carnivore instance
+    """
+    __slots__ = ('aggressiveness',)
+    SPECIES = CARNIVORE
+
+    def __init__(self, world, age):
+        super(Carnivore, self).__init__(world, age)
+        # Each move aggressiveness updates. At the beginning (generation) it is equal 0
+        self.aggressiveness = 0
+
+    def __repr__(self):
+        return 'Carnivore'
+
+    def attacks(self, creature):
+        """
+        Checks whether the carnivore attacks a creature sharing a cell because of hunger
+        (and aggressiveness for other carnivores)
+        """
+        if self.hunger <= 30:
+            return False
+        return ((type(creature) is Herbivore) or (type(creature) is Omnivore)
+                or ((type(creature) is Carnivore) and (self.aggressiveness > 30)))
+
+    def create_child(self, coordinates):
+        """Emulates child creation"""
+        child = Carnivore(self.world, age=0)
+        child.set_position(coordinates)
+        if self.world.events.enabled[BORN]:
+            child.log(BORN)
+        return child
+
+    def move(self):
+        """Makes a move of a Carnivore instance"""
+        super(Carnivore, self).move()
+        if self.creatures.is_alive(self):
+            self.aggressiveness = self.rng.randint(0, 100)
+
+
+class Herbivore(Animal):
+    """
+    Herbivore creature. Eats only plants. Herbivores form herds (Herds): they move toward the center
+    of their herd and defend themselves better in larger herds
+
+    Methods:
+        herd_step: Returns a step toward the center of the herd
+        herd_defense: Returns a bonus to the win probability of a defending herbivore
+        eat: Emulates eating plant
+        create_child: Emulates child creation
+    """
+    __slots__ = ()
+    SPECIES = HERBIVORE
+
+    def __init__(self, world, age):
+        super(Herbivore, self).__init__(world, age)
+
+    def __repr__(self):
+        return 'Herbivore'
+
+    def herd_step(self):
+        """Returns a step toward the center of the herd found at the start of the period"""
+        size, step_x, step_y = self.world.herds.get(self.id, (1, 0, 0))
+        return step_x, step_y
+
+    def herd_defense(self):
+        """Returns a bonus to the win probability of a defending herbivore by size of its herd"""
+        size, step_x, step_y = self.world.herds.get(self.id, (1, 0, 0))
+        return int(Herds.defense(size))
+
+    def eat(self, plant):
+        """Emulates eating plant. A poisonous plant kills the herbivore with probability of 1/2"""
+        if plant.toxicity:
+            if bool(self.rng.randint(0, 2)):
+                self.die()
+        else:
+            if self.world.events.enabled[ATE]:
+                self.log(ATE, plant)
+            self.update_hunger(-0.3 * plant.mass)
+            self.update_mass(0.5 * plant.mass)
+            plant.die()
+
+    def create_child(self, coordinates):
+        """Emulates child creation"""
+        child = Herbivore(self.world, age=0)
+        child.set_position(coordinates)
+        if self.world.events.enabled[BORN]:
+            child.log(BORN)
+        return child
+
+
+class Omnivore(Animal):
+    """
+    Omnivore creature. Eats both animals and plants, attack only because of hunger
+
+    Methods:
+        attacks: Checks whether the omnivore attacks a creature (fights are emulated by Emulation.combat)
+        eat: Emulates eating plant
+        create_child: Emulates child creation
+    """
+    __slots__ = ()
+    SPECIES = OMNIVORE
+
+    def __init__(self, world, age):
+        super(Omnivore, self).__init__(world, age)
+
+    def __repr__(self):
+        return 'Omnivore'
+
+    def attacks(self, creature):
+        """Checks whether the omnivore attacks an animal sharing a cell because of hunger"""
+        return (self.hunger > 30) and (type(creature) is not Plant)
+
+    def eat(self, plant):
+        """Emulates eating plant. A poisonous plant kills the omnivore"""
+        if plant.toxicity:
+            self.die()
+        else:
+            if self.world.events.enabled[ATE]:
+                self.log(ATE, plant)
+            self.update_hunger(-0.3 * plant.mass)
+            self.update_mass(0.5 * plant.mass)
+            self.update_hp(0.3 * plant.mass)
+            plant.die()
+
+    def create_child(self, coordinates):
+        """Emulates child creation"""
+        child = Omnivore(self.world, age=0)
+        child.set_position(coordinates)
+        if self.world.events.enabled[BORN]:
+            child.log(BORN)
+        return child
+
+
+class Plant(Creature):
+    """
+    Plant creature. Grows in mass each period and with probability of 1/10 instead of grow reproduces.
+    Plants are lazy: age and mass are computed from the tick in closed form, only shoots and death of age
+    are events of the Scheduler, so a plant costs nothing in periods between its events. A plant has no object
+    of its own: its attributes are columns of PlantColumns and an instance is a handle of its slot, handles
+    of one plant are equal
+
+    Attributes:
+        toxicity(bool): Reflects if a plant is toxic or not
+        mass_base(int): Mass at tick mass_tick, mass grows from it by GROWTH each tick up to MAX_MASS
+        mass_tick(int): Tick of the last change of mass other than grow
+        next_shoot(int): Tick of the next shoot, -1 if a plant dies of age before it
+        GROWTH(int): Grow of mass per period
+        MAX_MASS(int): Maximal mass of a plant
+        SHOOT_PROBABILITY(float): Probability to reproduce instead of grow in a period
+
+    Methods:
+        schedule_shoot: Draws and schedules the next shoot
+        on_event: Handles death of age and shoots
+        shoot: Emulates a period with reproduction instead of grow
+        reproduce: Emulates reproduction process
+        create_child: Emulates child creation
+    """
+    __slots__ = ()
+    SPECIES = PLANT
+    LAZY = True
+    GROWTH = 50
+    MAX_MASS = 300
+    SHOOT_PROBABILITY = 0.1
+    birth = PlantColumns.attribute('birth')
+    size = PlantColumns.attribute('size')
+    x = PlantColumns.anchor('x')
+    y = PlantColumns.anchor('y')
+    toxicity = PlantColumns.attribute('toxicity')
+    mass_base = PlantColumns.attribute('mass_base')
+    mass_tick = PlantColumns.attribute('mass_tick')
+    next_shoot = PlantColumns.attribute('next_shoot')
+
+    def __init__(self, world, age):
+        super(Plant, self).__init__(world, age)
+        self.toxicity = bool(self.rng.randint(0, 2))
+        self.schedule()
+        self.schedule_shoot()
+        if self.world.statistics is not None:
+            self.world.statistics.add(self)
+
+    def __repr__(self):
+        return 'Plant'
+
+    def __eq__(self, other):
+        return type(other) is Plant and other.id == self.id
+
+    def __hash__(self):
+        return hash(self.id)
+
+    @property
+    def mass(self):
+        return min(self.mass_base + self.GROWTH * (self.world.tick - self.mass_tick), self.MAX_MASS)
+
+    @mass.setter
+    def mass(self, value):
+        self.mass_base = value
+        self.mass_tick = self.world.tick
+
+    def schedule_shoot(self):
+        """Draws the next shoot (each period reproduces with SHOOT_PROBABILITY) and schedules it"""
+        tick = self.world.tick + self.rng.geometric(self.SHOOT_PROBABILITY)
+        if tick < self.birth + self.LIFESPAN:
+            self.next_shoot = tick
+            self.world.scheduler.schedule(tick, SHOOT, self.id)
+        else:
+            self.next_shoot = -1
+
+    def on_event(self, kind):
+        """Handles death of age and shoots"""
+        if kind == SHOOT:
+            self.shoot()
+        else:
+            super(Plant, self).on_event(kind)
+
+    def shoot(self):
+        """Emulates a period with reproduction instead of grow, mass stays as it was in the previous period"""
+        old_mass = self.mass
+        self.mass = min(self.mass_base + self.GROWTH * (self.world.tick - 1 - self.mass_tick), self.MAX_MASS)
+        if self.world.statistics is not None:
+            self.world.statistics.change(self, 'mass', old_mass)
         self.reproduce()
+        self.schedule_shoot()
+
+    def reproduce(self):
+        """Reproduces new plant in one of the near cells"""
+        coordinates_index = self.rng.randint(0, len(self.coordinates_list))
+        coordinates = self.coordinates_list[coordinates_index]
+        self.create_child(coordinates)
+
+    def create_child(self, coordinates):
+        """Emulates child creation"""
+        child = Plant(self.world, age=0)
+        child.set_position(coordinates)
+        if self.world.events.enabled[BORN]:
+            child.log(BORN)
+        return child
+
+
+class Conflicts:
+    """
+    Explicit resolution of interactions proposed by many creatures from the same state of a period, so
+    the outcome does not depend on the order of creatures. Each proposal (a pair of creatures) gets a random
+    priority and a conflict is won by the proposal with the lowest priority. Proposals that win can be
+    applied in any order (or at once), because they do not share the contested creatures
+
+    Methods:
+        claims: Selects one proposal for every contested target (a plant eaten by several animals)
+        matching: Selects proposals so that every creature takes part in at most one of them
+    """
+    @staticmethod
+    def claims(rng, targets):
+        """Returns sorted indexes of winning proposals: one of the proposals of each target"""
+        targets = np.asarray(targets, dtype=np.int64)
+        if len(targets) == 0:
+            return np.zeros(0, dtype=np.int64)
+        order = np.lexsort((rng.random(len(targets)), targets))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = targets[order][1:] != targets[order][:-1]
+        return np.sort(order[first])
+
+    @staticmethod
+    def matching(rng, first, second):
+        """
+        Returns sorted indexes of winning proposals of pairs (first, second): proposals are taken
+        by priority unless one of their creatures already takes part in a taken proposal. The greedy choice
+        is made in rounds: a proposal with the lowest priority among the remaining proposals of both of its
+        creatures is taken, proposals sharing a creature with a taken one are dropped, and so on
+        """
+        if len(first) == 0:
+            return np.zeros(0, dtype=np.int64)
+        priority = np.empty(len(first), dtype=np.int64)
+        priority[np.argsort(rng.random(len(first)))] = np.arange(len(first))
+        # Creatures are numbered by unique, so lowest priorities are kept per creature in a dense array
+        creatures, ends = np.unique(np.concatenate([np.asarray(first, dtype=np.int64),
+                                                    np.asarray(second, dtype=np.int64)]), return_inverse=True)
+        ends = ends.reshape(2, len(first))
+        remaining = np.arange(len(first))
+        taken = list()
+        while len(remaining):
+            pairs, order = ends[:, remaining], priority[remaining]
+            lowest = np.full(len(creatures), len(first), dtype=np.int64)
+            np.minimum.at(lowest, pairs.ravel(), np.tile(order, 2))
+            won = (lowest[pairs[0]] == order) & (lowest[pairs[1]] == order)
+            taken.append(remaining[won])
+            engaged = np.zeros(len(creatures), dtype=bool)
+            engaged[pairs[:, won]] = True
+            remaining = remaining[~(engaged[pairs[0]] | engaged[pairs[1]])]
+        return np.sort(np.concatenate(taken))
+
+
+class Combat:
+    """
+    Vectorized resolution of fights of a period. Fights are given as arrays of attackers and defenders,
+    win probabilities are computed in one pass with random numbers drawn at once and changes of hunger,
+    mass and hp are summed per creature by scatter-add. A killed creature dies once and only the first fight
+    that killed it feeds the winner, so fights may share creatures (Conflicts.matching gives each animal one).
+    Both engines resolve fights here, so their fights have the same effects
+
+    Attributes:
+        ANIMAL_MASS(tuple): Share of the mass of a defeated animal added to mass of the attacker, by species
+
+    Methods:
+        resolve: Resolves fights and returns summed changes of the fighting creatures
+    """
+    ANIMAL_MASS = (0.5, 0, 1.0, 0)
+
+    @classmethod
+    def resolve(cls, rng, attackers, defenders, species, hunger, mass, aggressiveness, hit, defense):
+        """
+        Resolves fights of attackers and defenders given as indexes of creatures into arrays of their species,
+        hunger, mass, aggressiveness, hit and herd defense. Returns whether each attacker won, indexes of
+        the fighting creatures (sorted), their summed changes of hunger, mass and hp and whether they were killed
+        """
+        attackers, defenders = np.asarray(attackers, dtype=np.int64), np.asarray(defenders, dtype=np.int64)
+        attacker_species = species[attackers]
+        attacker_mass, defender_mass = mass[attackers], mass[defenders]
+        attacker_hunger = hunger[attackers]
+        attack, defend = (rng.random((2, len(attackers))) * 100).astype(np.int64)
+        herbivore = species[defenders] == HERBIVORE
+        # Against a herbivore an attacker is stronger when it is hungry, a herbivore is stronger in a herd.
+        # Against other animals strength is based on mass (and aggressiveness of a carnivore)
+        attacker_strength = attack + np.where(
+            herbivore, np.where(attacker_hunger > 50, 0.1, -0.1) * attacker_hunger,
+            np.where(attacker_species == CARNIVORE, 0.3 * attacker_mass + 0.2 * aggressiveness[attackers],
+                     0.5 * attacker_mass))
+        defender_strength = defend + np.where(
+            herbivore, defense[defenders], 0.5 * defender_mass)
+        won = attacker_strength >= defender_strength
+
+        prey = won & herbivore
+        beaten = won & ~herbivore
+        repelled = ~won & herbivore
+        defeated = ~won & ~herbivore
+        # The loser of a fight dies, except for an attacker repelled by a herbivore
+        killed = np.where(won, defenders, np.where(defeated, attackers, -1))
+        # A creature killed by several fights feeds only the first of them
+        first = np.zeros(len(killed), dtype=bool)
+        first[np.unique(killed, return_index=True)[1]] = True
+        feeding = (won | defeated) & ((killed < 0) | first)
+        killed = killed[(killed >= 0) & first]
+
+        # The winner eats the loser
+        eaten = np.where(won, defender_mass, attacker_mass) * feeding
+        attacker_changes = np.stack([
+            -0.3 * eaten * won,
+            np.select([prey, beaten], [0.5 * eaten, np.array(cls.ANIMAL_MASS)[attacker_species] * eaten]),
+            np.where(won, 0.3 * eaten, 0) - np.where(repelled, hit[defenders], 0),
+        ])
+        defender_changes = np.stack([-0.3 * eaten, 0.5 * eaten, 0.3 * eaten]) * defeated
+
+        creatures, inverse = np.unique(np.concatenate([attackers, defenders]), return_inverse=True)
+        changes = np.concatenate([attacker_changes, defender_changes], axis=1)
+        hunger_change, mass_change, hp_change = (np.bincount(inverse, weights=change, minlength=len(creatures))
+                                                 for change in changes)
+        dead = np.zeros(len(creatures), dtype=bool)
+        dead[np.searchsorted(creatures, killed)] = True
+        return won, creatures, hunger_change, mass_change, hp_change, dead
+
+
+class CellIndex:
+    """
+    Index of cells occupied by two or more creatures, built once per period by sorting occupied cells.
+    Occupants of each contested cell are stored together and sorted by species and id,
+    so interaction candidates are enumerated without scanning cells of every creature, in an order
+    that does not depend on the order of creatures (occupants of a cell are ordered by owners unless ids are given)
+
+    Attributes:
+        owner(np.ndarray): Occupants of contested cells grouped by cell
+        species(np.ndarray): Species of the occupants
+        cell(np.ndarray): Number of the contested cell of each occupant
+        cell_x, cell_y(np.ndarray): Coordinates of contested cells
+
+    Methods:
+        pairs: Returns pairs of different creatures of particular species sharing a cell
+    """
+    def __init__(self, owner, x, y, species, ids=None):
+        order = np.lexsort((owner if ids is None else ids, species, y, x))
+        owner, x, y, species = owner[order], x[order], y[order], species[order]
+        # Splits sorted cells into runs of the same coordinates
+        new_cell = np.ones(len(order), dtype=bool)
+        new_cell[1:] = (x[1:] != x[:-1]) | (y[1:] != y[:-1])
+        starts = np.flatnonzero(new_cell)
+        counts = np.diff(np.append(starts, len(order)))
+        contested = counts >= 2
+        keep = np.repeat(contested, counts)
+
+        self.owner = owner[keep]
+        self.species = species[keep]
+        self.cell = np.repeat(np.arange(contested.sum()), counts[contested])
+        self.cell_x = x[starts[contested]]
+        self.cell_y = y[starts[contested]]
+
+    def pairs(self, first_species, second_species):
+        """
+        Returns first and second creatures of every pair of different creatures sharing a cell
+        with coordinates of the cell. Each pair is returned once even if creatures share several cells
+        """
+        first = np.flatnonzero(np.isin(self.species, first_species))
+        second = np.flatnonzero(np.isin(self.species, second_species))
+        # Occupants are sorted by cell, so second candidates of a cell are a contiguous run
+        second_count = np.bincount(self.cell[second], minlength=len(self.cell_x))
+        second_start = np.cumsum(second_count) - second_count
+        repeats = second_count[self.cell[first]]
+        start = np.repeat(second_start[self.cell[first]], repeats)
+        shift = np.arange(repeats.sum()) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        first = np.repeat(first, repeats)
+        second = second[start + shift]
+
+        first_owner, second_owner = self.owner[first], self.owner[second]
+        different = first_owner != second_owner
+        first, first_owner, second_owner = first[different], first_owner[different], second_owner[different]
+        # Drops repeated pairs of creatures that share more than one cell
+        key = first_owner.astype(np.int64) * (int(self.owner.max(initial=0)) + 1) + second_owner
+        unique = np.sort(np.unique(key, return_index=True)[1])
+        cell = self.cell[first[unique]]
+        return first_owner[unique], second_owner[unique], self.cell_x[cell], self.cell_y[cell]
+
+
+class Herds:
+    """
+    Herds of herbivores found by a uniform-grid density pass instead of a search of neighbours. Herbivores
+    are counted by blocks of CELL x CELL cells, the herd of a herbivore are herbivores of its block and
+    of the 8 neighbouring blocks. If blocks of herbivores fit into DENSE_BLOCKS, counts are a dense grid
+    summed over 3x3 neighbourhoods by shifted slices in O(n + blocks), otherwise blocks are sorted keys
+    looked up by searchsorted
+
+    Attributes:
+        CELL(int): Side of a block of the grid in cells
+        DENSE_BLOCKS(int): Maximal amount of blocks of the dense grid
+        DEFENSE(float): Bonus to the win probability of a defending herbivore for each other member of its herd
+        MAX_DEFENSE(float): Maximal defense bonus
+        origin(tuple): Block coordinates of the first row and column of the dense grid, None for sorted keys
+        grid(np.ndarray): Amount of herbivores and sums of their anchor coordinates of the 3x3 neighbourhood
+            of each block of the dense grid
+        keys(np.ndarray): Sorted packed coordinates of blocks with herbivores (without the dense grid)
+        blocks(np.ndarray): Amount of herbivores and sums of their anchor coordinates of each block of keys
+
+    Methods:
+        members: Returns herd size and a step toward the herd center for anchors
+        defense: Returns defense bonus of herbivores by herd size
+    """
+    CELL = 4
+    DENSE_BLOCKS = 1 << 24
+    DEFENSE = 5
+    MAX_DEFENSE = 30
+
+    def __init__(self, x, y):
+        x, y = np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64)
+        block_x, block_y = x // self.CELL, y // self.CELL
+        self.origin = self.grid = None
+        if len(x) == 0:
+            self.keys, self.blocks = np.zeros(0, dtype=np.int64), np.zeros((3, 0), dtype=np.int64)
+            return
+        # The dense grid has a margin of one block, so every neighbourhood is inside of it
+        width = int(block_x.max() - block_x.min()) + 3
+        height = int(block_y.max() - block_y.min()) + 3
+        if width * height <= self.DENSE_BLOCKS:
+            self.origin = (int(block_x.min()) - 1, int(block_y.min()) - 1)
+            flat = (block_x - self.origin[0]) * height + (block_y - self.origin[1])
+            counts = np.stack([np.bincount(flat, weights=weights, minlength=width * height)
+                               for weights in (None, x, y)]).reshape(3, width, height)
+            padded = np.pad(counts, ((0, 0), (1, 1), (1, 1)))
+            grid = np.zeros_like(counts)
+            for offset_x in range(3):
+                for offset_y in range(3):
+                    grid += padded[:, offset_x:offset_x + width, offset_y:offset_y + height]
+            self.grid = grid.astype(np.int64)
+            return
+        keys = Placement.pack(block_x, block_y)
+        order = np.argsort(keys, kind='stable')
+        keys = keys[order]
+        # Splits sorted keys into runs of the same block
+        new_block = np.ones(len(keys), dtype=bool)
+        new_block[1:] = keys[1:] != keys[:-1]
+        starts = np.flatnonzero(new_block)
+        self.keys = keys[starts]
+        self.blocks = np.stack([np.diff(np.append(starts, len(keys))), np.add.reduceat(x[order], starts),
+                                np.add.reduceat(y[order], starts)])
+
+    def members(self, x, y):
+        """
+        Returns herd size around anchors (including a herbivore at the anchor) and a step (-1, 0 or 1 along
+        each axis) from the anchor toward the mean anchor of the herd
+        """
+        x, y = np.asarray(x, dtype=np.int64), np.asarray(y, dtype=np.int64)
+        block_x, block_y = x // self.CELL, y // self.CELL
+        if self.grid is not None:
+            row, column = block_x - self.origin[0], block_y - self.origin[1]
+            inside = (row >= 0) & (row < self.grid.shape[1]) & (column >= 0) & (column < self.grid.shape[2])
+            herd = np.zeros((3, len(x)), dtype=np.int64)
+            herd[:, inside] = self.grid[:, row[inside], column[inside]]
+        else:
+            herd = np.zeros((3, len(x)), dtype=np.int64)
+            for offset_x in (-1, 0, 1):
+                for offset_y in (-1, 0, 1):
+                    if len(self.keys) == 0:
+                        continue
+                    keys = Placement.pack(block_x + offset_x, block_y + offset_y)
+                    index = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+                    found = self.keys[index] == keys
+                    herd[:, found] += self.blocks[:, index[found]]
+        size, sum_x, sum_y = herd
+        # Sign of (mean - anchor) computed without division
+        return size, np.sign(sum_x - x * size), np.sign(sum_y - y * size)
+
+    @classmethod
+    def defense(cls, size):
+        """Returns defense bonus of herbivores by herd size"""
+        return np.clip((np.asarray(size) - 1) * cls.DEFENSE, 0, cls.MAX_DEFENSE)
+
+
+class ArrayEngine:
+    """
+    Structure-of-arrays alternative to Creature instances. Each attribute of all creatures is stored
+    in one NumPy column, so a period is emulated by whole-array operations instead of move() calls
+
+    Attributes:
+        COLUMNS(dict): Column name and its dtype
+        FOOTPRINT_OFFSETS(np.ndarray): Offsets of the cells occupied by a creature of size 1 to 3 from its anchor
+        count(int): Amount of creatures
+        id(np.ndarray): Id of a creature, unique for the whole emulation
+        next_id(int): Id of the next created creature
+        id_step(int): Difference between consecutive ids, engines of TiledEngine use disjoint ids
+        species(np.ndarray): Species code (CARNIVORE, HERBIVORE, OMNIVORE or PLANT)
+        age, mass, size, hunger, hp, speed, sex, hit, aggressiveness, toxicity(np.ndarray): The same as
+            attributes of Creature, Animal, Carnivore and Plant classes. Unused columns are zero
+        x, y(np.ndarray): Anchor cell of a creature, other cells are taken from FOOTPRINT_OFFSETS
+        alive(np.ndarray): False for creatures that died during the current period
+        rng(RandomStream): Random numbers of the emulation
+        events(EventLog): Event log of the emulation
+        territory(int): Side of the square territory where creatures are generated
+        herd(np.ndarray): Herd size of each creature found at the start of the period (1 for non-herbivores)
+        herd_step_x, herd_step_y(np.ndarray): Step toward the herd center of each creature for the period
+
+    Methods:
+        generate: Generates random creatures within the territory without overlaps
+        add_creatures: Appends new creatures of particular species
+        period: Emulates one time unit for all creatures
+        move_phase: Emulates aging, relocation and plant grow
+        interaction_phase: Emulates eating, attacks and reproduction and removes dead creatures
+        extract: Removes creatures by mask and returns their columns
+        append_columns: Appends creatures given by columns
+        find_herds: Finds herds of herbivores for the period
+        animal_period: Emulates aging and hp, hunger and mass loss for all animals
+        plant_period: Emulates aging and mass grow or reproduction for all plants
+        relocate: Relocates animals with probability of 1/2
+        footprint_cells: Returns every occupied cell with its owner
+        active_chunks: Returns keys of chunks with an animal
+        cell_index: Builds CellIndex of contested cells of active chunks for the period
+        eat: Emulates eating plants by herbivores and omnivores (one animal eats a contested plant)
+        attack: Emulates attacks of carnivores and omnivores (each animal in one fight at most)
+        fight: Emulates fights between pairs of animals at once
+        reproduce: Emulates reproduction of animals
+        feed: Updates hunger, mass and hp of animals because of eaten food
+        update_body: Updates size and speed and kills animals with exhausted hp or mass
+        remove_dead: Removes creatures that died during the period
+    """
+    COLUMNS = {
+        'id': np.int64,
+        'species': np.int8,
+        'age': np.int32,
+        'mass': np.float64,
+        'size': np.int8,
+        'hunger': np.float64,
+        'hp': np.float64,
+        'speed': np.int8,
+        'sex': np.bool_,
+        'hit': np.int32,
+        'aggressiveness': np.int32,
+        'toxicity': np.bool_,
+        'herd': np.int32,
+        'x': np.int64,
+        'y': np.int64,
+        'alive': np.bool_,
+    }
+    FOOTPRINT_OFFSETS = np.array(FOOTPRINT_OFFSETS, dtype=np.int64)
+
+    def __init__(self, seed=None, events=None, territory=100):
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(0, dtype=dtype))
+        self.next_id = 0
+        self.id_step = 1
+        self.rng = RandomStream(seed)
+        self.events = EventLog() if events is None else events
+        self.territory = territory
+        self.herd_step_x = self.herd_step_y = np.zeros(0, dtype=np.int64)
+
+    @property
+    def count(self):
+        return len(self.species)
+
+    def generate(self, number_of_creatures=10000, verbose=True):
+        """Generates random creatures within the territory (half of them are plants)"""
+        animal = self.rng.randint(0, 2, size=number_of_creatures).astype(bool)
+        species = np.where(animal, self.rng.randint(0, 3, size=number_of_creatures), PLANT)
+        ages = self.rng.randint(0, 100, size=number_of_creatures)
+        # Anchors are placed by Placement.scatter when sizes are known
+        self.add_creatures(species, ages, None, None)
+        if verbose:
+            print('---' * 10)
+            print('World generated')
+            print('---' * 10)
+
+    def add_creatures(self, species, ages, x, y, born=False):
+        """
+        Appends new creatures with given species, ages and anchors. Other attributes are generated.
+        Without anchors creatures are scattered within the territory without overlaps.
+        Creatures produced by reproduction are logged as born
+        """
+        number = len(species)
+        mass = self.rng.randint(0, 300, size=number).astype(np.float64)
+        if x is None:
+            x, y = Placement.scatter(self.rng, (mass / 100).astype(np.int64) + 1, self.territory)
+        animal = species != PLANT
+        ids = self.next_id + np.arange(number) * self.id_step
+        self.next_id += number * self.id_step
+        if born:
+            self.events.emit_many(BORN, ids, species)
+        new = {
+            'id': ids,
+            'species': species,
+            'age': ages,
+            'mass': mass,
+            'size': (mass / 100).astype(np.int64) + 1,
+            'hunger': np.zeros(number),
+            'hp': np.where(animal, 100.0, 0.0),
+            'speed': np.where(animal, 5, 0),
+            'sex': self.rng.randint(0, 2, size=number).astype(bool) & animal,
+            'hit': np.where(animal, self.rng.randint(15, 45, size=number), 0),
+            'aggressiveness': np.zeros(number),
+            'toxicity': self.rng.randint(0, 2, size=number).astype(bool) & ~animal,
+            'herd': np.ones(number),
+            'x': x,
+            'y': y,
+            'alive': np.ones(number, dtype=bool),
+        }
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.concatenate([getattr(self, name), np.asarray(new[name], dtype=dtype)]))
+
+    def period(self):
+        """Emulates one time unit for all creatures"""
+        self.move_phase()
+        self.interaction_phase()
+
+    def move_phase(self, ghosts=None):
+        """
+        Emulates the part of the period that does not depend on other creatures: aging, relocation, plant grow.
+        Ghosts are anchors (x, y) of herbivores of other tiles that may belong to herds of this engine
+        """
+        animals = np.flatnonzero(self.species != PLANT)
+        plants = np.flatnonzero(self.species == PLANT)
+        self.find_herds(ghosts)
+        self.animal_period(animals)
+        self.relocate(animals[self.alive[animals]])
+        # Each move aggressiveness of carnivores updates
+        carnivores = np.flatnonzero(self.species == CARNIVORE)
+        self.aggressiveness[carnivores] = self.rng.randint(0, 100, size=len(carnivores))
+        self.plant_period(plants)
+
+    def interaction_phase(self):
+        """Emulates eating, attacks and reproduction of creatures sharing cells and removes dead creatures"""
+        index = self.cell_index()
+        self.eat(index)
+        self.attack(index)
+        self.reproduce(index)
+        self.remove_dead()
+
+    def extract(self, mask):
+        """Removes creatures by mask from the engine and returns their columns"""
+        columns = {name: getattr(self, name)[mask] for name in self.COLUMNS}
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(self, name)[~mask])
+        return columns
+
+    def append_columns(self, columns):
+        """Appends creatures given by columns (e.g. returned by extract of another engine)"""
+        for name in self.COLUMNS:
+            setattr(self, name, np.concatenate([getattr(self, name), columns[name]]))
 
+    def find_herds(self, ghosts=None):
+        """
+        Finds herds of herbivores (Emulation.find_herds) for the period. Ghosts are anchors (x, y) of herbivores
+        of other tiles counted as members of herds, but not given herds themselves
+        """
+        herbivores = np.flatnonzero(self.species == HERBIVORE)
+        x, y = self.x[herbivores], self.y[herbivores]
+        herds = Herds(x, y) if ghosts is None else Herds(np.concatenate([x, ghosts[0]]), np.concatenate([y, ghosts[1]]))
+        size, step_x, step_y = herds.members(x, y)
+        self.herd[:] = 1
+        self.herd_step_x, self.herd_step_y = np.zeros((2, self.count), dtype=np.int64)
+        self.herd[herbivores] = size
+        self.herd_step_x[herbivores], self.herd_step_y[herbivores] = step_x, step_y
 
-class Omnivore(Animal):
+    def animal_period(self, index):
+        """Emulates aging and hp, hunger and mass loss (Animal.period) for animals by index"""
+        age = self.age[index] + 1
+        # update_hunger(period=True)
+        hunger = 15 + 0.2 * self.mass[index]
+        # update_hp(period=True)
+        hp = np.minimum(self.hp[index] - hunger, 100)
+        # update_mass(period=True)
+        mass = 0.8 * self.mass[index]
+        dead = (age >= Creature.LIFESPAN) | (hunger >= 100) | (hp <= 0) | (mass <= 0)
+
+        self.age[index] = age
+        self.hunger[index] = hunger
+        self.hp[index] = hp
+        self.mass[index] = mass
+        self.update_body(index)
+        self.alive[index[dead]] = False
+
+    def plant_period(self, index):
+        """Emulates aging and mass grow or reproduction with probability of 1/10 (as Plant) for plants by index"""
+        self.age[index] += 1
+        self.alive[index[self.age[index] >= Creature.LIFESPAN]] = False
+        reproduce = self.rng.randint(0, 10, size=len(index)) == 0
+        growing = index[~reproduce]
+        self.mass[growing] = np.minimum(self.mass[growing] + 50, 300)
+
+        # A shoot appears on one of the cells occupied by the parent plant
+        parents = index[reproduce & self.alive[index]]
+        cell = (self.rng.random(len(parents)) * self.size[parents]).astype(np.int64)
+        offsets = self.FOOTPRINT_OFFSETS[cell]
+        self.add_creatures(
+            np.full(len(parents), PLANT),
+            np.zeros(len(parents)),
+            self.x[parents] + offsets[:, 0],
+            self.y[parents] + offsets[:, 1],
+            born=True,
+        )
+
+    def relocate(self, index):
+        """
+        Relocates animals by index with probability of 1/2 for a random distance in [-speed, speed)
+        and a step toward the herd center
+        """
+        moving = index[(self.rng.randint(0, 2, size=len(index)) == 1) & (self.speed[index] > 0)]
+        speed = self.speed[moving].astype(np.int64)
+        x = self.x[moving] + (self.rng.random(len(moving)) * 2 * speed).astype(np.int64) - speed
+        y = self.y[moving] + (self.rng.random(len(moving)) * 2 * speed).astype(np.int64) - speed
+        x += self.herd_step_x[moving]
+        y += self.herd_step_y[moving]
+        # Animals stay if their footprints would leave the coordinate range of the field
+        valid = Placement.in_bounds(x, y)
+        moving, x, y = moving[valid], x[valid], y[valid]
+        self.x[moving], self.y[moving] = x, y
+        self.events.emit_many(RELOCATED, self.id[moving], self.species[moving])
+
+    def footprint_cells(self, index=None):
+        """Returns owner, x and y of every cell occupied by creatures by index (by all creatures by default)"""
+        if index is None:
+            index = np.arange(self.count)
+        owner, x, y = Placement.footprint_cells(self.x[index], self.y[index], self.size[index])
+        return index[owner], x, y
+
+    def active_chunks(self, owner=None, x=None, y=None):
+        """
+        Returns sorted keys (packed chunk coordinates) of active chunks: chunks of Field.CHUNK_SIZE cells
+        with a cell of an alive animal. Cells of alive creatures may be given as owner, x and y
+        """
+        if owner is None:
+            owner, x, y = self.footprint_cells(np.flatnonzero(self.alive))
+        animal = self.species[owner] != PLANT
+        chunks = Placement.pack(x[animal] // Field.CHUNK_SIZE, y[animal] // Field.CHUNK_SIZE)
+        return np.unique(chunks)
+
+    def cell_index(self):
+        """
+        Builds CellIndex of cells shared by alive creatures. Only an animal interacts with others, so cells
+        of sleeping chunks (only plants) are left out and do not cost sorting
+        """
+        owner, x, y = self.footprint_cells(np.flatnonzero(self.alive))
+        active = self.active_chunks(owner, x, y)
+        keep = Placement.contains(active, Placement.pack(x // Field.CHUNK_SIZE, y // Field.CHUNK_SIZE))
+        owner, x, y = owner[keep], x[keep], y[keep]
+        return CellIndex(owner, x, y, self.species[owner], self.id[owner])
+
+    def eat(self, index):
+        """
+        Emulates eating plants (Herbivore.eat and Omnivore.eat) for animals sharing a cell with a plant.
+        Meals are applied at once, an animal eats its plants in the order of the index until one poisons it
+        """
+        animals, plants, _, _ = index.pairs([HERBIVORE, OMNIVORE], [PLANT])
+        # Each plant is eaten by one of the animals sharing its cells
+        taken = Conflicts.claims(self.rng, plants)
+        animals, plants = animals[taken], plants[taken]
+        alive = self.alive[animals] & self.alive[plants]
+        animals, plants = animals[alive], plants[alive]
+        omnivore = self.species[animals] == OMNIVORE
+        # Poisonous plant kills a herbivore with probability of 1/2 and an omnivore always
+        toxic = self.toxicity[plants]
+        poisoned = toxic & omnivore
+        drawn = toxic & ~omnivore
+        poisoned[drawn] = self.rng.randint(0, 2, size=int(drawn.sum())) == 1
+        # A poisoned animal does not eat its other plants: meals after the first poisonous one are skipped
+        order = np.argsort(animals, kind='stable')
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = animals[order][1:] != animals[order][:-1]
+        starts = np.flatnonzero(first)
+        # Amount of poisonous meals of the same animal before each meal
+        earlier = np.cumsum(poisoned[order]) - poisoned[order]
+        earlier -= np.repeat(earlier[starts], np.diff(np.append(starts, len(order))))
+        reached = np.empty(len(order), dtype=bool)
+        reached[order] = earlier == 0
+        self.alive[animals[reached & poisoned]] = False
+        eating = reached & ~toxic
+        animals, plants, omnivore = animals[eating], plants[eating], omnivore[eating]
+        self.events.emit_many(ATE, self.id[animals], self.species[animals], self.id[plants], PLANT)
+        self.feed(animals, self.mass[plants], hp_rate=np.where(omnivore, 0.3, 0))
+        self.alive[plants] = False
+
+    def attack(self, index):
+        """Emulates attacks (Carnivore.attack and Omnivore.attack) for animals sharing a cell"""
+        attackers, defenders, _, _ = index.pairs([CARNIVORE, OMNIVORE], [CARNIVORE, HERBIVORE, OMNIVORE])
+        # Carnivore attacks another carnivore only if it is aggressive
+        carnivores = (self.species[attackers] == CARNIVORE) & (self.species[defenders] == CARNIVORE)
+        attacking = ((self.hunger[attackers] > 30) & ~(carnivores & (self.aggressiveness[attackers] <= 30))
+                     & self.alive[attackers] & self.alive[defenders])
+        attackers, defenders = attackers[attacking], defenders[attacking]
+        # Each animal takes part in at most one fight
+        taken = Conflicts.matching(self.rng, attackers, defenders)
+        self.fight(attackers[taken], defenders[taken])
+
+    def fight(self, attackers, defenders):
+        """
+        Emulates fights between attackers and defenders by index at once (Combat). Returns whether
+        each attacker won
+        """
+        won, changed, hunger, mass, hp, killed = Combat.resolve(
+            self.rng, attackers, defenders, self.species, self.hunger, self.mass, self.aggressiveness, self.hit,
+            Herds.defense(self.herd))
+        self.hunger[changed] = np.maximum(self.hunger[changed] + hunger, 0)
+        self.mass[changed] += mass
+        self.hp[changed] = np.minimum(self.hp[changed] + hp, 100)
+        self.update_body(changed)
+        self.alive[changed[killed]] = False
+        for event_type, outcome in ((FIGHT_WON, won), (FIGHT_LOST, ~won)):
+            self.events.emit_many(event_type, self.id[attackers[outcome]], self.species[attackers[outcome]],
+                                  self.id[defenders[outcome]], self.species[defenders[outcome]])
+        return won
+
+    def reproduce(self, index):
+        """
+        Emulates reproduction (Animal.partners and create_child). Each adult animal mates with one adult
+        of the same species and different sex sharing a cell at most, a pair creates one child in that cell
+        """
+        first, second, x, y = index.pairs([CARNIVORE, HERBIVORE, OMNIVORE], [CARNIVORE, HERBIVORE, OMNIVORE])
+        suitable = ((self.species[first] == self.species[second]) & (self.sex[first] != self.sex[second])
+                    & (self.age[first] >= Animal.MATURITY) & (self.age[second] >= Animal.MATURITY)
+                    & self.alive[first] & self.alive[second])
+        first, second, x, y = first[suitable], second[suitable], x[suitable], y[suitable]
+        taken = Conflicts.matching(self.rng, first, second)
+        self.add_creatures(self.species[first[taken]], np.zeros(len(taken)), x[taken], y[taken], born=True)
+
+    def feed(self, animals, food_mass, mass_rate=0.5, hp_rate=0.3):
+        """
+        Decreases hunger and increases mass and hp of animals by index because of eaten food. An animal may
+        be repeated, its meals are summed by scatter-add
+        """
+        np.add.at(self.hunger, animals, -0.3 * food_mass)
+        np.add.at(self.mass, animals, mass_rate * food_mass)
+        np.add.at(self.hp, animals, hp_rate * food_mass)
+        fed = np.unique(animals)
+        self.hunger[fed] = np.maximum(self.hunger[fed], 0)
+        self.hp[fed] = np.minimum(self.hp[fed], 100)
+        self.update_body(fed)
+
+    def update_body(self, index):
+        """Updates size and speed of animals by index and kills animals with exhausted hp or mass"""
+        self.size[index] = np.clip((self.mass[index] / 100).astype(np.int64) + 1, 1, 3)
+        self.speed[index] = np.clip(self.hp[index] / 20, 0, 5).astype(np.int8)
+        self.alive[index[(self.hp[index] <= 0) | (self.mass[index] <= 0)]] = False
+
+    def remove_dead(self):
+        """Removes creatures that died during the period from every column"""
+        if self.alive.all():
+            return
+        alive = self.alive
+        self.events.emit_many(DIED, self.id[~alive], self.species[~alive])
+        for name in self.COLUMNS:
+            setattr(self, name, getattr(self, name)[alive])
+
+
+class TiledEngine:
     """
-    Omnivore creature. Eats both animals and plants, attack only because of hunger
+    Splits one world into vertical tiles (ranges of x) emulated by ArrayEngine instances in worker processes.
+    Footprints of creatures spread only along y (FOOTPRINT_OFFSETS), so every cell and all of its occupants
+    belong to one tile and fights, eating and mating at tile borders need no ghost cells. Herds reach over
+    borders, so before the move phase every tile gets anchors of herbivores of other tiles within a halo
+    of two blocks of Herds as ghosts. Creatures that relocate over a border migrate to the tile that owns
+    their new anchor after the move phase. Workers log events enabled in the event log of the parent
+    to BufferSink and send them back with replies. Species counts come with the replies, statistics and
+    checksums are computed by the tiles, so a period sends only halos, migrants and summaries through the pipes.
+    Only gather (for renderers, streams and histories) copies all creatures to the parent
+
+    Attributes:
+        tiles(int): Amount of tiles and worker processes
+        cuts(np.ndarray): x where each tile except the first one begins
+        rebalance_period(int): Tiles are re-cut to equal populations every rebalance_period periods
+        connections(list): Pipes to the worker processes
+        workers(list): Worker processes
+        counts(list): Amount of creatures of each species (np.ndarray) of each tile
+        periods(int): Amount of emulated periods
+        territory(int): Side of the square territory where creatures are generated
+        events(EventLog): Event log that receives events of all tiles
 
     Methods:
-        attack: Emulates attack on another creature
-        fight: Emulates fight between 2 creatures
-        Emulates eating plant
-        reproduce: Emulates reproduction process
-        create_child: Emulates child creation
-        move: Makes a move of an Omnivore instance
+        generate: Generates random creatures and distributes them by tiles
+        period: Emulates one time unit in all tiles
+        rebalance: Moves tile borders so that tiles have equal populations
+        species_counts: Returns amount of creatures of each species
+        summarize: Computes statistics of all tiles
+        checksums: Returns random states and checksums of columns of the tiles
+        gather: Returns ArrayEngine with creatures of all tiles
+        state: Returns columns, random state and the next id of each tile
+        restore: Replaces creatures, random states and next ids of all tiles
+        close: Stops the worker processes
+        worker: Loop of a worker process
     """
-    def __init__(self, field, creatures, age):
-        super(Omnivore, self).__init__(field, creatures, age)
+    def __init__(self, tiles=4, seed=None, rebalance_period=50, territory=100, events=None):
+        self.tiles = tiles
+        self.seed = seed
+        self.territory = territory
+        self.events = EventLog(NullSink()) if events is None else events
+        self.rebalance_period = rebalance_period
+        self.cuts = np.zeros(tiles - 1, dtype=np.int64)
+        self.counts = [np.zeros(len(SPECIES_NAMES), dtype=np.int64)] * tiles
+        self.periods = 0
+        self.connections = list()
+        self.workers = list()
+        # Each tile has its own random numbers and ids, so tiles do not depend on each other
+        seeds = np.random.SeedSequence(seed).spawn(tiles)
+        types = [event for event, enabled in enumerate(self.events.enabled) if enabled]
+        context = multiprocessing.get_context()
+        for tile in range(tiles):
+            parent_connection, worker_connection = context.Pipe()
+            worker = context.Process(target=TiledEngine.worker,
+                                     args=(worker_connection, seeds[tile], tile, tiles, types), daemon=True)
+            worker.start()
+            self.connections.append(parent_connection)
+            self.workers.append(worker)
 
-    def __repr__(self):
-        return 'Omnivore'
+    @property
+    def count(self):
+        return int(sum(counts.sum() for counts in self.counts))
+
+    def generate(self, number_of_creatures=10000):
+        """Generates random creatures within the territory and distributes them by tiles"""
+        world = ArrayEngine(seed=self.seed, events=EventLog(NullSink()), territory=self.territory)
+        world.generate(number_of_creatures, verbose=False)
+        # Ids of generated creatures are below tiles, so ids of tiles start after them
+        for connection in self.connections:
+            connection.send(('next_id', world.next_id))
+        self.cuts = self.balanced_cuts(world.x)
+        columns = {name: getattr(world, name) for name in ArrayEngine.COLUMNS}
+        self.distribute(columns)
+        for tile, connection in enumerate(self.connections):
+            connection.send(('count', None))
+        self.counts = [connection.recv() for connection in self.connections]
+
+    def balanced_cuts(self, x):
+        """Returns tile borders that split creatures with given anchors into equal parts"""
+        if len(x) == 0:
+            return self.cuts
+        quantiles = np.arange(1, self.tiles) / self.tiles
+        return np.quantile(x, quantiles, method='lower').astype(np.int64)
+
+    def distribute(self, columns):
+        """Sends creatures given by columns to the tiles owning their anchors"""
+        owner = np.searchsorted(self.cuts, columns['x'], side='right')
+        for tile, connection in enumerate(self.connections):
+            mask = owner == tile
+            connection.send(('append', {name: column[mask] for name, column in columns.items()}))
+
+    def collect(self, command, payload=None):
+        """Sends a command to all workers and returns columns of creatures they send back"""
+        for connection in self.connections:
+            connection.send((command, payload))
+        return self.concatenate([connection.recv() for connection in self.connections])
+
+    @staticmethod
+    def concatenate(parts):
+        """Returns columns of creatures of all parts"""
+        return {name: np.concatenate([part[name] for part in parts]) for name in ArrayEngine.COLUMNS}
+
+    def period(self):
+        """
+        Emulates one time unit: move phase, migration over tile borders and interaction phase.
+        Events of the tiles are added to the event log in the order of the phases and tiles
+        """
+        self.periods += 1
+        tick = self.events.tick
+        # Herbivores near borders of each tile are ghosts of herds of the other tiles
+        for connection in self.connections:
+            connection.send(('halo', self.cuts))
+        halos = [connection.recv() for connection in self.connections]
+        for tile, connection in enumerate(self.connections):
+            others = [halo for other, halo in enumerate(halos) if other != tile]
+            ghosts = np.concatenate(others, axis=1) if others else np.zeros((2, 0), dtype=np.int64)
+            connection.send(('move', (tick, self.cuts, ghosts)))
+        replies = [connection.recv() for connection in self.connections]
+        for _, records in replies:
+            self.events.extend(records)
+        self.distribute(self.concatenate([migrants for migrants, _ in replies]))
+        for connection in self.connections:
+            connection.send(('interact', tick))
+        replies = [connection.recv() for connection in self.connections]
+        for _, records in replies:
+            self.events.extend(records)
+        self.counts = [count for count, _ in replies]
+        if self.periods % self.rebalance_period == 0:
+            self.rebalance()
+
+    def rebalance(self):
+        """Moves tile borders so that tiles have equal populations and migrates creatures accordingly"""
+        for connection in self.connections:
+            connection.send(('x', None))
+        x = np.concatenate([connection.recv() for connection in self.connections])
+        self.cuts = self.balanced_cuts(x)
+        self.distribute(self.collect('outside', self.cuts))
+        for connection in self.connections:
+            connection.send(('count', None))
+        self.counts = [connection.recv() for connection in self.connections]
+
+    def species_counts(self):
+        """Returns amount of creatures of each species, known from the last replies of the tiles"""
+        return np.sum(self.counts, axis=0)
+
+    def summarize(self, statistics):
+        """
+        Computes statistics of all tiles (as Statistics.summarize of all creatures): each tile summarizes its
+        creatures and the sums are added. Every cell belongs to the tile of its x, so occupied cells add up too
+        """
+        for connection in self.connections:
+            connection.send(('summarize', None))
+        parts = [connection.recv() for connection in self.connections]
+        statistics.counts = np.sum([part.counts for part in parts], axis=0).tolist()
+        for name in statistics.BINS:
+            statistics.sums[name] = np.sum([part.sums[name] for part in parts], axis=0).tolist()
+            statistics.histograms[name] = np.sum([part.histograms[name] for part in parts], axis=0).tolist()
+        statistics.occupied_cells = sum(part.occupied_cells for part in parts)
+
+    def checksums(self):
+        """
+        Returns states of random numbers of the tiles (the generator state and the index in the buffer)
+        and CRC32 of columns of each tile
+        """
+        for connection in self.connections:
+            connection.send(('checksum', None))
+        replies = [connection.recv() for connection in self.connections]
+        return [random_state for random_state, _ in replies], [checksum for _, checksum in replies]
+
+    def gather(self):
+        """Returns ArrayEngine with copies of creatures of all tiles"""
+        world = ArrayEngine(events=EventLog(NullSink()))
+        world.append_columns(self.collect('columns'))
+        return world
+
+    def state(self):
+        """
+        Returns state of each tile: columns of its creatures, state of its random numbers (as returned by
+        RandomStream.get_state) and its next id
+        """
+        for connection in self.connections:
+            connection.send(('state', None))
+        return [connection.recv() for connection in self.connections]
+
+    def restore(self, states, cuts, periods):
+        """Replaces creatures, random states and next ids of all tiles by states returned by state"""
+        for connection, state in zip(self.connections, states):
+            connection.send(('restore', state))
+        self.cuts = np.asarray(cuts, dtype=np.int64)
+        self.periods = periods
+        self.counts = [np.bincount(np.asarray(state['columns']['species'], dtype=np.int64),
+                                   minlength=len(SPECIES_NAMES)) for state in states]
+
+    def close(self):
+        """Stops the worker processes"""
+        for connection, worker in zip(self.connections, self.workers):
+            connection.send(('stop', None))
+            worker.join()
+        self.connections, self.workers = list(), list()
 
-    def attack(self):
-        """
-        Attacks another creature if another creature in the same cell and the Omnivore instance is hungry
-        """
-        # Checks each coordinate that the carnivore occupies for other creatures to attack
-        for coordinates in self.position.coordinates_list:
-            # If there is creatures in
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                # Creates list of creatures that are in cells that the carnivore occupies
-                creatures_list = self.field.field_list[coordinates[0]][coordinates[1]]
-                # Attacks each creature in the list if the carnivore is hungry/aggressive
-                for creature in creatures_list:
-                    # Conditions for attack on an animal instance
-                    if (type(creature) is not Plant) and (self.hunger > 30):
-                        self.fight(creature)
-            # If there is no creatures
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is type(self):
-                pass
-
-    def eat(self):
-        """Emulates eating plant"""
-        for coordinates in self.position.coordinates_list:
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                # Creates list of creatures that are in cells that the herbivore occupies
-                creatures_list = self.field.field_list[coordinates[0]][coordinates[1]]
-                for creature in creatures_list:
-                    if type(creature) is Plant:
-                        if creature.toxicity:
-                            self.die()
-                        else:
-                            print(f'{self} ate {creature}')
-                            self.update_hunger(-0.3 * creature.mass)
-                            self.update_mass(0.5 * creature.mass)
-                            self.update_hp(0.3 * creature.mass)
-                            creature.die()
-
-    def fight(self, animal_instance):
-        """Emulates fight between the carnivore and an animal instance"""
-        print(f'Fight between {self} and {animal_instance} started!')
-        if type(animal_instance) is Herbivore:
-            # Sets win probability for the carnivore (based on hunger) and for the herbivore instances
-            if self.hunger > 50:
-                carnivore_win_probability = np.random.randint(0, 100) + self.hunger*0.1
+    @staticmethod
+    def worker(connection, seed, tile, tiles, types):
+        """
+        Loop of a worker process: keeps ArrayEngine of one tile and executes commands of TiledEngine.
+        Events of types enabled in the parent are sent back with replies to the phases
+        """
+        engine = ArrayEngine(seed=seed, events=EventLog(BufferSink(), types=types))
+        engine.id_step = tiles
+
+        def records():
+            engine.events.flush()
+            return engine.events.sink.take()
+
+        def species_counts():
+            return np.bincount(engine.species, minlength=len(SPECIES_NAMES))
+
+        def outside(cuts, margin=0):
+            # Creatures whose anchors are not in the range of this tile shrunk by margin from each side
+            bounds = np.concatenate([[np.iinfo(np.int64).min], cuts, [np.iinfo(np.int64).max]])
+            return (engine.x < bounds[tile] + margin) | (engine.x >= bounds[tile + 1] - margin)
+
+        while True:
+            command, payload = connection.recv()
+            if command == 'next_id':
+                engine.next_id = payload + tile
+            elif command == 'append':
+                engine.append_columns(payload)
+            elif command == 'halo':
+                # A herd takes herbivores of neighbouring blocks, so blocks of a halo may reach over a border
+                halo = (engine.species == HERBIVORE) & outside(payload, 2 * Herds.CELL)
+                connection.send(np.stack([engine.x[halo], engine.y[halo]]))
+            elif command == 'move':
+                engine.events.tick, cuts, ghosts = payload
+                engine.move_phase(ghosts)
+                engine.remove_dead()
+                connection.send((engine.extract(outside(cuts)), records()))
+            elif command == 'outside':
+                connection.send(engine.extract(outside(payload)))
+            elif command == 'interact':
+                engine.events.tick = payload
+                engine.interaction_phase()
+                connection.send((species_counts(), records()))
+            elif command == 'count':
+                connection.send(species_counts())
+            elif command == 'x':
+                connection.send(engine.x)
+            elif command == 'columns':
+                connection.send({name: getattr(engine, name) for name in ArrayEngine.COLUMNS})
+            elif command == 'summarize':
+                statistics = Statistics()
+                statistics.summarize(engine)
+                connection.send(statistics)
+            elif command == 'checksum':
+                checksum = 0
+                for name in ArrayEngine.COLUMNS:
+                    checksum = zlib.crc32(np.ascontiguousarray(getattr(engine, name)), checksum)
+                generator_state, _, index = engine.rng.get_state()
+                connection.send(([generator_state, index], checksum))
+            elif command == 'state':
+                connection.send({
+                    'columns': {name: getattr(engine, name) for name in ArrayEngine.COLUMNS},
+                    'rng': engine.rng.get_state(),
+                    'next_id': engine.next_id,
+                })
+            elif command == 'restore':
+                for name, dtype in ArrayEngine.COLUMNS.items():
+                    setattr(engine, name, np.array(payload['columns'][name], dtype=dtype))
+                engine.rng.set_state(*payload['rng'])
+                engine.next_id = payload['next_id']
+            elif command == 'stop':
+                break
+
+
+class Instruments:
+    """
+    Instrumentation of the hot path: wall time and amount of calls of each phase, per-species counters of
+    fights, births and deaths by cause, and field chunk allocations, collected for every period.
+    Enabling installs wrappers of the phase methods as attributes of the instances of one emulation
+    (the emulation, its ArrayEngine and Position), so classes are not changed and other emulations
+    (and worker processes) are not counted. Births and deaths of the 'object' engine are counted by creatures
+    of the world while it refers to the instruments. Disabling removes the wrappers, so a disabled emulation
+    runs without any overhead. Phase times are inclusive (move_phase contains change_position).
+    Phases of TiledEngine workers are not instrumented
+
+    Attributes:
+        PHASES(tuple): Instrumented methods as (instance, method name), the instance is 'emulation', 'arrays'
+            (ArrayEngine of the 'array' engine) or 'position' (Position of the 'object' engine)
+        COUNTERS(tuple): Names of per-species counters
+        DEATH_CAUSES(tuple): Causes of death in the order they are checked
+        phases(dict): Seconds and amount of calls of each phase during the current period
+        counters(np.ndarray): Counters of the current period, [counter, species]
+        chunk_allocations(int): Allocated field chunks during the current period
+        history(list): Records of the emulated periods
+        hooks(list): Hooks called at the start and the end of chosen periods
+        emulation(Emulation): Instrumented emulation, None if the instruments are disabled
+
+    Methods:
+        enable: Installs wrappers of the phase methods of an emulation
+        disable: Removes the wrappers
+        add_hook: Adds a hook called at the start and the end of chosen periods
+        start_period: Resets collectors and calls hooks at the start of a period
+        end_period: Stores a record of the period and calls hooks
+        totals: Returns totals of the collected records
+        death_causes: Returns counters index of the death cause of creatures
+    """
+    PHASES = (
+        ('emulation', 'scheduled_phase'), ('emulation', 'find_herds'), ('emulation', 'move_phase'),
+        ('position', 'change_position'), ('emulation', 'interaction_phase'), ('emulation', 'cell_index'),
+        ('emulation', 'eat_phase'), ('emulation', 'fight_phase'), ('emulation', 'combat'),
+        ('emulation', 'mating_phase'),
+        ('arrays', 'find_herds'), ('arrays', 'animal_period'), ('arrays', 'plant_period'), ('arrays', 'relocate'),
+        ('arrays', 'cell_index'), ('arrays', 'eat'), ('arrays', 'attack'), ('arrays', 'fight'),
+        ('arrays', 'reproduce'), ('arrays', 'remove_dead'),
+    )
+    COUNTERS = ('fights', 'births', 'deaths_age', 'deaths_hunger', 'deaths_hp', 'deaths_mass', 'deaths_killed')
+    DEATH_CAUSES = ('age', 'hunger', 'hp', 'mass', 'killed')
+
+    def __init__(self):
+        self.phases = dict()
+        self.counters = np.zeros((len(self.COUNTERS), len(SPECIES_NAMES)), dtype=np.int64)
+        self.chunk_allocations = 0
+        self.history = list()
+        self.hooks = list()
+        self.emulation = None
+        self.wrappers = list()
+        self.started = 0.0
+        self.allocated = 0
+
+    @property
+    def enabled(self):
+        return self.emulation is not None
+
+    def enable(self, emulation):
+        """Installs wrappers of the phase methods (and counters of births) of a generated emulation"""
+        if self.enabled:
+            return
+        self.emulation = emulation
+        targets = {
+            'emulation': emulation,
+            'arrays': emulation.arrays if emulation.engine == 'array' else None,
+            'position': emulation.world.position if emulation.world is not None else None,
+        }
+        for target, name in self.PHASES:
+            if targets[target] is not None:
+                self.wrap(targets[target], name, self.counter(name))
+        if targets['arrays'] is not None:
+            self.wrap(targets['arrays'], 'add_creatures', self.count_array_births)
+        if emulation.world is not None:
+            emulation.world.instruments = self
+
+    def disable(self):
+        """Removes the wrappers installed by enable"""
+        for instance, name, wrapper in self.wrappers:
+            if instance.__dict__.get(name) is wrapper:
+                del instance.__dict__[name]
+        if self.emulation is not None and self.emulation.world is not None:
+            if self.emulation.world.instruments is self:
+                self.emulation.world.instruments = None
+        self.wrappers = list()
+        self.emulation = None
+
+    def wrap(self, instance, name, counter=None):
+        """
+        Sets a wrapper of a method as an attribute of an instance. The wrapper measures wall time and calls
+        of the method as the phase with its name
+        """
+        method = getattr(type(instance), name).__get__(instance)
+        phases = self.phases
+
+        def timed(*args, **kwargs):
+            if counter is not None:
+                counter(instance, *args, **kwargs)
+            started = perf_counter()
+            result = method(*args, **kwargs)
+            timing = phases.get(name)
+            if timing is None:
+                phases[name] = [perf_counter() - started, 1]
             else:
-                carnivore_win_probability = np.random.randint(0, 100) - self.hunger*0.1
-            herbivore_win_probability = np.random.randint(0, 100)
-
-            if carnivore_win_probability >= herbivore_win_probability:
-                print(f'{self} won')
-                self.update_hunger(0.3 * animal_instance.mass)
-                self.update_mass(0.5 * animal_instance.mass)
-                self.update_hp(0.3 * animal_instance.mass)
+                timing[0] += perf_counter() - started
+                timing[1] += 1
+            return result
+
+        setattr(instance, name, timed)
+        self.wrappers.append((instance, name, timed))
+
+    def counter(self, name):
+        """Returns a counter called before a phase method, if the phase has one"""
+        if name == 'fight':
+            return self.count_array_fights
+        if name == 'combat':
+            return self.count_fights
+        if name == 'remove_dead':
+            return self.count_array_deaths
+        return None
+
+    def count_fights(self, emulation, fights):
+        for attacker, _ in fights:
+            self.counters[0, attacker.SPECIES] += 1
+
+    def count_array_fights(self, engine, attackers, defenders):
+        np.add.at(self.counters[0], engine.species[attackers], 1)
+
+    def count_birth(self, creature):
+        """Counts a creature born in the 'object' engine"""
+        self.counters[1, creature.SPECIES] += 1
+
+    def count_array_births(self, engine, species, ages, x, y, born=False):
+        if born:
+            self.counters[1] += np.bincount(species, minlength=len(SPECIES_NAMES))
+
+    def count_death(self, creature):
+        """Counts a creature of the 'object' engine that dies by its death cause"""
+        animal = creature.SPECIES != PLANT
+        cause = self.death_causes(np.array([creature.age]), np.array([getattr(creature, 'hunger', 0)]),
+                                  np.array([getattr(creature, 'hp', 1)]), np.array([creature.mass]),
+                                  np.array([animal]))
+        self.counters[cause[0], creature.SPECIES] += 1
+
+    def count_array_deaths(self, engine):
+        dead = ~engine.alive
+        if not dead.any():
+            return
+        causes = self.death_causes(engine.age[dead], engine.hunger[dead], engine.hp[dead], engine.mass[dead],
+                                   engine.species[dead] != PLANT)
+        np.add.at(self.counters, (causes, engine.species[dead]), 1)
+
+    def death_causes(self, age, hunger, hp, mass, animal):
+        """
+        Returns counters index of the death cause of dying creatures: the first exhausted limit of age,
+        hunger, hp and mass (the last three only for animals), otherwise the creature was killed
+        (eaten, defeated or poisoned)
+        """
+        conditions = [age >= Creature.LIFESPAN, animal & (hunger >= 100), animal & (hp <= 0), animal & (mass <= 0)]
+        first_death = self.COUNTERS.index('deaths_age')
+        return np.select(conditions, np.arange(first_death, first_death + 4),
+                         default=first_death + 4)
+
+    def add_hook(self, hook, ticks=None):
+        """
+        Adds a hook called at the start and the end of periods with ticks in the given collection
+        (every period if ticks is None). A hook has methods start(emulation) and end(emulation, record)
+        """
+        self.hooks.append((hook, None if ticks is None else set(ticks)))
+
+    def start_period(self, emulation):
+        """Resets collectors and calls hooks at the start of a period"""
+        self.phases.clear()
+        self.counters[:] = 0
+        self.allocated = emulation.field.allocated if emulation.field is not None else 0
+        for hook, ticks in self.hooks:
+            if ticks is None or emulation.tick in ticks:
+                hook.start(emulation)
+        self.started = perf_counter()
+
+    def end_period(self, emulation):
+        """Stores a record of the period and calls hooks"""
+        seconds = perf_counter() - self.started
+        self.chunk_allocations = emulation.field.allocated - self.allocated if emulation.field is not None else 0
+        record = {
+            'tick': emulation.tick,
+            'seconds': seconds,
+            'phases': {name: tuple(timing) for name, timing in self.phases.items()},
+            'counters': self.counters.copy(),
+            'chunk_allocations': self.chunk_allocations,
+        }
+        self.history.append(record)
+        for hook, ticks in self.hooks:
+            if ticks is None or emulation.tick in ticks:
+                hook.end(emulation, record)
+
+    def totals(self):
+        """Returns totals of the collected records: seconds, phases, counters and chunk allocations"""
+        phases = dict()
+        for record in self.history:
+            for name, (seconds, calls) in record['phases'].items():
+                total = phases.setdefault(name, [0.0, 0])
+                total[0] += seconds
+                total[1] += calls
+        return {
+            'periods': len(self.history),
+            'seconds': sum(record['seconds'] for record in self.history),
+            'phases': phases,
+            'counters': sum((record['counters'] for record in self.history), np.zeros_like(self.counters)),
+            'chunk_allocations': sum(record['chunk_allocations'] for record in self.history),
+        }
+
+
+class ProfilerHook:
+    """
+    Hook of Instruments that profiles chosen periods by cProfile and dumps statistics to a file
+
+    Attributes:
+        path(str): File of the collected statistics (pstats format)
+        profile(cProfile.Profile): Profiler of the chosen periods
+    """
+    def __init__(self, path):
+        self.path = path
+        self.profile = cProfile.Profile()
+
+    def start(self, emulation):
+        self.profile.enable()
+
+    def end(self, emulation, record):
+        self.profile.disable()
+        self.profile.dump_stats(self.path)
+
+
+class Statistics:
+    """
+    Population statistics: amount of creatures per species and sex, running sums and histograms of mass,
+    hunger, hp and age, and amount of occupied cells. Creatures of the 'object' engine update them on birth,
+    death and change of attributes, so reading them does not depend on the population. Columns of the
+    'array' and 'tiled' engines are summarized by numpy once per period. Plants have no sex, hunger and hp.
+    Ages of all creatures and mass of lazy plants grow without updates, so they are counted by exact value
+    and shifted once per period. Values of each period are written to a .csv or .npy time series
+
+    Attributes:
+        BINS(dict): Width and amount of histogram bins of each attribute, the last bin is open
+        DTYPE(np.dtype): Record of one period in the time series
+        counts(list): Amount of creatures by [species][sex], sex 2 is used for plants
+        sums(dict): Sums of attribute values by species
+        histograms(dict): Histograms of attribute values by [species][bin]
+        occupied_cells(int): Amount of occupied cells
+        lazy_values(dict): Amount of creatures by exact value of attributes growing without updates,
+            by (species, attribute)
+        output(str): Path of the time series (.csv or .npy), None if it is not written
+
+    Methods:
+        scan: Computes statistics of all creatures of the 'object' engine
+        start: Computes statistics of the current state of an emulation and writes the first record
+        add: Adds a new creature
+        remove: Removes a died creature
+        change: Updates statistics because of a changed attribute of a creature
+        count_lazy: Updates amount of creatures with a value of an attribute growing without updates
+        advance: Grows ages of all creatures and mass of plants by one period
+        summarize: Computes statistics of columns of ArrayEngine
+        population: Returns amount of creatures
+        means: Returns mean values of an attribute by species
+        record: Returns statistics as a record of the time series
+        end_period: Writes statistics of the period to the time series
+        close: Closes the time series
+    """
+    BINS = {'mass': (50, 14), 'hunger': (10, 11), 'hp': (10, 11), 'age': (1, 31)}
+    DTYPE = np.dtype([('tick', '<i4'), ('counts', '<i8', (len(SPECIES_NAMES), 3))]
+                     + [(name + '_sum', '<f8', (len(SPECIES_NAMES),)) for name in BINS]
+                     + [(name + '_histogram', '<i8', (len(SPECIES_NAMES), amount))
+                        for name, (width, amount) in BINS.items()]
+                     + [('occupied_cells', '<i8')])
+    ANIMAL_ATTRIBUTES = ('mass', 'hunger', 'hp', 'age')
+    PLANT_ATTRIBUTES = ('mass', 'age')
+
+    def __init__(self, output=None):
+        self.output = output
+        self.file = None
+        self.records = 0
+        self.field = None
+        self.reset()
+
+    def reset(self):
+        species = len(SPECIES_NAMES)
+        self.counts = [[0, 0, 0] for _ in range(species)]
+        self.sums = {name: [0.0] * species for name in self.BINS}
+        self.histograms = {name: [[0] * amount for _ in range(species)] for name, (width, amount) in self.BINS.items()}
+        self.occupied_cells = 0
+        self.lazy_values = {(code, 'age'): np.zeros(1, dtype=np.int64) for code in range(species)}
+        self.lazy_values[(PLANT, 'mass')] = np.zeros(1, dtype=np.int64)
+
+    def bin(self, name, value):
+        """Returns histogram bin of an attribute value"""
+        width, amount = self.BINS[name]
+        return min(max(int(value // width), 0), amount - 1)
+
+    def scan(self, creatures, field):
+        """Computes statistics of all creatures of the 'object' engine (once, when statistics are attached)"""
+        self.reset()
+        self.field = field
+        for creature in creatures:
+            self.add(creature)
+
+    def add(self, creature):
+        """Adds a new creature"""
+        species = creature.SPECIES
+        plant = species == PLANT
+        self.counts[species][2 if plant else int(creature.sex)] += 1
+        for name in (self.PLANT_ATTRIBUTES if plant else self.ANIMAL_ATTRIBUTES):
+            value = getattr(creature, name)
+            self.sums[name][species] += value
+            self.histograms[name][species][self.bin(name, value)] += 1
+            if (species, name) in self.lazy_values:
+                self.count_lazy(species, name, value, 1)
+
+    def remove(self, creature):
+        """Removes a died creature"""
+        species = creature.SPECIES
+        plant = species == PLANT
+        self.counts[species][2 if plant else int(creature.sex)] -= 1
+        for name in (self.PLANT_ATTRIBUTES if plant else self.ANIMAL_ATTRIBUTES):
+            value = getattr(creature, name)
+            self.sums[name][species] -= value
+            self.histograms[name][species][self.bin(name, value)] -= 1
+            if (species, name) in self.lazy_values:
+                self.count_lazy(species, name, value, -1)
+
+    def change(self, creature, name, old_value):
+        """Updates statistics because an attribute of a creature changed from old_value"""
+        if not creature.creatures.is_alive(creature):
+            # Died creatures are already removed
+            return
+        species = creature.SPECIES
+        value = getattr(creature, name)
+        self.sums[name][species] += value - old_value
+        old_bin, new_bin = self.bin(name, old_value), self.bin(name, value)
+        if old_bin != new_bin:
+            histogram = self.histograms[name][species]
+            histogram[old_bin] -= 1
+            histogram[new_bin] += 1
+        if (species, name) in self.lazy_values:
+            self.count_lazy(species, name, old_value, -1)
+            self.count_lazy(species, name, value, 1)
+
+    def count_lazy(self, species, name, value, delta):
+        """Updates amount of creatures with a value of an attribute growing without updates (an integer)"""
+        values = self.lazy_values[(species, name)]
+        value = int(value)
+        if value >= len(values):
+            values = self.lazy_values[(species, name)] = np.concatenate([values, np.zeros(value + 1 - len(values),
+                                                                                           dtype=np.int64)])
+        values[value] += delta
+
+    def advance(self):
+        """
+        Grows ages of all creatures and mass of plants by one period (as their properties do) by shifting
+        amounts of creatures by value, their sums and histograms are recomputed from them. Plants that
+        reproduce instead of grow are corrected by change
+        """
+        for (species, name), values in self.lazy_values.items():
+            if name == 'age':
+                values = np.trim_zeros(np.concatenate([[0], values]), 'b')
             else:
-                print(f'{self} lost')
-                self.update_hp(-animal_instance.hit)
-        elif (type(animal_instance) is Omnivore) or (type(animal_instance) is Carnivore):
-            # Sets win probability for the attacking carnivore based on mas
-            attacker_win_probability = np.random.randint(0, 100) + self.mass*0.5
-            # Sets win probability for the defending animal based on mass (increased mass parameter)
-            defender_win_probability = np.random.randint(0, 100) + self.mass*0.5
-
-            if attacker_win_probability >= defender_win_probability:
-                print(f'{self} won')
-                self.update_hunger(-0.3 * animal_instance.mass)
-                self.update_mass(animal_instance.mass)
-                self.update_hp(0.3 * animal_instance.mass)
-                animal_instance.die()
+                grown = np.minimum(np.arange(len(values)) + Plant.GROWTH, Plant.MAX_MASS)
+                values = np.bincount(grown, weights=values, minlength=Plant.MAX_MASS + 1).astype(np.int64)
+            self.lazy_values[(species, name)] = values
+            width, amount = self.BINS[name]
+            levels = np.arange(len(values))
+            self.sums[name][species] = float(np.dot(levels, values))
+            self.histograms[name][species] = np.bincount(np.minimum(levels // width, amount - 1), weights=values,
+                                                         minlength=amount).astype(np.int64).tolist()
+
+    def summarize(self, engine):
+        """Computes statistics of columns of ArrayEngine"""
+        species_count = len(SPECIES_NAMES)
+        species = engine.species.astype(np.int64)
+        animal = species != PLANT
+        sex = np.where(animal, engine.sex.astype(np.int64), 2)
+        self.counts = np.bincount(species * 3 + sex, minlength=species_count * 3).reshape(species_count, 3).tolist()
+        for name, (width, amount) in self.BINS.items():
+            mask = animal if name in ('hunger', 'hp') else np.ones(len(species), dtype=bool)
+            values = getattr(engine, name)[mask]
+            self.sums[name] = np.bincount(species[mask], weights=values, minlength=species_count).tolist()
+            bins = np.clip(np.floor_divide(values, width).astype(np.int64), 0, amount - 1)
+            counts = np.bincount(species[mask] * amount + bins, minlength=species_count * amount)
+            self.histograms[name] = counts.reshape(species_count, amount).tolist()
+        owner, x, y = engine.footprint_cells()
+        self.occupied_cells = len(np.unique(np.stack([x, y], axis=1), axis=0))
+
+    def population(self):
+        """Returns amount of creatures"""
+        return sum(sum(counts) for counts in self.counts)
+
+    def means(self, name):
+        """Returns mean values of an attribute by species (0 for species without creatures)"""
+        counts = np.array(self.counts).sum(axis=1)
+        if name in ('hunger', 'hp'):
+            counts[PLANT] = 0
+        return np.divide(self.sums[name], counts, out=np.zeros(len(counts)), where=counts > 0)
+
+    def record(self, tick=0):
+        """Returns statistics as a record of the time series"""
+        record = np.zeros((), dtype=self.DTYPE)
+        record['tick'] = tick
+        record['counts'] = self.counts
+        for name in self.BINS:
+            record[name + '_sum'] = self.sums[name]
+            record[name + '_histogram'] = self.histograms[name]
+        record['occupied_cells'] = self.field.occupied_cells() if self.field is not None else self.occupied_cells
+        return record
+
+    def start(self, emulation):
+        """
+        Computes statistics of the current state of an emulation (scans creatures of the 'object' engine)
+        and writes them as the first record of the time series, so a generated world is recorded at tick 0
+        """
+        if emulation.engine == 'object':
+            self.scan(emulation.creatures, emulation.field)
+        self.end_period(emulation)
+
+    def end_period(self, emulation):
+        """Updates statistics of engines without Field and writes statistics of the period to the time series"""
+        if emulation.engine == 'array':
+            self.summarize(emulation.arrays)
+        elif emulation.engine == 'tiled':
+            emulation.arrays.summarize(self)
+        if self.output is None:
+            return
+        record = self.record(emulation.tick)
+        if self.file is None:
+            self.open()
+        if self.output.endswith('.csv'):
+            self.file.write(','.join(str(value) for value in self.flatten(record)) + '\n')
+        else:
+            self.file.write(record.tobytes())
+        self.records += 1
+
+    def columns(self):
+        """Returns names of columns of the CSV time series"""
+        names = list()
+        for name in self.DTYPE.names:
+            shape = self.DTYPE[name].shape
+            if not shape:
+                names.append(name)
             else:
-                print(f'{self} lost')
-                animal_instance.update_hunger(-0.3 * self.mass)
-                animal_instance.update_mass(0.5 * self.mass)
-                animal_instance.update_hp(0.3 * self.mass)
-                self.die()
+                for index in np.ndindex(shape):
+                    names.append('_'.join([name, SPECIES_NAMES[index[0]]] + [str(i) for i in index[1:]]))
+        return names
 
-    def reproduce(self):
-        """Emulates reproduction process"""
-        tumbler = False
-        for coordinates in self.position.coordinates_list:
-            if tumbler:
-                break
-            if type(self.field.field_list[coordinates[0]][coordinates[1]]) is list:
-                for creature in self.field.field_list[coordinates[0]][coordinates[1]]:
-                    same_type = type(creature) is type(self)
-                    if same_type:
-                        sufficient_age = (creature.age >= 30) and (self.age >= 30)
-                        different_sex = creature.sex is not self.sex
-                        if sufficient_age and different_sex:
-                            self.create_child(coordinates)
-                            tumbler = True
-                            break
+    def flatten(self, record):
+        values = list()
+        for name in self.DTYPE.names:
+            values.extend(np.ravel(record[name]).tolist())
+        return values
+
+    def open(self):
+        """Opens the time series. A .npy header is rewritten with the final amount of records on close"""
+        self.file = open(self.output, 'w' if self.output.endswith('.csv') else 'wb')
+        if self.output.endswith('.csv'):
+            self.file.write(','.join(self.columns()) + '\n')
+        else:
+            self.file.write(self.npy_header(0))
+
+    def npy_header(self, records):
+        """Returns .npy header of the time series, padded to the same length for any amount of records"""
+        header = repr({'descr': np.lib.format.dtype_to_descr(self.DTYPE), 'fortran_order': False,
+                       'shape': (records,)})
+        # Space for up to 20 digits of the amount of records
+        length = len(header) + 20 + 1
+        length += -(10 + length) % 64
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', length) + header.ljust(length - 1).encode('latin1') + b'\n'
+
+    def close(self):
+        """Closes the time series"""
+        if self.file is None:
+            return
+        if not self.output.endswith('.csv'):
+            self.file.seek(0)
+            self.file.write(self.npy_header(self.records))
+        self.file.close()
+        self.file = None
+
+
+class Checkpoint:
+    """
+    Saves and loads complete state of an emulation to a single uncompressed .npz file: columns of creature
+    attributes and footprints (anchor and size), Field occupancy, registry slots, the tick and the random state.
+    Creatures of the 'tiled' engine are stored tile by tile with the random state and borders of each tile.
+    An emulation loaded from a checkpoint continues exactly as the saved one would
+
+    Attributes:
+        OBJECT_COLUMNS(dict): Columns of Creature instances and their dtypes
+
+    Methods:
+        save: Saves an emulation to a file
+        load: Loads an emulation from a file
+        save_objects: Returns columns of the 'object' engine
+        load_objects: Restores creatures, registry and Field of the 'object' engine
+        save_tiles: Returns columns of the 'tiled' engine
+        load_tiles: Restores workers and tiles of the 'tiled' engine
+        memmap: Maps an array stored in the file into memory without reading it
+    """
+    OBJECT_COLUMNS = {
+        'slot': np.int64,
+        'id': np.int64,
+        'species': np.int8,
+        'age': np.int64,
+        'mass': np.float64,
+        'size': np.int64,
+        'x': np.int64,
+        'y': np.int64,
+        'sex': np.bool_,
+        'hunger': np.float64,
+        'hp': np.float64,
+        'hit': np.int64,
+        'aggressiveness': np.int64,
+        'toxicity': np.bool_,
+        'next_shoot': np.int64,
+    }
+
+    def save(self, emulation, path):
+        """Saves an emulation to a file"""
+        meta = {
+            'engine': emulation.engine,
+            'seed': emulation.seed,
+            'tick': emulation.tick,
+            'headless': emulation.headless,
+            'territory': emulation.territory,
+        }
+        if emulation.engine == 'tiled':
+            columns = self.save_tiles(emulation, meta)
+        else:
+            rng = emulation.arrays.rng if emulation.engine == 'array' else emulation.world.rng
+            meta['generator_state'], buffer, meta['buffer_index'] = rng.get_state()
+            columns = {'rng_buffer': buffer}
+        if emulation.engine == 'array':
+            meta['next_id'] = emulation.arrays.next_id
+            for name in ArrayEngine.COLUMNS:
+                columns['array_' + name] = getattr(emulation.arrays, name)
+        elif emulation.engine == 'object':
+            columns.update(self.save_objects(emulation))
+        columns['meta'] = np.array(json.dumps(meta))
+        # Uncompressed archive keeps every column contiguous, so it can be memory-mapped
+        with open(path, 'wb') as file:
+            np.savez(file, **columns)
+
+    def load(self, path, mmap=False, events=None):
+        """
+        Loads an emulation from a file. If mmap is True, columns of the 'array' engine are mapped into memory
+        (copy-on-write), so huge worlds are read lazily
+        """
+        with np.load(path) as archive:
+            meta = json.loads(str(archive['meta']))
+            emulation = Emulation(engine=meta['engine'], seed=meta['seed'], territory=meta.get('territory', 100),
+                                  tiles=meta.get('tiles', 4))
+            emulation.tick = meta['tick']
+            emulation.headless = meta['headless']
+            emulation.events = EventLog(NullSink() if emulation.headless else PrintSink()) if events is None else events
+            emulation.events.tick = emulation.tick
+            if emulation.engine == 'array':
+                arrays = ArrayEngine(seed=emulation.seed, events=emulation.events, territory=emulation.territory)
+                for name, dtype in ArrayEngine.COLUMNS.items():
+                    if 'array_' + name not in archive.files:
+                        # Herds of checkpoints saved before herding are found at the start of the next period
+                        column = np.ones(len(archive['array_id']), dtype=dtype)
                     else:
-                        pass
+                        column = self.memmap(path, 'array_' + name) if mmap else archive['array_' + name]
+                    setattr(arrays, name, column)
+                arrays.next_id = meta['next_id']
+                emulation.arrays = arrays
+                arrays.rng.set_state(meta['generator_state'], archive['rng_buffer'], meta['buffer_index'])
+            elif emulation.engine == 'tiled':
+                self.load_tiles(emulation, archive, meta)
             else:
-                pass
+                self.load_objects(emulation, archive)
+                emulation.world.rng.set_state(meta['generator_state'], archive['rng_buffer'], meta['buffer_index'])
+        return emulation
 
-    def create_child(self, coordinates):
-        """Emulates child creation"""
-        child = Omnivore(self.field, self.creatures, age=0)
-        child.set_position(coordinates)
-        print(f'{child} born!')
-        return child
+    @staticmethod
+    def save_tiles(emulation, meta):
+        """
+        Returns columns of creatures of all tiles of the 'tiled' engine (tile by tile) with buffers of their
+        random numbers and adds tile borders, amounts of creatures and random states of tiles to meta
+        """
+        tiles = emulation.arrays
+        states = tiles.state()
+        meta.update({
+            'tiles': tiles.tiles,
+            'cuts': tiles.cuts.tolist(),
+            'periods': tiles.periods,
+            'rebalance_period': tiles.rebalance_period,
+            'tile_counts': [len(state['columns']['id']) for state in states],
+            'tile_generator_states': [state['rng'][0] for state in states],
+            'tile_buffer_indexes': [state['rng'][2] for state in states],
+            'tile_next_ids': [state['next_id'] for state in states],
+        })
+        columns = {'array_' + name: np.concatenate([state['columns'][name] for state in states])
+                   for name in ArrayEngine.COLUMNS}
+        for tile, state in enumerate(states):
+            columns[f'tile_rng_buffer_{tile}'] = state['rng'][1]
+        return columns
 
-    def move(self):
-        """Makes a move of the Herbivore instance"""
-        self.period()
-        relocate_choice = bool(np.random.randint(0, 2))
-        if relocate_choice is True:
-            self.relocate()
-        self.eat()
-        self.attack()
-        self.reproduce()
+    @staticmethod
+    def load_tiles(emulation, archive, meta):
+        """Starts workers of the 'tiled' engine and restores creatures and random states of every tile"""
+        tiles = TiledEngine(tiles=meta['tiles'], seed=emulation.seed, rebalance_period=meta['rebalance_period'],
+                            territory=emulation.territory, events=emulation.events)
+        bounds = np.cumsum([0] + meta['tile_counts'])
+        columns = {name: archive['array_' + name] for name in ArrayEngine.COLUMNS}
+        states = [{
+            'columns': {name: column[bounds[tile]:bounds[tile + 1]] for name, column in columns.items()},
+            'rng': (meta['tile_generator_states'][tile], archive[f'tile_rng_buffer_{tile}'],
+                    meta['tile_buffer_indexes'][tile]),
+            'next_id': meta['tile_next_ids'][tile],
+        } for tile in range(meta['tiles'])]
+        tiles.restore(states, meta['cuts'], meta['periods'])
+        emulation.arrays = tiles
 
+    def save_objects(self, emulation):
+        """Returns columns of creatures (in slot order), registry and Field occupancy of the 'object' engine"""
+        registry = emulation.creatures
+        rows = {name: list() for name in self.OBJECT_COLUMNS}
+        mask = (1 << registry.SLOT_BITS) - 1
+        for creature in registry:
+            # Slots of plants are slots of PlantColumns marked by PLANT_SLOT
+            rows['slot'].append(creature.id & mask)
+            rows['species'].append(creature.SPECIES)
+            for name in ('id', 'age', 'mass', 'size', 'x', 'y'):
+                rows[name].append(getattr(creature, name))
+            for name in ('sex', 'hunger', 'hp', 'hit', 'aggressiveness', 'toxicity', 'next_shoot'):
+                rows[name].append(getattr(creature, name, 0))
+        columns = {'object_' + name: np.array(rows[name], dtype=dtype) for name, dtype in self.OBJECT_COLUMNS.items()}
 
-class Plant(Creature):
+        # Occupancy keeps the order of creatures inside of each cell
+        cells = list()
+        chunk_size = emulation.field.CHUNK_SIZE
+        for (chunk_x, chunk_y), chunk in emulation.field.chunks.items():
+            for index, cell in enumerate(chunk.cells):
+                if cell == FieldChunk.EMPTY:
+                    continue
+                x = chunk_x * chunk_size + index // chunk_size
+                y = chunk_y * chunk_size + index % chunk_size
+                for creature_id in (chunk.shared[index] if cell == FieldChunk.SHARED else [cell]):
+                    cells.append((x, y, creature_id))
+        columns['field_cells'] = np.array(cells, dtype=np.int64).reshape(-1, 3)
+        columns['registry_generations'] = np.array(registry.generations, dtype=np.int64)
+        columns['registry_free_slots'] = np.array(registry.free_slots, dtype=np.int64)
+        columns['registry_dead_slots'] = np.array(registry.dead_slots, dtype=np.int64)
+        columns['registry_active'] = np.array([creature.id for creature in registry.active], dtype=np.int64)
+        columns['registry_plant_generations'] = np.array(registry.plants.generations, dtype=np.int64)
+        columns['registry_plant_free_slots'] = np.array(registry.plants.free_slots, dtype=np.int64)
+        columns['registry_plant_dead_slots'] = np.array(registry.plants.dead_slots, dtype=np.int64)
+        return columns
+
+    def load_objects(self, emulation, archive):
+        """
+        Restores creatures, registry, Field and scheduled events of the 'object' engine without drawing
+        random numbers
+        """
+        generation = WorldGeneration(seed=emulation.seed, events=emulation.events, territory=emulation.territory)
+        registry, world = generation.creatures, generation.world
+        world.tick = emulation.tick
+        world.scheduler = Scheduler(emulation.tick)
+        generations = archive['registry_generations'].tolist()
+        registry.slots = [None] * len(generations)
+        registry.generations = array('I', generations)
+        registry.free_slots = archive['registry_free_slots'].tolist()
+        registry.dead_slots = archive['registry_dead_slots'].tolist()
+        plants = registry.plants
+        generations = archive['registry_plant_generations'].tolist()
+        plants.generations = array('I', generations)
+        plants.alive, plants.placed = bytearray(len(generations)), bytearray(len(generations))
+        for name, typecode in plants.TYPECODES.items():
+            setattr(plants, name, array(typecode, [0]) * len(generations))
+        plants.free_slots = archive['registry_plant_free_slots'].tolist()
+        plants.dead_slots = archive['registry_plant_dead_slots'].tolist()
+
+        classes = (Carnivore, Herbivore, Omnivore, Plant)
+        columns = [archive['object_' + name].tolist() for name in self.OBJECT_COLUMNS]
+        for row in zip(*columns):
+            values = dict(zip(self.OBJECT_COLUMNS, row))
+            cls = classes[values['species']]
+            creature = cls.__new__(cls)
+            creature.world = world
+            for name in ('id', 'age', 'mass', 'size', 'x', 'y'):
+                setattr(creature, name, values[name])
+            if cls is Plant:
+                creature.toxicity = values['toxicity']
+                creature.next_shoot = values['next_shoot']
+                if creature.next_shoot >= 0:
+                    world.scheduler.schedule(creature.next_shoot, SHOOT, creature.id)
+            else:
+                for name in ('sex', 'hunger', 'hp', 'hit'):
+                    setattr(creature, name, values[name])
+                if cls is Carnivore:
+                    creature.aggressiveness = values['aggressiveness']
+            # Events due at one tick are sorted, so the order of scheduling does not matter
+            creature.schedule()
+            if cls is Plant:
+                plants.alive[values['slot'] & (registry.PLANT_SLOT - 1)] = 1
+            else:
+                registry.slots[values['slot']] = creature
+            registry.alive += 1
+
+        registry.active = [registry.get(creature_id) for creature_id in archive['registry_active'].tolist()]
+
+        for x, y, creature_id in archive['field_cells'].tolist():
+            generation.field.occupy_cell([x, y], registry.get(creature_id))
+        emulation.creatures, emulation.field, emulation.world = registry, generation.field, world
+
+    @staticmethod
+    def memmap(path, name):
+        """Maps an array stored in the uncompressed .npz file into memory (copy-on-write) without reading it"""
+        with zipfile.ZipFile(path) as archive:
+            info = archive.getinfo(name + '.npy')
+        assert info.compress_type == zipfile.ZIP_STORED
+        with open(path, 'rb') as file:
+            # Skips the local file header of the member to reach the .npy header
+            file.seek(info.header_offset)
+            header = file.read(30)
+            name_length, extra_length = struct.unpack('<HH', header[26:30])
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            offset = file.tell()
+        if int(np.prod(shape)) == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='c', shape=shape, offset=offset,
+                         order='F' if fortran_order else 'C')
+
+
+class ReplayLog:
     """
-    Plant creature. Grows in mass each period and with probability of 1/10 instead of grow reproduces
+    Compact log to replay an emulation: its parameters, a checkpoint (keyframe) every keyframe_period ticks and
+    a checksum of every tick, stored in one directory. Replay loads the nearest keyframe before a tick and
+    emulates headless up to the tick, comparing checksums of the replayed periods with the recorded ones
 
     Attributes:
-        toxicity(bool): Reflects if a plant is toxic or not
+        PARAMETERS(str): Name of the file of parameters
+        CHECKSUMS(str): Name of the file of checksums
+        CHECKSUM_DTYPE(np.dtype): Record of the file of checksums
+        path(str): Directory of the log
+        keyframe_period(int): Amount of ticks between keyframes
+        file(file): File of checksums opened while recording, None if it is closed
 
     Methods:
-        update_mass: Emulates grow of a plant each period
-        period: Emulates period (aging and mass update)
-        reproduce: Emulates reproduction process
-        create_child: Emulates child creation
-        move: Makes a move of an Plant instance
+        start: Saves parameters and the first keyframe of an emulation
+        end_period: Appends checksum of the period and saves a keyframe every keyframe_period ticks
+        append: Appends checksum of the current tick
+        close: Closes the file of checksums
+        keyframe_path: Returns path of the keyframe of a tick
+        parameters: Returns parameters of the recorded emulation
+        keyframes: Returns ticks of saved keyframes
+        checksums: Returns recorded checksums by tick
+        load_keyframe: Loads an emulation from the nearest keyframe before a tick
+        fast_forward: Emulates up to a tick and returns the first tick that diverges from recorded checksums
+        seek: Returns a live emulation at a tick
+        verify: Replays a range of ticks and returns the first one that diverges from the log
     """
+    PARAMETERS = 'replay.json'
+    CHECKSUMS = 'checksums.bin'
+    CHECKSUM_DTYPE = np.dtype([('tick', np.int64), ('checksum', np.uint32)])
 
-    def __init__(self, field, creatures, age):
-        super(Plant, self).__init__(field, creatures, age)
-        self.toxicity = bool(np.random.randint(0, 2))
+    def __init__(self, path, keyframe_period=500):
+        self.path = path
+        self.keyframe_period = keyframe_period
+        self.file = None
 
-    def __repr__(self):
-        return 'Plant'
+    def start(self, emulation):
+        """Saves parameters and the first keyframe of an emulation and starts a new file of checksums"""
+        os.makedirs(self.path, exist_ok=True)
+        # Keyframes of a previous recording would be mistaken for this one
+        for tick in self.keyframes():
+            os.remove(self.keyframe_path(tick))
+        parameters = {
+            'engine': emulation.engine,
+            'seed': emulation.seed,
+            'territory': emulation.territory,
+            'tick': emulation.tick,
+            'population': emulation.population(),
+            'keyframe_period': self.keyframe_period,
+        }
+        with open(os.path.join(self.path, self.PARAMETERS), 'w') as file:
+            json.dump(parameters, file, indent=2)
+        self.file = open(os.path.join(self.path, self.CHECKSUMS), 'wb')
+        emulation.save(self.keyframe_path(emulation.tick))
+        self.append(emulation)
 
-    def update_mass(self):
-        """Emulates mass grow"""
-        self.mass += 50
-        if self.mass > 300:
-            self.mass = 300
+    def end_period(self, emulation):
+        """Appends checksum of the period and saves a keyframe every keyframe_period ticks"""
+        if self.file is None:
+            # Continues the recording of an emulation that is run again
+            self.file = open(os.path.join(self.path, self.CHECKSUMS), 'ab')
+        self.append(emulation)
+        if emulation.tick % self.keyframe_period == 0:
+            emulation.save(self.keyframe_path(emulation.tick))
+            # Checksums up to a keyframe survive a crash of the emulation
+            self.file.flush()
 
-    def period(self):
-        """Emulates aging and mass grow or reproduction"""
-        self.aging()
-        choice = np.random.randint(0, 10)
-        if choice == 0:
-            self.reproduce()
-        else:
-            self.update_mass()
+    def append(self, emulation):
+        """Appends checksum of the current tick to the file"""
+        self.file.write(np.array([(emulation.tick, emulation.checksum())], dtype=self.CHECKSUM_DTYPE).tobytes())
 
-    def reproduce(self):
-        """Reproduces new plant in one of the near cells"""
-        coordinates_index = np.random.randint(0, len(self.position.coordinates_list))
-        coordinates = self.position.coordinates_list[coordinates_index]
-        self.create_child(coordinates)
+    def close(self):
+        """Closes the file of checksums"""
+        if self.file is not None:
+            self.file.close()
+            self.file = None
 
-    def create_child(self, coordinates):
-        """Emulates child creation"""
-        child = Plant(self.field, self.creatures, age=0)
-        child.set_position(coordinates)
-        print(f'{child} born!')
-        return child
+    def keyframe_path(self, tick):
+        """Returns path of the keyframe of a tick"""
+        return os.path.join(self.path, f'keyframe_{tick:010d}.npz')
 
-    def move(self):
-        """Makes a move of a Plant instance"""
-        self.period()
+    def parameters(self):
+        """Returns parameters of the recorded emulation"""
+        with open(os.path.join(self.path, self.PARAMETERS)) as file:
+            return json.load(file)
+
+    def keyframes(self):
+        """Returns sorted ticks of saved keyframes"""
+        if not os.path.isdir(self.path):
+            return list()
+        names = [name for name in os.listdir(self.path) if name.startswith('keyframe_') and name.endswith('.npz')]
+        return sorted(int(name[len('keyframe_'):-len('.npz')]) for name in names)
+
+    def checksums(self):
+        """Returns recorded checksums by tick. A record cut by a crash of the emulation is ignored"""
+        with open(os.path.join(self.path, self.CHECKSUMS), 'rb') as file:
+            data = file.read()
+        records = np.frombuffer(data[:len(data) - len(data) % self.CHECKSUM_DTYPE.itemsize], dtype=self.CHECKSUM_DTYPE)
+        return dict(zip(records['tick'].tolist(), records['checksum'].tolist()))
+
+    def load_keyframe(self, tick, events=None):
+        """Loads a headless emulation from the nearest keyframe at or before a tick"""
+        keyframes = [keyframe for keyframe in self.keyframes() if keyframe <= tick]
+        assert keyframes, f'No keyframe at or before tick {tick}'
+        emulation = Emulation.load(self.keyframe_path(keyframes[-1]),
+                                   events=EventLog(NullSink()) if events is None else events)
+        emulation.headless = True
+        return emulation
+
+    @staticmethod
+    def fast_forward(emulation, tick, checksums):
+        """
+        Emulates periods up to a tick (or until the Field is empty) comparing checksums of the current and
+        the emulated ticks with recorded ones. Returns the first diverged tick, None if there is none
+        """
+        while True:
+            expected = checksums.get(emulation.tick)
+            if expected is not None and emulation.checksum() != expected:
+                return emulation.tick
+            if emulation.tick >= tick or emulation.population() == 0:
+                return None
+            emulation.period()
+
+    def seek(self, tick, verify=True, events=None):
+        """
+        Returns a live headless emulation at a tick (or at the tick where the Field became empty). It is loaded
+        from the nearest keyframe before the tick and emulated up to it. If verify is True, checksums of
+        the keyframe and the emulated periods are compared with the log and divergence raises RuntimeError
+        """
+        emulation = self.load_keyframe(tick, events)
+        diverged = self.fast_forward(emulation, tick, self.checksums() if verify else dict())
+        if diverged is not None:
+            if emulation.engine == 'tiled':
+                emulation.arrays.close()
+            raise RuntimeError(f'Replay diverged from the log at tick {diverged}')
+        return emulation
+
+    def verify(self, start=None, end=None):
+        """
+        Replays ticks from the keyframe at or before start (the first keyframe by default) up to end (the last
+        recorded tick by default). Returns the first tick whose checksum differs from the log, None if there is none
+        """
+        checksums = self.checksums()
+        emulation = self.load_keyframe(self.keyframes()[0] if start is None else start)
+        try:
+            return self.fast_forward(emulation, max(checksums) if end is None else end, checksums)
+        finally:
+            if emulation.engine == 'tiled':
+                emulation.arrays.close()
+
+
+class Ensemble:
+    """
+    Runs many independent headless emulations in a process pool. Each run has its own seed, workers stream
+    species counts of each period to the parent, which stores finished runs in the output directory,
+    so an interrupted ensemble resumes with the runs that are not finished yet
+
+    Attributes:
+        runs(int): Amount of emulations
+        number_of_creatures(int): Amount of generated creatures of each emulation
+        periods(int): Maximal amount of periods of each emulation
+        engine(str): Engine of the emulations
+        seed(int): Seed of the ensemble, seeds of runs are spawned from it
+        workers(int): Amount of worker processes
+        output(str): Directory with finished runs and aggregated results
+        STREAM_PERIODS(int): Amount of periods that a worker sends to the parent at once
+
+    Methods:
+        run: Runs emulations that are not finished yet and returns aggregated results
+        run_seeds: Returns seeds of all runs
+        emulate: Emulates one run in a worker process
+        load_curves: Returns species counts of finished runs
+        aggregate: Returns mean population curves per species with 95% confidence intervals
+    """
+    STREAM_PERIODS = 50
+
+    def __init__(self, runs=100, number_of_creatures=10000, periods=200, engine='array', seed=0, workers=None,
+                 output='ensemble'):
+        self.runs = runs
+        self.number_of_creatures = number_of_creatures
+        self.periods = periods
+        self.engine = engine
+        self.seed = seed
+        self.workers = workers or os.cpu_count()
+        self.output = output
+
+    def run_path(self, run):
+        return os.path.join(self.output, f'run_{run:05d}.npy')
+
+    def run_seeds(self):
+        """Returns seeds of all runs spawned from the seed of the ensemble"""
+        return [int(sequence.generate_state(1)[0]) for sequence in np.random.SeedSequence(self.seed).spawn(self.runs)]
+
+    def run(self):
+        """Runs emulations that are not finished yet in the process pool and returns aggregated results"""
+        os.makedirs(self.output, exist_ok=True)
+        seeds = self.run_seeds()
+        pending = [run for run in range(self.runs) if not os.path.exists(self.run_path(run))]
+        curves = dict()
+        with multiprocessing.Manager() as manager, multiprocessing.Pool(self.workers) as pool:
+            stream = manager.Queue()
+            results = [pool.apply_async(Ensemble.emulate, (run, seeds[run], self.number_of_creatures, self.periods,
+                                                           self.engine, stream)) for run in pending]
+            finished = 0
+            while finished < len(pending):
+                try:
+                    run, counts, done = stream.get(timeout=1)
+                except queue.Empty:
+                    # Raises an exception of a failed worker
+                    for result in results:
+                        if result.ready():
+                            result.get()
+                    continue
+                curves.setdefault(run, list()).append(counts)
+                if done:
+                    # Writes the finished run atomically, so an interrupted ensemble never sees a partial run
+                    path = self.run_path(run)
+                    np.save(path + '.tmp.npy', np.concatenate(curves.pop(run)))
+                    os.replace(path + '.tmp.npy', path)
+                    finished += 1
+        summary = self.aggregate()
+        np.savez(os.path.join(self.output, 'summary.npz'), **summary)
+        return summary
+
+    @staticmethod
+    def emulate(run, seed, number_of_creatures, periods, engine, stream):
+        """Emulates one run and sends species counts of each period to the stream by parts"""
+        emulation = Emulation(engine=engine, seed=seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        emulation.generate(number_of_creatures)
+        counts = [emulation.species_counts()]
+        while emulation.population() > 0 and emulation.tick < periods:
+            emulation.period()
+            counts.append(emulation.species_counts())
+            if len(counts) == Ensemble.STREAM_PERIODS:
+                stream.put((run, np.array(counts, dtype=np.int32), False))
+                counts = list()
+        stream.put((run, np.array(counts, dtype=np.int32).reshape(-1, len(SPECIES_NAMES)), True))
+
+    def load_curves(self):
+        """Returns species counts of finished runs as array [run, period, species]. Extinct runs are padded by 0"""
+        curves = np.zeros((self.runs, self.periods + 1, len(SPECIES_NAMES)), dtype=np.int32)
+        finished = np.zeros(self.runs, dtype=bool)
+        for run in range(self.runs):
+            if os.path.exists(self.run_path(run)):
+                counts = np.load(self.run_path(run))
+                curves[run, :len(counts)] = counts
+                finished[run] = True
+        return curves[finished]
+
+    def aggregate(self):
+        """
+        Returns mean population curves per species with 95% confidence intervals and mean extinction periods
+        (periods + 1 for species that survived). Raises ValueError if no run is finished
+        """
+        curves = self.load_curves().astype(np.float64)
+        runs = len(curves)
+        if runs == 0:
+            raise ValueError(f'No finished runs in {self.output}')
+        mean = curves.mean(axis=0)
+        error = 1.96 * curves.std(axis=0, ddof=1) / np.sqrt(runs) if runs > 1 else np.zeros_like(mean)
+        extinct = curves == 0
+        extinction = np.where(extinct.any(axis=1), extinct.argmax(axis=1), self.periods + 1)
+        return {
+            'runs': np.array(runs),
+            'mean': mean,
+            'ci_low': mean - error,
+            'ci_high': mean + error,
+            'extinction_mean': extinction.mean(axis=0),
+        }
+
+
+class Benchmark:
+    """
+    Reproducible benchmark of generation time, periods per second and memory. Each case runs in a fresh
+    process with a fixed seed, without sleeps, prints and events, so peak RSS belongs to the case only.
+    Dense worlds generate creatures within 100x100 cells, sparse worlds within a territory with
+    SPARSE_DENSITY creatures per cell (100000 creatures within 1000x1000 cells). Share of active chunks
+    at the end of a case shows how much of the world the interaction phases visit
+
+    Attributes:
+        scales(tuple): Amounts of generated creatures
+        worlds(tuple): 'dense' and/or 'sparse'
+        engines(tuple): Benchmarked engines
+        periods(int): Amount of measured periods
+        warmup(int): Amount of periods emulated before the measurement
+        seed(int): Seed of every case
+        SPARSE_DENSITY(float): Creatures per cell of sparse worlds
+
+    Methods:
+        cases: Returns parameters of all benchmark cases
+        run: Runs all cases and returns their results
+        measure: Runs one case in the current process
+        activity: Returns share of chunks with creatures that are active
+        compare: Returns regressions of results against a baseline
+    """
+    SPARSE_DENSITY = 0.1
+
+    def __init__(self, scales=(1000, 10000, 100000, 1000000), worlds=('dense', 'sparse'), engines=('object', 'array'),
+                 periods=10, warmup=2, seed=0):
+        self.scales = scales
+        self.worlds = worlds
+        self.engines = engines
+        self.periods = periods
+        self.warmup = warmup
+        self.seed = seed
+
+    def cases(self):
+        """Returns parameters of all benchmark cases"""
+        cases = list()
+        for engine in self.engines:
+            for world in self.worlds:
+                for creatures in self.scales:
+                    territory = 100 if world == 'dense' else int(np.ceil(np.sqrt(creatures / self.SPARSE_DENSITY)))
+                    cases.append({'engine': engine, 'world': world, 'creatures': creatures, 'territory': territory,
+                                  'periods': self.periods, 'warmup': self.warmup, 'seed': self.seed})
+        return cases
+
+    def run(self, verbose=True):
+        """Runs every case in a fresh process and returns their results"""
+        context = multiprocessing.get_context('spawn')
+        results = list()
+        for case in self.cases():
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(target=Benchmark.measure, args=(case, child_connection))
+            process.start()
+            result = parent_connection.recv()
+            process.join()
+            results.append(result)
+            if verbose:
+                print(f'{result["engine"]:>6} {result["world"]:>6} {result["creatures"]:>8}: '
+                      f'generation {result["generation_seconds"]:.3f} s, {result["periods_per_second"]:.2f} periods/s, '
+                      f'{result["bytes_per_creature"]:.0f} B/creature, peak RSS {result["peak_rss"]} B, '
+                      f'active chunks {result["active_chunks"]:.0%}')
+        return results
+
+    @staticmethod
+    def measure(case, connection=None):
+        """Runs one case in the current process. Returns its results or sends them to the connection"""
+        emulation = Emulation(engine=case['engine'], seed=case['seed'], events=EventLog(NullSink()),
+                              territory=case['territory'])
+        emulation.headless = True
+        started = perf_counter()
+        emulation.generate(case['creatures'])
+        generation_seconds = perf_counter() - started
+        bytes_per_creature = emulation.bytes_per_creature()
+
+        # Warm-up periods are not measured
+        for _ in range(case['warmup']):
+            emulation.period()
+        periods = 0
+        started = perf_counter()
+        while periods < case['periods'] and emulation.population() > 0:
+            emulation.period()
+            periods += 1
+        seconds = perf_counter() - started
+        active_chunks = Benchmark.activity(emulation)
+        if emulation.engine == 'tiled':
+            emulation.arrays.close()
+
+        result = dict(case)
+        result.update({
+            'generation_seconds': generation_seconds,
+            'measured_periods': periods,
+            'periods_per_second': periods / seconds if seconds > 0 else 0.0,
+            'final_population': emulation.population(),
+            'active_chunks': active_chunks,
+            'bytes_per_creature': bytes_per_creature,
+            # ru_maxrss is in kilobytes on Linux
+            'peak_rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else None,
+        })
+        if connection is None:
+            return result
+        connection.send(result)
+
+    @staticmethod
+    def activity(emulation):
+        """Returns share of chunks with creatures that are active (hold an animal)"""
+        if emulation.engine == 'object':
+            return emulation.field.active / max(len(emulation.field.chunks), 1)
+        arrays = emulation.arrays.gather() if emulation.engine == 'tiled' else emulation.arrays
+        owner, x, y = arrays.footprint_cells(np.flatnonzero(arrays.alive))
+        chunks = np.unique(Placement.pack(x // Field.CHUNK_SIZE, y // Field.CHUNK_SIZE))
+        return len(arrays.active_chunks(owner, x, y)) / max(len(chunks), 1)
+
+    @staticmethod
+    def compare(results, baseline, tolerance=0.2):
+        """
+        Returns regressions of results against baseline results: slower generation or periods, more memory.
+        Differences within the tolerance (a fraction of the baseline value) are ignored
+        """
+        key = ('engine', 'world', 'creatures')
+        baseline = {tuple(result[name] for name in key): result for result in baseline}
+        regressions = list()
+        for result in results:
+            reference = baseline.get(tuple(result[name] for name in key))
+            if reference is None:
+                continue
+            for metric, higher_is_better in (('generation_seconds', False), ('periods_per_second', True),
+                                             ('bytes_per_creature', False), ('peak_rss', False)):
+                new, old = result[metric], reference[metric]
+                if new is None or old is None or old == 0:
+                    continue
+                change = (new - old) / old
+                if (change < -tolerance) if higher_is_better else (change > tolerance):
+                    regressions.append({name: result[name] for name in key} |
+                                       {'metric': metric, 'baseline': old, 'value': new, 'change': change})
+        return regressions
+
+
+def main(arguments=None):
+    """Command line interface: plays the game or runs an ensemble of emulations"""
+    parser = argparse.ArgumentParser(description='Game "Life"')
+    commands = parser.add_subparsers(dest='command')
+    ensemble = commands.add_parser('ensemble', help='run many independent emulations in parallel')
+    ensemble.add_argument('--runs', type=int, default=100)
+    ensemble.add_argument('--creatures', type=int, default=10000)
+    ensemble.add_argument('--periods', type=int, default=200)
+    ensemble.add_argument('--engine', choices=('object', 'array'), default='array')
+    ensemble.add_argument('--seed', type=int, default=0)
+    ensemble.add_argument('--workers', type=int, default=None)
+    ensemble.add_argument('--output', default='ensemble')
+    benchmark = commands.add_parser('benchmark', help='measure generation time, periods per second and memory')
+    benchmark.add_argument('--scales', type=int, nargs='+', default=[1000, 10000, 100000, 1000000])
+    benchmark.add_argument('--worlds', nargs='+', choices=('dense', 'sparse'), default=['dense', 'sparse'])
+    benchmark.add_argument('--engines', nargs='+', choices=('object', 'array', 'tiled'), default=['object', 'array'])
+    benchmark.add_argument('--periods', type=int, default=10)
+    benchmark.add_argument('--warmup', type=int, default=2)
+    benchmark.add_argument('--seed', type=int, default=0)
+    benchmark.add_argument('--output', default='benchmark.json')
+    benchmark.add_argument('--baseline', default=None, help='results of a previous benchmark to compare with')
+    benchmark.add_argument('--tolerance', type=float, default=0.2)
+    profile = commands.add_parser('profile', help='show where periods spend their time')
+    profile.add_argument('--creatures', type=int, default=10000)
+    profile.add_argument('--periods', type=int, default=10)
+    profile.add_argument('--engine', choices=('object', 'array'), default='object')
+    profile.add_argument('--seed', type=int, default=0)
+    profile.add_argument('--cprofile', default=None, help='file of cProfile statistics of the chosen ticks')
+    profile.add_argument('--ticks', type=int, nargs='+', default=None)
+    render = commands.add_parser('render', help='emulate without window and write frames of the field')
+    render.add_argument('--creatures', type=int, default=10000)
+    render.add_argument('--periods', type=int, default=50)
+    render.add_argument('--engine', choices=('object', 'array'), default='object')
+    render.add_argument('--seed', type=int, default=0)
+    render.add_argument('--frames', default=None, help='directory of PNG frames')
+    render.add_argument('--gif', default='life.gif')
+    render.add_argument('--scale', type=int, default=4)
+    serve = commands.add_parser('serve', help='emulate and stream changes of each period to local viewers')
+    serve.add_argument('--creatures', type=int, default=10000)
+    serve.add_argument('--periods', type=int, default=None)
+    serve.add_argument('--engine', choices=('object', 'array'), default='object')
+    serve.add_argument('--seed', type=int, default=0)
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--unix', default=None, help='path of a Unix socket instead of TCP')
+    serve.add_argument('--policy', choices=StreamServer.POLICIES, default='coalesce',
+                       help='what to do with frames of a slow viewer')
+    record = commands.add_parser('record', help='emulate headless and write a replay log')
+    record.add_argument('--creatures', type=int, default=10000)
+    record.add_argument('--periods', type=int, default=None)
+    record.add_argument('--engine', choices=('object', 'array'), default='object')
+    record.add_argument('--seed', type=int, default=0)
+    record.add_argument('--output', default='replay', help='directory of the replay log')
+    record.add_argument('--keyframes', type=int, default=500, help='ticks between keyframes')
+    replay = commands.add_parser('replay', help='jump to a tick of a replay log and continue the emulation')
+    replay.add_argument('log', help='directory of the replay log')
+    replay.add_argument('--tick', type=int, required=True)
+    replay.add_argument('--verify', action='store_true', help='check the whole log up to the tick')
+    replay.add_argument('--watch', type=int, default=0, help='periods to emulate with prints after the tick')
+    history = commands.add_parser('history', help='emulate headless and write grids of the field of every tick')
+    history.add_argument('--creatures', type=int, default=10000)
+    history.add_argument('--periods', type=int, default=200)
+    history.add_argument('--engine', choices=('object', 'array'), default='object')
+    history.add_argument('--seed', type=int, default=0)
+    history.add_argument('--output', default='history.bin')
+    history.add_argument('--ring', type=int, default=None, help='keep only the last RING ticks, all ticks by default')
+    arguments = parser.parse_args(arguments)
+
+    if arguments.command == 'ensemble':
+        summary = Ensemble(runs=arguments.runs, number_of_creatures=arguments.creatures, periods=arguments.periods,
+                           engine=arguments.engine, seed=arguments.seed, workers=arguments.workers,
+                           output=arguments.output).run()
+        print(f'Finished runs: {summary["runs"]}')
+        for species, name in enumerate(SPECIES_NAMES):
+            final = summary['mean'][-1, species]
+            error = summary['ci_high'][-1, species] - final
+            print(f'{name}: final population {final:.1f} ± {error:.1f}, '
+                  f'mean extinction period {summary["extinction_mean"][species]:.1f}')
+    elif arguments.command == 'benchmark':
+        results = Benchmark(scales=arguments.scales, worlds=arguments.worlds, engines=arguments.engines,
+                            periods=arguments.periods, warmup=arguments.warmup, seed=arguments.seed).run()
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+        if arguments.baseline is not None:
+            with open(arguments.baseline) as file:
+                regressions = Benchmark.compare(results, json.load(file), arguments.tolerance)
+            for regression in regressions:
+                print(f'Regression of {regression["metric"]} ({regression["engine"]}, {regression["world"]}, '
+                      f'{regression["creatures"]}): {regression["baseline"]:.4g} -> {regression["value"]:.4g} '
+                      f'({regression["change"]:+.1%})')
+            if regressions:
+                sys.exit(1)
+    elif arguments.command == 'profile':
+        emulation = Emulation(engine=arguments.engine, seed=arguments.seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        emulation.generate(arguments.creatures)
+        instruments = Instruments()
+        if arguments.cprofile is not None:
+            instruments.add_hook(ProfilerHook(arguments.cprofile), arguments.ticks)
+        emulation.instrument(instruments)
+        emulation.run(arguments.periods)
+        emulation.instrument(None)
+        totals = instruments.totals()
+        print(f'{totals["periods"]} periods, {totals["seconds"]:.3f} s')
+        for name, (seconds, calls) in sorted(totals['phases'].items(), key=lambda item: -item[1][0]):
+            print(f'{name:>16}: {seconds:.3f} s, {calls} calls')
+        for counter, values in zip(Instruments.COUNTERS, totals['counters']):
+            print(f'{counter:>16}: ' + ', '.join(f'{name} {value}' for name, value in zip(SPECIES_NAMES, values)))
+        print(f'Chunk allocations: {totals["chunk_allocations"]}')
+    elif arguments.command == 'render':
+        emulation = Emulation(engine=arguments.engine, seed=arguments.seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        emulation.renderer = Renderer(output=arguments.frames, gif=arguments.gif, scale=arguments.scale)
+        emulation.generate(arguments.creatures)
+        emulation.run(arguments.periods)
+        print(f'Frames: {emulation.renderer.frames}, decimated periods: {emulation.renderer.decimated}')
+    elif arguments.command == 'serve':
+        emulation = Emulation(engine=arguments.engine, seed=arguments.seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        server = StreamServer(host=arguments.host, port=arguments.port, path=arguments.unix, policy=arguments.policy)
+        emulation.broadcast(server)
+        print(f'Streaming on {arguments.unix if arguments.unix else f"{server.host}:{server.port}"}')
+        emulation.generate(arguments.creatures)
+        emulation.run(arguments.periods)
+    elif arguments.command == 'record':
+        emulation = Emulation(engine=arguments.engine, seed=arguments.seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        emulation.generate(arguments.creatures)
+        emulation.record(ReplayLog(arguments.output, keyframe_period=arguments.keyframes))
+        emulation.run(arguments.periods)
+        print(f'Recorded {emulation.tick} periods to {arguments.output}')
+    elif arguments.command == 'replay':
+        log = ReplayLog(arguments.log)
+        if arguments.verify:
+            diverged = log.verify(end=arguments.tick)
+            print('Replay matches the log' if diverged is None else f'Replay diverged from the log at tick {diverged}')
+            if diverged is not None:
+                sys.exit(1)
+        emulation = log.seek(arguments.tick)
+        counts = emulation.species_counts()
+        print(f'Tick {emulation.tick}: ' + ', '.join(f'{name} {count}' for name, count in zip(SPECIES_NAMES, counts)))
+        if arguments.watch:
+            # Events of the fast-forwarded periods were not printed
+            emulation.headless = False
+            emulation.events = EventLog(PrintSink())
+            emulation.events.tick = emulation.tick
+            (emulation.arrays if emulation.engine == 'array' else emulation.world).events = emulation.events
+            emulation.run(emulation.tick + arguments.watch)
+    elif arguments.command == 'history':
+        emulation = Emulation(engine=arguments.engine, seed=arguments.seed, events=EventLog(NullSink()))
+        emulation.headless = True
+        emulation.generate(arguments.creatures)
+        if arguments.ring is None:
+            emulation.keep_history(History(arguments.output, ring=False))
+        else:
+            emulation.keep_history(History(arguments.output, capacity=arguments.ring))
+        emulation.run(arguments.periods)
+        history = History.open(arguments.output)
+        first, last = history.ticks()
+        print(f'Ticks {first} - {last} in {arguments.output} ({os.path.getsize(arguments.output)} bytes)')
+        # Occupied cells by color of the last tick
+        counts = np.bincount(history.frame(last).ravel(), minlength=len(Renderer.COLORS))
+        print(', '.join(f'{name} {count}' for name, count in zip(SPECIES_NAMES + ('Mixed',), counts[1:])) + ' cells')
+    else:
+        Emulation().start()
 
 
-Emulation().start()
+if __name__ == '__main__':
+    main()
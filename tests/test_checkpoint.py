@@ -0,0 +1,36 @@
+import pytest
+
+from main import Emulation
+
+
+def emulation(engine, creatures=2000, periods=5):
+    emulation = Emulation(engine=engine, seed=7, territory=60)
+    emulation.headless = True
+    emulation.generate(creatures)
+    for _ in range(periods):
+        emulation.period()
+    return emulation
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_loaded_checkpoint_continues_identically(engine, tmp_path):
+    saved = emulation(engine)
+    saved.save(tmp_path / 'checkpoint.npz')
+    loaded = Emulation.load(tmp_path / 'checkpoint.npz')
+    assert loaded.tick == saved.tick
+    assert loaded.checksum() == saved.checksum()
+    for _ in range(5):
+        saved.period()
+        loaded.period()
+        assert loaded.checksum() == saved.checksum()
+    assert loaded.species_counts().tolist() == saved.species_counts().tolist()
+
+
+def test_memory_mapped_checkpoint_continues_identically(tmp_path):
+    saved = emulation('array')
+    saved.save(tmp_path / 'checkpoint.npz')
+    loaded = Emulation.load(tmp_path / 'checkpoint.npz', mmap=True)
+    for _ in range(3):
+        saved.period()
+        loaded.period()
+    assert loaded.checksum() == saved.checksum()
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from main import ArrayEngine, Conflicts, Emulation, RandomStream
+
+
+def greedy_matching(rng, first, second):
+    """Takes proposals one by one in the order of their priorities (the former loop of Conflicts.matching)"""
+    engaged, taken = set(), list()
+    for index in np.argsort(rng.random(len(first))).tolist():
+        if first[index] in engaged or second[index] in engaged:
+            continue
+        engaged.update((first[index], second[index]))
+        taken.append(index)
+    return sorted(taken)
+
+
+def test_matching_in_rounds_equals_greedy_matching():
+    generator = np.random.default_rng(0)
+    for seed in range(100):
+        amount, creatures = int(generator.integers(1, 300)), int(generator.integers(2, 200))
+        first, second = generator.integers(0, creatures, (2, amount))
+        taken = Conflicts.matching(RandomStream(seed), first, second)
+        assert taken.tolist() == greedy_matching(RandomStream(seed), first.tolist(), second.tolist())
+        engaged = np.concatenate([first[taken], second[taken]])
+        assert len(np.unique(engaged)) == len(engaged) - (first[taken] == second[taken]).sum()
+
+
+def test_claims_select_one_proposal_of_each_target():
+    targets = np.array([3, 1, 3, 2, 1, 3])
+    taken = Conflicts.claims(RandomStream(0), targets)
+    assert sorted(targets[taken].tolist()) == [1, 2, 3]
+
+
+def run_shuffled(engine, shuffle, periods=4):
+    """Returns checksum of an emulation whose creatures are shuffled before each interaction phase"""
+    emulation = Emulation(engine=engine, seed=9, territory=40)
+    emulation.headless = True
+    emulation.generate(3000)
+    generator = np.random.default_rng(1)
+    if engine == 'object':
+        def interaction_phase():
+            if shuffle:
+                # Creatures meet in the order of chunks and of the occupants of each cell
+                field = emulation.field
+                chunks = list(field.chunks.items())
+                field.chunks = dict(chunks[index] for index in generator.permutation(len(chunks)))
+                for _, chunk in chunks:
+                    for cell in chunk.cells:
+                        if type(cell) is list:
+                            generator.shuffle(cell)
+            Emulation.interaction_phase(emulation)
+        emulation.interaction_phase = interaction_phase
+    else:
+        arrays = emulation.arrays
+
+        def interaction_phase():
+            order = generator.permutation(arrays.count) if shuffle else np.arange(arrays.count)
+            for name in ArrayEngine.COLUMNS:
+                setattr(arrays, name, getattr(arrays, name)[order])
+            ArrayEngine.interaction_phase(arrays)
+            # Rows are compared in the order of ids
+            order = np.argsort(arrays.id)
+            for name in ArrayEngine.COLUMNS:
+                setattr(arrays, name, getattr(arrays, name)[order])
+        arrays.interaction_phase = interaction_phase
+    for _ in range(periods):
+        emulation.period()
+    return emulation.checksum()
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_interactions_do_not_depend_on_the_order_of_creatures(engine):
+    assert run_shuffled(engine, shuffle=True) == run_shuffled(engine, shuffle=False)
@@ -0,0 +1,155 @@
+import numpy as np
+import pytest
+
+from main import (Animal, ArrayEngine, Carnivore, Emulation, EventLog, Herbivore, Omnivore, Plant, RandomStream,
+                  RingSink, CARNIVORE, HERBIVORE, OMNIVORE, PLANT)
+
+
+def array_engine(species, x, y, **columns):
+    """Returns ArrayEngine with creatures of size 1 at given anchors, columns override generated attributes"""
+    engine = ArrayEngine(seed=0)
+    engine.add_creatures(np.array(species, dtype=np.int8), np.zeros(len(species)), np.array(x), np.array(y))
+    engine.size[:] = 1
+    for name, values in columns.items():
+        getattr(engine, name)[:] = values
+    return engine
+
+
+def test_array_eat_sums_meals_of_one_animal():
+    engine = array_engine([HERBIVORE, PLANT, PLANT], [5, 5, 5], [5, 5, 5],
+                          mass=[100.0, 40.0, 60.0], hunger=[20.0, 0, 0], toxicity=[False, False, False])
+    engine.eat(engine.cell_index())
+    assert engine.alive.tolist() == [True, False, False]
+    assert engine.mass[0] == 150.0
+    assert engine.hunger[0] == 0.0
+    assert engine.hp[0] == 100.0
+
+
+def test_array_eat_feeds_omnivore_hp():
+    engine = array_engine([OMNIVORE, PLANT, OMNIVORE, PLANT], [5, 5, 9, 9], [5, 5, 9, 9],
+                          mass=[100.0, 100.0, 50.0, 10.0], hunger=[50.0, 0, 50.0, 0], hp=[50.0, 0, 99.0, 0],
+                          toxicity=False)
+    engine.eat(engine.cell_index())
+    assert engine.mass[[0, 2]].tolist() == [150.0, 55.0]
+    assert engine.hunger[[0, 2]].tolist() == [20.0, 47.0]
+    assert engine.hp[[0, 2]].tolist() == [80.0, 100.0]
+
+
+def test_array_eat_skips_meals_after_poisoning():
+    engine = array_engine([OMNIVORE, PLANT, PLANT], [5, 5, 5], [5, 5, 5],
+                          mass=[100.0, 40.0, 60.0], toxicity=[False, True, False])
+    engine.eat(engine.cell_index())
+    assert engine.alive.tolist() == [False, True, True]
+    assert engine.mass[0] == 100.0
+
+
+def object_emulation(seed=0):
+    """Returns an 'object' emulation with an empty generated world"""
+    emulation = Emulation(engine='object', seed=seed, events=EventLog(RingSink(), types=['born']))
+    emulation.headless = True
+    emulation.generate(0)
+    return emulation
+
+
+@pytest.mark.parametrize('age, births', [(Animal.MATURITY, 1), (Animal.MATURITY - 1, 0)])
+def test_object_adults_of_different_sex_mate(age, births):
+    emulation = object_emulation()
+    animals = [Herbivore(emulation.world, age=age) for _ in range(2)]
+    for animal, sex in zip(animals, (True, False)):
+        animal.sex = sex
+        animal.set_position((5, 5))
+    emulation.mating_phase(*emulation.cell_index())
+    assert emulation.population() == 2 + births
+
+
+@pytest.mark.parametrize('age, births', [(Animal.MATURITY, 1), (Animal.MATURITY - 1, 0)])
+def test_array_adults_of_different_sex_mate(age, births):
+    engine = array_engine([HERBIVORE, HERBIVORE], [5, 5], [5, 5], age=age, sex=[True, False])
+    engine.reproduce(engine.cell_index())
+    assert engine.count == 2 + births
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_animals_are_born_in_a_run(engine):
+    born = 0
+    for seed in range(3):
+        events = EventLog(RingSink(), types=['born'])
+        emulation = Emulation(engine=engine, seed=seed, territory=40, events=events)
+        emulation.headless = True
+        emulation.generate(3000)
+        for _ in range(10):
+            emulation.period()
+        events.flush()
+        born += int(np.isin(events.sink.events()['species'], [CARNIVORE, HERBIVORE, OMNIVORE]).sum())
+    assert born > 0
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_fights_of_both_engines_have_the_same_effects(seed):
+    kinds = (Carnivore, Herbivore, Omnivore, Carnivore, Carnivore, Carnivore, Omnivore, Herbivore, Carnivore, Omnivore)
+    mass = [120.0, 80.0, 150.0, 90.0, 60.0, 200.0, 40.0, 110.0, 70.0, 130.0]
+    hunger = [60.0, 10.0, 70.0, 20.0, 80.0, 40.0, 55.0, 5.0, 90.0, 35.0]
+    hp = [90.0, 100.0, 70.0, 60.0, 95.0, 80.0, 50.0, 100.0, 85.0, 75.0]
+    hit = [20, 30, 25, 40, 15, 35, 45, 20, 30, 25]
+    aggressiveness = [0, 0, 0, 0, 50, 0, 0, 0, 0, 0]
+    attackers, defenders = [0, 2, 4, 6, 8], [1, 3, 5, 7, 9]
+
+    emulation = object_emulation()
+    animals = [kind(emulation.world, age=Animal.MATURITY) for kind in kinds]
+    for index, animal in enumerate(animals):
+        animal.set_position((5 * index, 5))
+        animal.mass, animal.hunger, animal.hp, animal.hit = mass[index], hunger[index], hp[index], hit[index]
+        if type(animal) is Carnivore:
+            animal.aggressiveness = aggressiveness[index]
+    emulation.world.rng = RandomStream(seed)
+    emulation.combat([(animals[attacker], animals[defender]) for attacker, defender in zip(attackers, defenders)])
+
+    engine = array_engine([animal.SPECIES for animal in animals], [5 * index for index in range(10)], [5] * 10,
+                          mass=mass, hunger=hunger, hp=hp, hit=hit, aggressiveness=aggressiveness)
+    engine.rng = RandomStream(seed)
+    engine.fight(np.array(attackers), np.array(defenders))
+
+    is_alive = emulation.creatures.is_alive
+    assert [is_alive(animal) for animal in animals] == engine.alive.tolist()
+    for index, animal in enumerate(animals):
+        if engine.alive[index]:
+            assert (animal.hunger, animal.mass, animal.hp) == pytest.approx(
+                (engine.hunger[index], engine.mass[index], engine.hp[index]))
+
+
+def test_eating_of_both_engines_has_the_same_effects():
+    emulation = object_emulation()
+    animals = [Herbivore(emulation.world, age=Animal.MATURITY), Omnivore(emulation.world, age=Animal.MATURITY)]
+    plants = [Plant(emulation.world, age=0) for _ in animals]
+    for index, (animal, plant, mass) in enumerate(zip(animals, plants, (40.0, 100.0))):
+        animal.set_position((10 * index, 5))
+        animal.mass, animal.hunger, animal.hp = 100.0, 50.0, 50.0
+        plant.set_position((10 * index, 5))
+        plant.mass, plant.toxicity = mass, False
+        animal.eat(plant)
+
+    engine = array_engine([HERBIVORE, PLANT, OMNIVORE, PLANT], [0, 0, 10, 10], [5, 5, 5, 5],
+                          mass=[100.0, 40.0, 100.0, 100.0], hunger=50.0, hp=50.0, toxicity=False)
+    engine.eat(engine.cell_index())
+    assert [(animal.hunger, animal.mass, animal.hp) for animal in animals] == pytest.approx(
+        [(engine.hunger[index], engine.mass[index], engine.hp[index]) for index in (0, 2)])
+
+
+def test_object_interactions_come_from_shared_cells():
+    emulation = object_emulation()
+    creatures = [Herbivore(emulation.world, age=1), Plant(emulation.world, age=0), Plant(emulation.world, age=0),
+                 Carnivore(emulation.world, age=1), Herbivore(emulation.world, age=1)]
+    for creature, coordinates in zip(creatures, ((5, 5), (5, 5), (20, 20), (40, 40), (40, 40))):
+        creature.mass, creature.size = 50.0, 1
+        creature.set_position(coordinates)
+    creatures[1].toxicity = False
+    creatures[3].hunger = 60
+    index, indexed = emulation.cell_index()
+    assert sorted(creature.id for creature in indexed) == sorted(creatures[index].id for index in (0, 1, 3, 4))
+    emulation.interaction_phase()
+    is_alive = emulation.creatures.is_alive
+    assert not is_alive(creatures[1])
+    assert is_alive(creatures[2])
+    # The hungry carnivore fought the herbivore: killed it or was repelled and hit
+    assert is_alive(creatures[3])
+    assert (not is_alive(creatures[4])) or (creatures[3].hp < 100)
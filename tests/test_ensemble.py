@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from main import Ensemble, SPECIES_NAMES
+
+
+def test_aggregate_without_finished_runs_raises(tmp_path):
+    ensemble = Ensemble(runs=3, periods=5, output=str(tmp_path))
+    with pytest.raises(ValueError, match='No finished runs'):
+        ensemble.aggregate()
+
+
+def test_aggregate_of_finished_runs(tmp_path):
+    ensemble = Ensemble(runs=3, periods=2, output=str(tmp_path))
+    np.save(ensemble.run_path(0), np.array([[4, 4, 4, 4], [2, 0, 2, 4], [1, 0, 0, 4]], dtype=np.int32))
+    np.save(ensemble.run_path(2), np.array([[4, 4, 4, 4], [2, 2, 0, 4]], dtype=np.int32))
+    summary = ensemble.aggregate()
+    assert int(summary['runs']) == 2
+    assert summary['mean'].shape == (3, len(SPECIES_NAMES))
+    assert summary['mean'][1].tolist() == [2, 1, 1, 4]
+    # The second run is extinct after its last period
+    assert summary['extinction_mean'].tolist() == [2.5, 1.5, 1.5, 2.5]
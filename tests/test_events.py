@@ -0,0 +1,49 @@
+import numpy as np
+
+from main import (ArrayEngine, Emulation, EventLog, Herbivore, PrintSink, RingSink, BORN, COORDINATE_LIMIT, DIED,
+                  HERBIVORE, PLANT)
+
+
+def test_print_sink_writes_batches_at_end_of_period(capsys):
+    events = EventLog(PrintSink())
+    events.emit(BORN, 1, HERBIVORE)
+    events.emit(DIED, 2, PLANT)
+    assert capsys.readouterr().out == ''
+    events.end_period()
+    assert capsys.readouterr().out == 'Herbivore born!\nCreature Plant died\n'
+
+
+def test_ring_sink_waits_for_full_batch():
+    sink = RingSink(capacity=16)
+    events = EventLog(sink)
+    events.emit(BORN, 1, HERBIVORE)
+    events.end_period()
+    assert sink.written == 0
+    events.flush()
+    assert sink.events()['creature'].tolist() == [1]
+
+
+def test_object_move_out_of_the_field_is_not_logged():
+    emulation = Emulation(engine='object', seed=0, events=EventLog(RingSink(), types=['relocated']))
+    emulation.headless = True
+    emulation.generate(0)
+    herbivore = Herbivore(emulation.world, age=1)
+    herbivore.set_position((5, 5))
+    emulation.world.herds[herbivore.id] = (1, 2 * COORDINATE_LIMIT, 0)
+    herbivore.relocate()
+    emulation.world.herds[herbivore.id] = (1, 0, 0)
+    herbivore.relocate()
+    emulation.events.flush()
+    assert emulation.events.sink.events()['creature'].tolist() == [herbivore.id]
+
+
+def test_array_move_out_of_the_field_is_not_logged():
+    engine = ArrayEngine(seed=0, events=EventLog(RingSink(), types=['relocated']))
+    engine.add_creatures(np.array([HERBIVORE] * 20, dtype=np.int8), np.zeros(20), np.arange(20) * 5, np.zeros(20))
+    engine.find_herds()
+    engine.herd_step_x[:10] = 2 * COORDINATE_LIMIT
+    engine.relocate(np.arange(20))
+    engine.events.flush()
+    relocated = engine.events.sink.events()['creature']
+    assert len(relocated) > 0
+    assert np.isin(relocated, engine.id[10:]).all()
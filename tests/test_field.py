@@ -0,0 +1,57 @@
+from main import Emulation, Field, Herbivore, Plant
+
+
+def object_world():
+    emulation = Emulation(engine='object', seed=0)
+    emulation.headless = True
+    emulation.generate(0)
+    return emulation
+
+
+def placed(creature, coordinates):
+    creature.mass, creature.size = 50.0, 1
+    creature.set_position(coordinates)
+    return creature
+
+
+def test_shared_cells_of_sleeping_chunks_are_skipped_until_an_animal_wakes_them():
+    emulation = object_world()
+    world, field = emulation.world, emulation.world.field
+    plants = [placed(Plant(world, age=0), (3, 3)) for _ in range(2)]
+    herbivore = placed(Herbivore(world, age=1), (3 * Field.CHUNK_SIZE, 3))
+    assert field.active_chunks() == [(3, 0)]
+    assert field.shared_cells() == ([], [], [])
+
+    # Relocation into the chunk of the plants wakes it and leaves the old chunk sleeping
+    world.position.change_position(herbivore, [3, 3])
+    assert field.active_chunks() == [(0, 0)]
+    ids, x, y = field.shared_cells()
+    assert sorted(ids) == sorted(creature.id for creature in plants + [herbivore])
+    assert set(zip(x, y)) == {(3, 3)}
+    assert len(emulation.cell_index()[1]) == 3
+
+    world.position.change_position(herbivore, [3 * Field.CHUNK_SIZE, 3])
+    assert field.shared_cells() == ([], [], [])
+
+
+def test_chunks_are_allocated_at_negative_coordinates_and_freed_when_empty():
+    emulation = object_world()
+    world, field = emulation.world, emulation.world.field
+    cell = (-1, -Field.CHUNK_SIZE - 1)
+    plant = placed(Plant(world, age=0), cell)
+    assert list(field.chunks) == [(-1, -2)]
+    assert field.locate(cell) == ((-1, -2), Field.CHUNK_SIZE * Field.CHUNK_SIZE - 1)
+    # A plant is a handle of its slot, handles of one plant are equal
+    assert field.get_cell(cell) == plant
+    assert field.is_empty((0, cell[1]))
+    assert field.occupied_positions() == [cell]
+
+    # Two creatures share a cell as a list of ids
+    other = placed(Plant(world, age=0), cell)
+    assert field.get_cell(cell) == [plant, other]
+    assert field.occupied_cells() == 1
+    plant.die()
+    assert field.get_cell(cell) == other
+    other.die()
+    assert field.chunks == {} and field.occupied_cells() == 0
+    assert field.allocated == 1
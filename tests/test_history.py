@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from main import Emulation, History
+
+
+def grid(emulation, bounds):
+    """Returns the grid of colors of the occupied cells of an emulation inside bounds"""
+    result = np.zeros((bounds[2], bounds[3]), dtype=np.uint8)
+    x, y, values = emulation.occupied_cells()
+    x, y = x - bounds[0], y - bounds[1]
+    visible = (x >= 0) & (x < bounds[2]) & (y >= 0) & (y < bounds[3])
+    result[x[visible], y[visible]] = values[visible]
+    return result
+
+
+def recorded(engine, history, periods):
+    """Runs an emulation that keeps a history and returns the expected grids of all ticks"""
+    emulation = Emulation(engine=engine, seed=4, territory=40)
+    emulation.headless = True
+    emulation.generate(600)
+    emulation.keep_history(history)
+    expected = [grid(emulation, history.bounds)]
+    for _ in range(periods):
+        emulation.period()
+        expected.append(grid(emulation, history.bounds))
+    return emulation, np.array(expected)
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_ring_keeps_the_last_ticks(engine, tmp_path):
+    path = str(tmp_path / 'history.bin')
+    history = History(path, bounds=(-5, 10, 30, 20), capacity=4)
+    emulation, expected = recorded(engine, history, 9)
+    assert history.ticks() == (6, 9)
+    assert history.grids.shape == (4, 30, 20)
+    # Tick 8 is written into the first slot again, so the range of the ring wraps around the end of the file
+    assert history.slot(6) == 2 and history.slot(8) == 0
+    assert (history.frames() == expected[6:]).all()
+    for tick in range(6, 10):
+        assert (history.frame(tick) == expected[tick]).all()
+    with pytest.raises(AssertionError):
+        history.frame(5)
+    emulation.keep_history()
+
+    reader = History.open(path)
+    assert (reader.ring, reader.bounds, reader.capacity) == (True, (-5, 10, 30, 20), 4)
+    assert reader.ticks() == (6, 9)
+    assert (reader.frames(7, 9) == expected[7:9]).all()
+    window = reader.window(0, 12, 10, 5, 6, 10)
+    assert window.shape == (4, 10, 5)
+    assert (window == expected[6:, 5:15, 2:7]).all()
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_append_only_file_grows_and_readers_follow_it(engine, tmp_path):
+    path = str(tmp_path / 'history.bin')
+    history = History(path, capacity=2, ring=False)
+    emulation, expected = recorded(engine, history, 4)
+    reader = History.open(path)
+    assert reader.capacity == 8 and reader.ticks() == (0, 4)
+    assert (reader.frames() == expected).all()
+
+    # The reader maps the file again once it has doubled
+    for _ in range(5):
+        emulation.period()
+        expected = np.append(expected, grid(emulation, history.bounds)[None], axis=0)
+    assert history.capacity == 16
+    assert reader.ticks() == (0, 9) and reader.capacity == 16
+    assert isinstance(reader.frames(), np.memmap)
+    assert (reader.frames() == expected).all()
+    assert (reader.window(10, 20, 15, 5, 3, 7) == expected[3:7, 10:25, 20:25]).all()
+    emulation.keep_history()
+    assert (History.open(path).frame(9) == expected[9]).all()
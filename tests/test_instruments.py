@@ -0,0 +1,55 @@
+import pytest
+
+from main import ArrayEngine, Emulation, Instruments, Position
+
+
+def generated(engine, seed=5):
+    emulation = Emulation(engine=engine, seed=seed, territory=40)
+    emulation.headless = True
+    emulation.generate(2000)
+    return emulation
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_only_the_instrumented_emulation_is_counted(engine):
+    instrumented, other = generated(engine), generated(engine)
+    instruments = Instruments()
+    instrumented.instrument(instruments)
+    for _ in range(3):
+        other.period()
+    assert instruments.phases == dict()
+    for _ in range(3):
+        instrumented.period()
+    totals = instruments.totals()
+    assert totals['periods'] == 3
+    assert totals['phases']['find_herds'][1] == 3
+    assert totals['counters'].sum() > 0
+    assert other.instruments is None
+
+
+def test_disable_in_any_order_restores_methods():
+    first, second = generated('object'), generated('array')
+    methods = (Emulation.combat, Emulation.move_phase, ArrayEngine.fight, Position.change_position)
+    first.instrument(Instruments())
+    second.instrument(Instruments())
+    first.instrument(None)
+    second.instrument(None)
+    assert (Emulation.combat, Emulation.move_phase, ArrayEngine.fight, Position.change_position) == methods
+    for instance in (first, second, second.arrays, first.world.position):
+        assert not any(callable(value) for value in vars(instance).values())
+    assert first.world.instruments is None
+
+
+def test_object_births_deaths_and_chunks_are_counted():
+    emulation = generated('object')
+    instruments = Instruments()
+    emulation.instrument(instruments)
+    population = emulation.population()
+    for _ in range(3):
+        emulation.period()
+    totals = instruments.totals()
+    births = totals['counters'][1].sum()
+    deaths = totals['counters'][2:].sum()
+    assert births > 0
+    assert population + births - deaths == emulation.population()
+    assert totals['chunk_allocations'] >= 0
@@ -0,0 +1,17 @@
+from main import PLANT, Emulation
+
+# Bytes per creature measured by tracemalloc after generating 200000 creatures (seed 1) with the layout
+# before __slots__: a __dict__, a Position object and a list of coordinates for each creature
+BASELINE_BYTES_PER_CREATURE = 436.4
+
+
+def test_object_layout_takes_a_third_of_the_baseline_memory():
+    emulation = Emulation(engine='object', seed=1)
+    emulation.headless = True
+    emulation.generate(200000)
+    registry = emulation.creatures
+    # Plants are columns, the registry keeps objects of animals only
+    assert all(creature is None or creature.SPECIES != PLANT for creature in registry.slots)
+    plants = emulation.species_counts()[PLANT]
+    assert plants == sum(registry.plants.alive) > 0
+    assert emulation.bytes_per_creature() * 3 <= BASELINE_BYTES_PER_CREATURE
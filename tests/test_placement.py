@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from main import Emulation, Placement, RandomStream
+
+
+def overlapping_cells(x, y, size):
+    _, cell_x, cell_y = Placement.footprint_cells(x, y, size)
+    keys = Placement.pack(cell_x, cell_y)
+    return len(keys) - len(np.unique(keys))
+
+
+@pytest.mark.parametrize('number, territory', [(4000, 100), (4800, 100), (36000, 300)])
+def test_scatter_places_without_overlaps_while_there_is_room(number, territory):
+    rng = RandomStream(1)
+    size = rng.randint(0, 300, size=number) // 100 + 1
+    assert size.sum() <= territory * (territory + 2)
+    x, y = Placement.scatter(rng, size, territory)
+    assert overlapping_cells(x, y, size) == 0
+    assert 0 <= x.min() and x.max() < territory
+    assert 0 <= y.min() and y.max() < territory
+
+
+def test_scatter_fills_every_anchor_cell_before_stacking():
+    size = np.full(40 * 42, 1)
+    x, y = Placement.scatter(RandomStream(2), size, 40)
+    # Anchors are within the territory, so rows -1 and 40 stay free for bigger footprints
+    assert overlapping_cells(x, y, size) == 40 * 2
+
+
+def test_scatter_stacks_only_creatures_that_do_not_fit():
+    rng = RandomStream(3)
+    size = rng.randint(0, 300, size=6000) // 100 + 1
+    x, y = Placement.scatter(rng, size, 100)
+    _, cell_x, cell_y = Placement.footprint_cells(x, y, size)
+    # Every cell of the territory is taken before creatures are stacked
+    assert len(np.unique(Placement.pack(cell_x, cell_y))) >= 100 * 100
+
+
+def test_generated_object_world_has_no_stacked_cells():
+    emulation = Emulation(engine='object', seed=4, territory=100)
+    emulation.headless = True
+    emulation.generate(4000)
+    cells = [cell for chunk in emulation.field.chunks.values() for cell in chunk.cells]
+    assert not any(type(cell) is list for cell in cells)
@@ -0,0 +1,40 @@
+import numpy as np
+
+from main import Emulation, Plant, RandomStream
+
+
+def test_lazy_mass_equals_growth_period_by_period():
+    shoots = list()
+    for seed in range(5):
+        emulation = Emulation(engine='object', seed=seed)
+        emulation.headless = True
+        emulation.generate(0)
+        world = emulation.world
+        plant = Plant(world, age=0)
+        plant.set_position((0, 0))
+        plant.mass = 20
+        mass = 20
+        for tick in range(1, Plant.LIFESPAN):
+            next_shoot = plant.next_shoot
+            emulation.tick = world.tick = tick
+            emulation.scheduled_phase()
+            # A period of the plant either reproduces at the scheduled shoot without growing or grows its mass
+            if tick == next_shoot:
+                shoots.append(tick)
+                assert plant.next_shoot > tick or plant.next_shoot == -1
+            else:
+                mass = min(mass + Plant.GROWTH, Plant.MAX_MASS)
+            assert plant.mass == mass
+    assert len(shoots) > 0
+
+
+def test_geometric_shoots_have_the_probability_of_a_draw_each_period():
+    # The tick of the next shoot is the first of the periods that reproduce with SHOOT_PROBABILITY
+    gaps = RandomStream(1).geometric(Plant.SHOOT_PROBABILITY, size=100000)
+    rng = RandomStream(2)
+    scalar = np.array([rng.geometric(Plant.SHOOT_PROBABILITY) for _ in range(100000)])
+    for sample in (gaps, scalar):
+        assert sample.min() >= 1
+        assert abs(sample.mean() - 1 / Plant.SHOOT_PROBABILITY) < 0.15
+        assert abs((sample == 1).mean() - Plant.SHOOT_PROBABILITY) < 0.005
+        assert abs((sample > 5).mean() - (1 - Plant.SHOOT_PROBABILITY) ** 5) < 0.005
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from main import Emulation, RandomStream
+
+
+def test_random_stream_repeats_draws_of_a_seed():
+    first, second = RandomStream(3), RandomStream(3)
+    draws = [(stream.random(), stream.randint(0, 10), stream.geometric(0.1), stream.random(5).tolist(),
+              stream.randint(15, 45, size=4).tolist()) for stream in (first, second)]
+    assert draws[0] == draws[1]
+    assert RandomStream(4).random() != RandomStream(3).random()
+
+
+def test_random_stream_continues_from_its_state():
+    stream = RandomStream(5)
+    for _ in range(RandomStream.BLOCK_SIZE + 10):
+        stream.random()
+    generator_state, buffer, index = stream.get_state()
+    expected = [stream.random() for _ in range(RandomStream.BLOCK_SIZE)] + stream.random(3).tolist()
+    restored = RandomStream()
+    restored.set_state(generator_state, buffer, index)
+    assert [restored.random() for _ in range(RandomStream.BLOCK_SIZE)] + restored.random(3).tolist() == expected
+
+
+def test_scalar_randint_stays_in_range():
+    stream = RandomStream(6)
+    draws = np.array([stream.randint(-5, 5) for _ in range(10000)])
+    assert draws.min() == -5 and draws.max() == 4
+    with pytest.raises(ValueError):
+        stream.randint(0, 0)
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_generation_and_periods_repeat_for_a_seed(engine):
+    checksums = list()
+    for _ in range(2):
+        emulation = Emulation(engine=engine, seed=12, territory=50)
+        emulation.headless = True
+        emulation.generate(2000)
+        generated = emulation.checksum()
+        for _ in range(3):
+            emulation.period()
+        checksums.append((generated, emulation.checksum(), emulation.species_counts().tolist()))
+    assert checksums[0] == checksums[1]
+    other = Emulation(engine=engine, seed=13, territory=50)
+    other.headless = True
+    other.generate(2000)
+    assert other.checksum() != checksums[0][0]
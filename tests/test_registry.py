@@ -0,0 +1,59 @@
+from main import CreatureRegistry, Emulation, Herbivore, Plant
+
+
+def object_world():
+    emulation = Emulation(engine='object', seed=0)
+    emulation.headless = True
+    emulation.generate(0)
+    return emulation.world
+
+
+def test_ids_of_reused_slots_get_a_new_generation():
+    world = object_world()
+    registry = world.creatures
+    first, second = Herbivore(world, age=0), Plant(world, age=0)
+    # Plants take slots of PlantColumns
+    assert (first.id, second.id) == (0, CreatureRegistry.PLANT_SLOT)
+    first.die()
+    second.die()
+    # The slot is reused only after compact
+    third = Herbivore(world, age=0)
+    assert third.id == 1
+    assert Plant(world, age=0).id == CreatureRegistry.PLANT_SLOT | 1
+    registry.compact()
+    fourth, plant = Herbivore(world, age=0), Plant(world, age=0)
+    assert fourth.id == (1 << CreatureRegistry.SLOT_BITS) | 0
+    assert plant.id == (1 << CreatureRegistry.SLOT_BITS) | CreatureRegistry.PLANT_SLOT
+    # A stale handle does not resolve to the creature that reused the slot
+    assert registry.get(first.id) is None
+    assert registry.get(fourth.id) is fourth
+    assert registry.get(second.id) is None and not registry.is_alive(second)
+    assert registry.get(plant.id) == plant and registry.is_alive(plant)
+    assert not registry.is_alive(first)
+    assert len(registry) == 4
+
+
+def test_compact_drops_dead_animals_from_active_creatures():
+    world = object_world()
+    registry = world.creatures
+    animals = [Herbivore(world, age=0) for _ in range(3)]
+    Plant(world, age=0)
+    animals[1].die()
+    assert list(registry.active_creatures()) == [animals[0], animals[2]]
+    assert len(registry.active) == 3
+    registry.compact()
+    assert registry.active == [animals[0], animals[2]]
+    assert registry.free_slots == [animals[1].id]
+
+
+def test_iteration_skips_creatures_died_and_born_during_it():
+    world = object_world()
+    registry = world.creatures
+    creatures = [Herbivore(world, age=0) for _ in range(3)]
+    visited = list()
+    for creature in registry:
+        visited.append(creature)
+        if creature is creatures[0]:
+            creatures[1].die()
+            Herbivore(world, age=0)
+    assert visited == [creatures[0], creatures[2]]
@@ -0,0 +1,148 @@
+import struct
+import threading
+import zlib
+
+import numpy as np
+import pytest
+
+from main import Emulation, Renderer
+
+
+def read_png(path):
+    """Returns the RGB image (height, width, 3) of a PNG file written by Renderer.write_png"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert data[:8] == b'\x89PNG\r\n\x1a\n'
+    position, chunks = 8, dict()
+    while position < len(data):
+        length, kind = struct.unpack('>I4s', data[position:position + 8])
+        body = data[position + 8:position + 8 + length]
+        assert struct.unpack('>I', data[position + 8 + length:position + 12 + length])[0] == zlib.crc32(kind + body)
+        chunks[kind] = chunks.get(kind, b'') + body
+        position += 12 + length
+    width, height, depth, color = struct.unpack('>IIBB', chunks[b'IHDR'][:10])
+    assert (depth, color) == (8, 2)
+    rows = np.frombuffer(zlib.decompress(chunks[b'IDAT']), dtype=np.uint8).reshape(height, 1 + 3 * width)
+    assert (rows[:, 0] == 0).all()
+    return rows[:, 1:].reshape(height, width, 3)
+
+
+def lzw_decode(data, minimum_size):
+    """Decodes GIF LZW data into palette indexes"""
+    bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), bitorder='little')
+    clear, end = 1 << minimum_size, (1 << minimum_size) + 1
+    table, size, position, previous, output = None, minimum_size + 1, 0, None, list()
+    while position + size <= len(bits):
+        code = int(np.dot(bits[position:position + size], 1 << np.arange(size)))
+        position += size
+        if code == clear:
+            table, size, previous = [[index] for index in range(clear)] + [None, None], minimum_size + 1, None
+            continue
+        if code == end:
+            break
+        entry = table[code] if code < len(table) else table[previous] + table[previous][:1]
+        output.extend(entry)
+        if previous is not None:
+            table.append(table[previous] + entry[:1])
+            if len(table) == 1 << size and size < 12:
+                size += 1
+        previous = code
+    return output
+
+
+def read_gif(path):
+    """Returns frames of palette indexes (height, width) and the palette of a GIF file"""
+    with open(path, 'rb') as file:
+        data = file.read()
+    assert data[:6] == b'GIF89a'
+    width, height, flags = struct.unpack('<HHB', data[6:11])
+    palette_size = 2 << (flags & 7)
+    palette = np.frombuffer(data[13:13 + 3 * palette_size], dtype=np.uint8).reshape(-1, 3)
+    position, frames = 13 + 3 * palette_size, list()
+    while data[position] != 0x3b:
+        if data[position] == 0x21:
+            # An extension is a label and sub-blocks
+            position += 2
+            while data[position]:
+                position += data[position] + 1
+            position += 1
+            continue
+        assert data[position] == 0x2c
+        frame_width, frame_height = struct.unpack('<HH', data[position + 5:position + 9])
+        minimum_size, position = data[position + 10], position + 11
+        body = b''
+        while data[position]:
+            body += data[position + 1:position + 1 + data[position]]
+            position += data[position] + 1
+        position += 1
+        indexes = lzw_decode(body, minimum_size)
+        frames.append(np.array(indexes[:frame_width * frame_height], dtype=np.uint8).reshape(frame_height, frame_width))
+    return frames, palette
+
+
+def expected_pixels(emulation, bounds, scale):
+    """Returns palette indexes of the visible area of the occupied cells of an emulation"""
+    grid = np.zeros((bounds[2], bounds[3]), dtype=np.uint8)
+    x, y, values = emulation.occupied_cells()
+    visible = (x >= bounds[0]) & (x < bounds[0] + bounds[2]) & (y >= bounds[1]) & (y < bounds[1] + bounds[3])
+    grid[x[visible] - bounds[0], y[visible] - bounds[1]] = values[visible]
+    return np.repeat(np.repeat(grid.T, scale, axis=0), scale, axis=1)
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_written_png_and_gif_match_occupied_cells(engine, tmp_path):
+    emulation = Emulation(engine=engine, seed=2, territory=30)
+    emulation.headless = True
+    emulation.generate(500)
+    emulation.renderer = Renderer(output=str(tmp_path / 'frames'), gif=str(tmp_path / 'life.gif'), scale=2)
+    emulation.run(6)
+    renderer = emulation.renderer
+    pixels = expected_pixels(emulation, renderer.bounds, renderer.scale)
+    written = sorted(path.name for path in (tmp_path / 'frames').iterdir())
+    # Periods queued behind the renderer are not drawn, the last one always is
+    assert written[-1] == 'frame_000006.png'
+    assert set(written) <= {f'frame_{tick:06d}.png' for tick in range(7)}
+    assert renderer.frames == len(written)
+    assert (read_png(tmp_path / 'frames' / written[-1]) == Renderer.COLORS[pixels]).all()
+    frames, palette = read_gif(tmp_path / 'life.gif')
+    assert len(frames) == renderer.frames
+    assert (palette[:len(Renderer.COLORS)] == Renderer.COLORS).all()
+    assert (frames[-1] == pixels).all()
+
+
+def test_periods_that_do_not_fit_into_the_queue_are_merged(tmp_path):
+    renderer = Renderer(output=str(tmp_path), queue_size=2, scale=1)
+    entered, release = threading.Event(), threading.Event()
+    draw = renderer.draw
+
+    def blocked_draw(tick):
+        entered.set()
+        release.wait()
+        draw(tick)
+    renderer.draw = blocked_draw
+    renderer.start((0, 0, 4, 4))
+    cell = np.zeros(1, dtype=np.int64)
+    renderer.submit(0, cell, cell, np.array([1], dtype=np.uint8), keyframe=True)
+    entered.wait()
+    # The renderer draws the keyframe: two periods fit into the queue, the others are merged into one
+    for tick in range(1, 7):
+        renderer.submit(tick, np.array([tick % 4]), np.array([0]), np.array([tick % 5 + 1], dtype=np.uint8))
+    assert renderer.decimated == 4
+    assert renderer.pending[0] == 6
+    assert sorted(renderer.pending[1].tolist()) == [0, 1, 2, 3]
+    release.set()
+    renderer.close()
+    # The later value of a cell wins: ticks 3 to 6 set cells 3, 0, 1 and 2
+    expected = np.zeros((4, 4), dtype=np.uint8)
+    expected[0, [3, 0, 1, 2]] = [4, 5, 1, 2]
+    assert (read_png(tmp_path / 'frame_000006.png') == Renderer.COLORS[expected]).all()
+
+
+def test_merge_keeps_the_latest_color_of_each_cell():
+    earlier = (1, np.array([0, 1]), np.array([0, 0]), np.array([1, 2], dtype=np.uint8), True)
+    later = (2, np.array([1, 2]), np.array([0, 0]), np.array([3, 4], dtype=np.uint8), False)
+    tick, x, y, values, keyframe = Renderer.merge(earlier, later)
+    assert (tick, keyframe) == (2, True)
+    assert dict(zip(x.tolist(), values.tolist())) == {0: 1, 1: 3, 2: 4}
+    # A keyframe replaces the earlier changes
+    assert Renderer.merge(later, earlier) is earlier
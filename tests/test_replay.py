@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from main import Emulation, ReplayLog
+
+
+def recorded(engine, path, periods=7):
+    """Returns an emulation that recorded periods to a replay log at path"""
+    emulation = Emulation(engine=engine, seed=11, territory=60)
+    emulation.headless = True
+    emulation.generate(2000)
+    emulation.record(ReplayLog(str(path), keyframe_period=3))
+    checksums = {emulation.tick: emulation.checksum()}
+    for _ in range(periods):
+        emulation.period()
+        checksums[emulation.tick] = emulation.checksum()
+    emulation.record(None)
+    return emulation, checksums
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_replay_verifies_and_seeks_recorded_ticks(engine, tmp_path):
+    emulation, checksums = recorded(engine, tmp_path / 'replay')
+    replay = ReplayLog(str(tmp_path / 'replay'))
+    assert replay.keyframes() == [0, 3, 6]
+    assert replay.checksums() == checksums
+    assert replay.verify() is None
+    for tick in (2, 5, 7):
+        assert replay.seek(tick).checksum() == checksums[tick]
+    # The replayed emulation continues like the recorded one
+    continued = replay.seek(7)
+    emulation.period()
+    continued.period()
+    assert continued.checksum() == emulation.checksum()
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+def test_replay_finds_divergence_from_the_log(engine, tmp_path):
+    recorded(engine, tmp_path / 'replay')
+    replay = ReplayLog(str(tmp_path / 'replay'))
+    path = tmp_path / 'replay' / ReplayLog.CHECKSUMS
+    records = np.fromfile(path, dtype=ReplayLog.CHECKSUM_DTYPE)
+    records['checksum'][records['tick'] == 5] += 1
+    records.tofile(path)
+    assert replay.verify() == 5
+    assert replay.verify(start=6) is None
+    with pytest.raises(RuntimeError, match='tick 5'):
+        replay.seek(5)
+    # Seeking after the next keyframe does not replay the diverged tick
+    assert replay.seek(7).tick == 7
@@ -0,0 +1,56 @@
+from main import Emulation, Herbivore, Scheduler, AGE_DEATH, SHOOT
+
+
+def test_events_of_the_wheel_are_due_at_their_ticks_sorted_by_kind_and_id():
+    scheduler = Scheduler()
+    scheduler.schedule(3, AGE_DEATH, 7)
+    scheduler.schedule(3, SHOOT, 1)
+    scheduler.schedule(3, AGE_DEATH, 2)
+    scheduler.schedule(Scheduler.WHEEL_SIZE - 1, SHOOT, 5)
+    assert len(scheduler) == 4
+    assert scheduler.due(1) == [] and scheduler.due(2) == []
+    assert scheduler.due(3) == [(AGE_DEATH, 2), (AGE_DEATH, 7), (SHOOT, 1)]
+    for tick in range(4, Scheduler.WHEEL_SIZE - 1):
+        assert scheduler.due(tick) == []
+    assert scheduler.due(Scheduler.WHEEL_SIZE - 1) == [(SHOOT, 5)]
+    assert len(scheduler) == 0
+
+
+def test_events_beyond_the_wheel_wait_in_the_overflow_heap():
+    scheduler = Scheduler()
+    far = 3 * Scheduler.WHEEL_SIZE + 5
+    scheduler.schedule(far, AGE_DEATH, 4)
+    # The wheel slot of the far tick is reused by a near tick without mixing their events
+    scheduler.schedule(far % Scheduler.WHEEL_SIZE, AGE_DEATH, 9)
+    assert scheduler.overflow == [(far, AGE_DEATH, 4)]
+    due = {tick: scheduler.due(tick) for tick in range(1, far + 1)}
+    assert {tick: events for tick, events in due.items() if events} == {
+        far % Scheduler.WHEEL_SIZE: [(AGE_DEATH, 9)], far: [(AGE_DEATH, 4)]}
+    assert len(scheduler) == 0
+
+
+def test_events_of_past_ticks_are_due_at_the_next_tick():
+    scheduler = Scheduler(tick=10)
+    scheduler.schedule(4, SHOOT, 3)
+    assert scheduler.due(11) == [(SHOOT, 3)]
+
+
+def test_events_of_dead_creatures_are_cancelled_by_their_ids():
+    emulation = Emulation(engine='object', seed=0)
+    emulation.headless = True
+    emulation.generate(0)
+    world = emulation.world
+    dead = Herbivore(world, age=Herbivore.LIFESPAN - 1)
+    dead.set_position((0, 0))
+    dead.die()
+    emulation.creatures.compact()
+    # The newborn reuses the slot of the dead herbivore, whose age death is still due at tick 1
+    newborn = Herbivore(world, age=0)
+    newborn.set_position((0, 0))
+    mask = (1 << emulation.creatures.SLOT_BITS) - 1
+    assert newborn.id & mask == dead.id & mask
+    assert len(world.scheduler) == 2
+    emulation.tick = world.tick = 1
+    emulation.scheduled_phase()
+    assert emulation.creatures.is_alive(newborn)
+    assert emulation.population() == 1
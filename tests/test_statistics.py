@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from main import Emulation, Statistics
+
+
+@pytest.mark.parametrize('engine', ['object', 'array'])
+@pytest.mark.parametrize('suffix', ['.npy', '.csv'])
+def test_time_series_starts_at_tick_0(engine, suffix, tmp_path):
+    emulation = Emulation(engine=engine, seed=2, territory=40)
+    emulation.headless = True
+    emulation.generate(1000)
+    initial = emulation.species_counts().tolist()
+    path = str(tmp_path / ('statistics' + suffix))
+    emulation.collect_statistics(Statistics(path))
+    for _ in range(3):
+        emulation.period()
+    emulation.statistics.close()
+    if suffix == '.npy':
+        series = np.load(path)
+        assert series['tick'].tolist() == [0, 1, 2, 3]
+        assert series['counts'][0].sum(axis=1).tolist() == initial
+    else:
+        with open(path) as file:
+            rows = file.read().splitlines()
+        assert [row.split(',')[0] for row in rows[1:]] == ['0', '1', '2', '3']
+
+
+def test_updated_object_statistics_match_a_new_scan():
+    emulation = Emulation(engine='object', seed=2, territory=40)
+    emulation.headless = True
+    emulation.generate(1000)
+    statistics = Statistics()
+    emulation.collect_statistics(statistics)
+    for _ in range(3):
+        emulation.period()
+    scanned = Statistics()
+    scanned.scan(emulation.creatures, emulation.field)
+    assert statistics.counts == scanned.counts
+    assert statistics.histograms['age'] == scanned.histograms['age']
+    assert np.allclose(statistics.means('mass'), scanned.means('mass'))
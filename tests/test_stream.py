@@ -0,0 +1,119 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from main import SPECIES_NAMES, StreamServer, StreamSubscriber
+
+
+def period(tick, x, y, values, born=(), died=()):
+    """Returns a submitted period with born and died creatures of species 0"""
+    born, died = np.array(born, dtype=np.int64), np.array(died, dtype=np.int64)
+    return (StreamServer.DELTA, tick, np.array(x, dtype=np.int64), np.array(y, dtype=np.int64),
+            np.array(values, dtype=np.uint8), born, np.zeros(len(born), dtype=np.int8), died,
+            np.zeros(len(died), dtype=np.int8), np.arange(len(SPECIES_NAMES), dtype=np.int64) + tick)
+
+
+def random_period(rng, tick, cells):
+    """Returns a period that changes distinct random cells of a 300x300 area"""
+    keys = rng.choice(300 * 300, cells, replace=False)
+    return period(tick, keys % 300 - 150, keys // 300 - 150, rng.integers(0, 5, cells), born=[tick], died=[-tick])
+
+
+def test_encode_and_decode_round_trip():
+    frame = period(7, [-3, 0, 1 << 40], [5, -(1 << 40), 2], [1, 0, 4], born=[10, 11], died=[3])
+    data = StreamServer.encode(frame)
+    assert int.from_bytes(data[:4], 'little') == len(data) - 4
+    decoded = StreamServer.decode(data[4:])
+    assert decoded[:2] == frame[:2]
+    for column, expected in zip(decoded[2:], frame[2:]):
+        assert column.dtype.itemsize == expected.dtype.itemsize
+        assert (column == expected).all()
+
+
+def test_merge_keeps_the_latest_color_of_each_cell():
+    earlier = period(1, [0, 1, 2], [0, 0, 0], [1, 2, 3], born=[5])
+    later = period(2, [1, 2, 3], [0, 0, 0], [4, 0, 2], died=[5])
+    merged = StreamServer.merge(earlier, later)
+    assert merged[:2] == (StreamServer.DELTA, 2)
+    assert dict(zip(zip(merged[2].tolist(), merged[3].tolist()), merged[4].tolist())) == {
+        (0, 0): 1, (1, 0): 4, (2, 0): 0, (3, 0): 2}
+    assert merged[5].tolist() == [5] and merged[7].tolist() == [5]
+    assert (merged[9] == later[9]).all()
+    keyframe = (StreamServer.KEYFRAME, *later[1:])
+    assert StreamServer.merge(earlier, keyframe) is keyframe
+
+
+@pytest.mark.parametrize('policy', StreamServer.POLICIES)
+def test_full_queue_is_coalesced_or_dropped(policy):
+    server = StreamServer(policy=policy, queue_size=2)
+    subscriber = StreamSubscriber(server, writer=None)
+    # A new subscriber gets the period in its keyframe
+    subscriber.offer(period(0, [0], [0], [1]), None)
+    assert (subscriber.dropped, len(subscriber.frames)) == (1, 0)
+    subscriber.stale = False
+    for tick in range(1, 5):
+        subscriber.offer(period(tick, [tick % 2], [0], [tick]), b'')
+    if policy == 'coalesce':
+        # Ticks 3 and 4 are merged into the frame of tick 2, which has to be encoded again
+        assert (subscriber.coalesced, subscriber.dropped) == (2, 1)
+        assert [frame[1] for frame, _ in subscriber.frames] == [1, 4]
+        frame, data = subscriber.frames[-1]
+        assert data is None
+        assert dict(zip(frame[2].tolist(), frame[4].tolist())) == {0: 4, 1: 3}
+    else:
+        # The queue of ticks 1 and 2 is dropped with tick 3, tick 4 goes into the next keyframe
+        assert (subscriber.coalesced, subscriber.dropped) == (0, 5)
+        assert subscriber.stale and not subscriber.frames
+
+
+async def slow_viewer(server, periods):
+    """Connects, submits periods without reading frames, then reads all frames. Returns the frames and subscriber"""
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    frames = [await StreamServer.read_frame(reader)]
+    assert frames[0][0] == StreamServer.KEYFRAME
+    for frame in periods:
+        server.submit(*frame[1:5], *frame[5:])
+    # Waits until the server thread has published all periods while the viewer does not read
+    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(asyncio.sleep(0), server.loop))
+    subscriber, = server.subscribers
+    assert len(subscriber.frames) <= server.queue_size
+    closing = asyncio.get_running_loop().run_in_executor(None, server.close)
+    try:
+        while True:
+            frames.append(await StreamServer.read_frame(reader))
+    except asyncio.IncompleteReadError:
+        pass
+    await closing
+    writer.close()
+    return frames, subscriber
+
+
+@pytest.mark.parametrize('policy', StreamServer.POLICIES)
+def test_slow_viewer_rebuilds_the_state_from_keyframes_and_deltas(policy):
+    rng = np.random.default_rng(0)
+    server = StreamServer(policy=policy, queue_size=2)
+    server.start()
+    server.submit(*period(0, [0, 1], [0, 0], [1, 2])[1:])
+    # Periods are far larger than socket buffers, so the queue of the viewer overflows
+    periods = [random_period(rng, tick, 50000) for tick in range(1, 31)]
+    frames, subscriber = asyncio.run(slow_viewer(server, periods))
+    if policy == 'coalesce':
+        assert subscriber.coalesced > 0 and subscriber.dropped == 0
+    else:
+        assert subscriber.dropped > 0 and subscriber.coalesced == 0
+        assert sum(frame[0] == StreamServer.KEYFRAME for frame in frames) > 1
+
+    cells, born = dict(), list()
+    for kind, tick, x, y, values, frame_born, _, _, _, counts in frames:
+        if kind == StreamServer.KEYFRAME:
+            cells = dict()
+        cells.update(zip(zip(x.tolist(), y.tolist()), values.tolist()))
+        cells = {cell: value for cell, value in cells.items() if value}
+        born.extend(frame_born.tolist())
+    keys, x, y, values = server.cells
+    assert cells == dict(zip(zip(x.tolist(), y.tolist()), values.tolist()))
+    assert frames[-1][1] == 30 and (frames[-1][9] == periods[-1][9]).all()
+    if policy == 'coalesce':
+        # No period is lost: births of all periods are joined into the coalesced frames
+        assert born == list(range(1, 31))
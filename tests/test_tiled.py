@@ -0,0 +1,92 @@
+import numpy as np
+import pytest
+
+from main import Emulation, EventLog, Herds, RingSink, ReplayLog, Statistics, HERBIVORE, RELOCATED, SPECIES_NAMES
+
+
+@pytest.fixture
+def tiled():
+    emulation = Emulation(engine='tiled', seed=3, tiles=3, territory=60, events=EventLog(RingSink()))
+    emulation.headless = True
+    emulation.generate(3000)
+    yield emulation
+    if emulation.arrays.workers:
+        emulation.arrays.close()
+
+
+def test_events_of_workers_reach_the_event_log(tiled):
+    for _ in range(3):
+        tiled.period()
+    tiled.events.flush()
+    records = tiled.events.sink.events()
+    assert len(records) > 0
+    assert set(records['tick'].tolist()) == {1, 2, 3}
+    assert (records['event'] == RELOCATED).any()
+    # Records of all tiles are merged by tick
+    assert (np.diff(records['tick']) >= 0).all()
+
+
+def test_checkpoint_of_tiles_continues_identically(tiled, tmp_path):
+    for _ in range(3):
+        tiled.period()
+    tiled.save(tmp_path / 'checkpoint.npz')
+    loaded = Emulation.load(tmp_path / 'checkpoint.npz')
+    try:
+        assert loaded.checksum() == tiled.checksum()
+        for _ in range(3):
+            tiled.period()
+            loaded.period()
+            assert loaded.checksum() == tiled.checksum()
+    finally:
+        loaded.arrays.close()
+
+
+def test_replay_of_tiles_verifies(tiled, tmp_path):
+    tiled.record(ReplayLog(str(tmp_path / 'replay'), keyframe_period=2))
+    for _ in range(5):
+        tiled.period()
+    tiled.record(None)
+    replay = ReplayLog(str(tmp_path / 'replay'))
+    assert replay.keyframes() == [0, 2, 4]
+    assert replay.verify() is None
+
+
+def test_herds_over_tile_borders_match_one_world():
+    emulation = Emulation(engine='tiled', seed=5, tiles=4, territory=60)
+    emulation.headless = True
+    emulation.generate(3000)
+    try:
+        world = emulation.arrays.gather()
+        herbivores = world.species == HERBIVORE
+        x, y = world.x[herbivores], world.y[herbivores]
+        expected = dict(zip(world.id[herbivores].tolist(), Herds(x, y).members(x, y)[0].tolist()))
+        emulation.period()
+        world = emulation.arrays.gather()
+        survivors = np.isin(world.id, list(expected))
+        assert survivors.sum() > 0
+        assert world.herd[survivors].tolist() == [expected[key] for key in world.id[survivors].tolist()]
+    finally:
+        emulation.arrays.close()
+
+
+def test_counts_and_statistics_of_tiles_match_gathered_creatures(tiled, monkeypatch):
+    tiled.collect_statistics(Statistics())
+    gather = tiled.arrays.gather
+    # Periods, species counts and statistics do not copy creatures of the tiles to the parent
+    monkeypatch.setattr(tiled.arrays, 'gather', lambda: pytest.fail('creatures were gathered'))
+    for _ in range(3):
+        tiled.period()
+        counts = tiled.species_counts()
+        tiled.checksum()
+    monkeypatch.setattr(tiled.arrays, 'gather', gather)
+    world = gather()
+    assert counts.tolist() == np.bincount(world.species, minlength=len(SPECIES_NAMES)).tolist()
+    assert tiled.population() == world.count
+    expected = Statistics()
+    expected.summarize(world)
+    statistics = tiled.statistics
+    assert statistics.counts == expected.counts
+    assert statistics.occupied_cells == expected.occupied_cells
+    for name in Statistics.BINS:
+        assert statistics.sums[name] == pytest.approx(expected.sums[name])
+        assert statistics.histograms[name] == expected.histograms[name]